@@ -0,0 +1,105 @@
+"""
+Benchmark of token verification throughput with and without the revocation filter.
+
+`VerifyToken` is called on the servicer directly with valid tokens, against a
+stub Redis that answers revocation checks after a fixed round-trip time. The
+revocation filter is seeded with the given number of revoked tokens.
+Verifications per second and latency percentiles are reported for verification
+with Redis checks only and with the local filter in front of them.
+
+Usage:
+    python -m grpc_auth.benchmarks.bench_revocation_filter --requests 20000 --revoked 100000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from grpc_auth.proto import authorization_pb2
+from grpc_auth.src.auth_servicer import AuthorizationServicer
+from grpc_auth.src.revocation_filter import RevocationFilter
+
+
+class StubRedisManager:
+    """
+    Revocation store that answers every check after a fixed round-trip time.
+    """
+
+    def __init__(self, revoked: set[str], rtt: float) -> None:
+        self.revoked = revoked
+        self.rtt = rtt
+        self.calls = 0
+
+    async def is_revoked(self, token_id: str) -> bool:
+        self.calls += 1
+        await asyncio.sleep(self.rtt)
+        return token_id in self.revoked
+
+    async def iter_revoked(self):
+        for token_id in self.revoked:
+            yield token_id
+
+
+async def drive(
+    servicer: AuthorizationServicer, tokens: list[str], concurrency: int
+) -> tuple[float, float, float]:
+    """
+    Verifies all tokens with `concurrency` calls in flight.
+
+    Returns:
+        tuple[float, float, float]: The verifications per second, and the p50 and p99 latency in milliseconds.
+    """
+    remaining = iter(tokens)
+    latencies = []
+
+    async def worker() -> None:
+        for token in remaining:
+            request = authorization_pb2.VerifyTokenRequest(token=token)
+            call_start = time.perf_counter()
+            response = await servicer.VerifyToken(request, None)
+            latencies.append(time.perf_counter() - call_start)
+            assert response.valid
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    percentiles = statistics.quantiles(latencies, n=100)
+    return len(tokens) / elapsed, percentiles[49] * 1000, percentiles[98] * 1000
+
+
+async def main(args: argparse.Namespace) -> None:
+    revoked = {uuid.uuid4().hex for _ in range(args.revoked)}
+    servicer = AuthorizationServicer()
+    tokens = [servicer.auth_manager.generate_token(i) for i in range(args.requests)]
+
+    without_redis = StubRedisManager(revoked, args.rtt_ms / 1000)
+    servicer.redis_manager = without_redis
+    servicer.revocation_filter = None
+    without = await drive(servicer, tokens, args.concurrency)
+
+    with_redis = StubRedisManager(revoked, args.rtt_ms / 1000)
+    servicer.redis_manager = with_redis
+    servicer.revocation_filter = RevocationFilter(args.revoked, 0.001, 300)
+    await servicer.revocation_filter.seed(with_redis.iter_revoked())
+    servicer.revocation_filter.ready = True
+    with_filter = await drive(servicer, tokens, args.concurrency)
+
+    print(
+        "requests={} concurrency={} revoked={} redis_rtt={}ms".format(
+            args.requests, args.concurrency, args.revoked, args.rtt_ms
+        )
+    )
+    line = "{:<19} {:9.1f} verify/s  p50={:.3f}ms  p99={:.3f}ms  redis calls={}"
+    print(line.format("redis only:", *without, without_redis.calls))
+    print(line.format("revocation filter:", *with_filter, with_redis.calls))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--revoked", type=int, default=100000)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    asyncio.run(main(parser.parse_args()))
@@ -3,8 +3,10 @@ import logging
 import grpc
 
 from grpc_auth.proto import authorization_pb2, authorization_pb2_grpc
+from grpc_auth.src.config import config
 from grpc_auth.src.jwt_manager import JwtManager
 from grpc_auth.src.redis_manager import RedisManager
+from grpc_auth.src.revocation_filter import RevocationFilter
 
 
 class AuthorizationServicer(authorization_pb2_grpc.AuthorizationServicer):
@@ -17,19 +19,65 @@ class AuthorizationServicer(authorization_pb2_grpc.AuthorizationServicer):
     Attributes:
         auth_manager (JwtManager): The manager for handling JWT-related tasks.
         redis_manager (RedisManager): The manager for handling Redis-related tasks.
+        revocation_filter (RevocationFilter): The local filter of revoked tokens, or None if disabled.
 
     Methods:
         IssueToken: Issues a token for a given user ID.
         VerifyToken: Verifies a given token by checking its revocation status and validity.
-        RevokeToken: Revokes a given token by adding it to the list of revoked tokens.
+        VerifyTokens: Verifies several tokens in a single call.
+        RevokeToken: Revokes a given token until it expires.
         GetUserInfoFromToken: Retrieves user information from a given token.
+        VerifyAndGetClaims: Verifies a given token and returns its claims.
+        GetPublicKeys: Returns the public keys that verify token signatures.
+        CheckRevocation: Checks if a token ID is revoked.
+        GetDiagnostics: Reports claims cache and revocation filter metrics.
     """
 
     def __init__(self) -> None:
         self.auth_manager = JwtManager()
         self.redis_manager = RedisManager()
+        self.revocation_filter = None
+        if config.REVOCATION_FILTER_ENABLED.lower() == "true":
+            self.revocation_filter = RevocationFilter(
+                capacity=int(config.REVOCATION_FILTER_CAPACITY),
+                error_rate=float(config.REVOCATION_FILTER_ERROR_RATE),
+                refresh_interval=float(config.REVOCATION_FILTER_REFRESH_SECONDS),
+            )
         logging.info("Authorization Service successfully initialized!")
 
+    async def _is_revoked(self, token: str, claims: dict) -> bool:
+        """
+        Checks if a decoded token is revoked.
+
+        The local revocation filter answers most checks, and Redis is only
+        asked when the filter cannot rule the token out.
+
+        Args:
+            token (str): The token.
+            claims (dict): The claims of the token.
+
+        Returns:
+            bool: True if the token is revoked, False otherwise.
+        """
+        token_id = self.auth_manager.get_token_id(token, claims)
+        return await self._is_token_id_revoked(token_id)
+
+    async def _is_token_id_revoked(self, token_id: str) -> bool:
+        """
+        Checks if a token ID is revoked.
+
+        Args:
+            token_id (str): The ID of the token.
+
+        Returns:
+            bool: True if the token is revoked, False otherwise.
+        """
+        if self.revocation_filter is not None:
+            revoked = self.revocation_filter.check(token_id)
+            if revoked is not None:
+                return revoked
+        return await self.redis_manager.is_revoked(token_id)
+
     async def IssueToken(
         self,
         request: authorization_pb2.IssueTokenRequest,
@@ -39,13 +87,13 @@ class AuthorizationServicer(authorization_pb2_grpc.AuthorizationServicer):
         Issues a token for a given user ID.
 
         Args:
-            request: The request object containing the user ID.
+            request: The request object containing the user ID and role.
             context: The context object for the gRPC call.
 
         Returns:
             authorization_pb2.IssueTokenResponse: A response object containing the issued token.
         """
-        token = self.auth_manager.generate_token(request.user_id)
+        token = self.auth_manager.generate_token(request.user_id, request.role)
         logging.info("Issued token %s for user %s", token, request.user_id)
         return authorization_pb2.IssueTokenResponse(token=token)
 
@@ -64,25 +112,94 @@ class AuthorizationServicer(authorization_pb2_grpc.AuthorizationServicer):
         Returns:
             authorization_pb2.VerifyTokenResponse: A response object containing the verification result.
         """
-        revoked = await self.redis_manager.is_token_revoked(request.token)
-        if revoked:
+        claims = self.auth_manager.get_claims(request.token)
+        if claims is not None and await self._is_revoked(request.token, claims):
             logging.info("Token %s was verified revoked", request.token)
             return authorization_pb2.VerifyTokenResponse(valid=False)
 
-        valid = self.auth_manager.verify_token(request.token)
+        valid = claims is not None
         msg = "Token {} was verified {}".format(
             request.token, "valid" if valid else "expired"
         )
         logging.info(msg)
         return authorization_pb2.VerifyTokenResponse(valid=valid)
 
+    async def VerifyTokens(
+        self,
+        request: authorization_pb2.VerifyTokensRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> authorization_pb2.VerifyTokensResponse:
+        """
+        Verifies several tokens in a single call.
+
+        All tokens are decoded first. The revocation filter answers what it
+        can, and the remaining token IDs are checked with one Redis command.
+
+        Args:
+            request: The request object containing the tokens to be verified.
+            context: The context object for the gRPC call.
+
+        Returns:
+            authorization_pb2.VerifyTokensResponse: A response object containing the verification result
+            of every token, in the order of the request.
+        """
+        max_batch_size = int(config.VERIFY_TOKENS_MAX_BATCH_SIZE)
+        if len(request.tokens) > max_batch_size:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(
+                "At most {} tokens can be verified at once".format(max_batch_size)
+            )
+            return authorization_pb2.VerifyTokensResponse()
+
+        claims = [self.auth_manager.get_claims(token) for token in request.tokens]
+        token_ids = [
+            self.auth_manager.get_token_id(token, token_claims)
+            if token_claims is not None
+            else None
+            for token, token_claims in zip(request.tokens, claims)
+        ]
+
+        revoked = {}
+        unknown = []
+        for token_id in token_ids:
+            if token_id is None or token_id in revoked:
+                continue
+            local = None
+            if self.revocation_filter is not None:
+                local = self.revocation_filter.check(token_id)
+            if local is None:
+                unknown.append(token_id)
+            revoked[token_id] = local
+        revoked.update(zip(unknown, await self.redis_manager.are_revoked(unknown)))
+
+        results = []
+        for token_claims, token_id in zip(claims, token_ids):
+            if token_claims is None or revoked[token_id]:
+                results.append(authorization_pb2.TokenVerification(valid=False))
+            else:
+                results.append(
+                    authorization_pb2.TokenVerification(
+                        valid=True,
+                        user_id=token_claims["user_id"],
+                        role=token_claims.get("role", "user"),
+                    )
+                )
+        logging.info(
+            "Verified {} tokens, {} checked in Redis".format(
+                len(results), len(unknown)
+            )
+        )
+        return authorization_pb2.VerifyTokensResponse(results=results)
+
     async def RevokeToken(
         self,
         request: authorization_pb2.RevokeTokenRequest,
         context: grpc.aio.ServicerContext,
     ) -> authorization_pb2.RevokeTokenResponse:
         """
-        Revokes a given token by adding it to the list of revoked tokens.
+        Revokes a given token until it expires.
+
+        Invalid and expired tokens are rejected anyway, so nothing is stored for them.
 
         Args:
             request: The request object containing the token to be revoked.
@@ -91,7 +208,13 @@ class AuthorizationServicer(authorization_pb2_grpc.AuthorizationServicer):
         Returns:
             authorization_pb2.RevokeTokenResponse: A response object containing the revocation result.
         """
-        await self.redis_manager.add_revoked_token(request.token)
+        claims = self.auth_manager.get_claims(request.token)
+        if claims is not None:
+            token_id = self.auth_manager.get_token_id(request.token, claims)
+            await self.redis_manager.revoke(token_id, claims["exp"])
+            if self.revocation_filter is not None:
+                self.revocation_filter.add(token_id, claims["exp"])
+            self.auth_manager.evict(request.token)
         logging.info("token %s is revoked", request.token)
         return authorization_pb2.RevokeTokenResponse(success=True)
 
@@ -110,8 +233,8 @@ class AuthorizationServicer(authorization_pb2_grpc.AuthorizationServicer):
         Returns:
             authorization_pb2.GetUserInfoFromTokenResponse: A response object containing the user ID.
         """
-        revoked = await self.redis_manager.is_token_revoked(request.token)
-        if revoked:
+        claims = self.auth_manager.get_claims(request.token)
+        if claims is not None and await self._is_revoked(request.token, claims):
             logging.error("Token %s has been revoked", request.token)
             context.set_code(grpc.StatusCode.PERMISSION_DENIED)
             context.set_details("Token has been revoked")
@@ -120,3 +243,112 @@ class AuthorizationServicer(authorization_pb2_grpc.AuthorizationServicer):
         user_id = self.auth_manager.get_user_info_from_token(request.token)
         logging.info("got info for user %d with token %s", user_id, request.token)
         return authorization_pb2.GetUserInfoFromTokenResponse(user_id=user_id)
+
+    async def VerifyAndGetClaims(
+        self,
+        request: authorization_pb2.VerifyAndGetClaimsRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> authorization_pb2.VerifyAndGetClaimsResponse:
+        """
+        Verifies a given token and returns its claims in a single call.
+
+        The signature and expiry are checked first, so malformed and expired
+        tokens are rejected without a round trip to Redis.
+
+        Args:
+            request: The request object containing the token to be verified.
+            context: The context object for the gRPC call.
+
+        Returns:
+            authorization_pb2.VerifyAndGetClaimsResponse: A response object containing the verification result,
+            and the user ID, role, expiry and ID of the token if it is valid.
+        """
+        claims = self.auth_manager.get_claims(request.token)
+        if claims is None:
+            return authorization_pb2.VerifyAndGetClaimsResponse(valid=False)
+
+        if await self._is_revoked(request.token, claims):
+            logging.info("Token %s was verified revoked", request.token)
+            return authorization_pb2.VerifyAndGetClaimsResponse(valid=False)
+
+        return authorization_pb2.VerifyAndGetClaimsResponse(
+            valid=True,
+            user_id=claims["user_id"],
+            role=claims.get("role", "user"),
+            expires_at=claims["exp"],
+            jti=claims.get("jti", ""),
+        )
+
+    async def GetPublicKeys(
+        self,
+        request: authorization_pb2.GetPublicKeysRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> authorization_pb2.GetPublicKeysResponse:
+        """
+        Returns the public keys that verify token signatures.
+
+        Args:
+            request: The empty request object.
+            context: The context object for the gRPC call.
+
+        Returns:
+            authorization_pb2.GetPublicKeysResponse: A response object containing the public keys,
+            which is empty if tokens are signed with the shared secret.
+        """
+        key_store = self.auth_manager.key_store
+        if key_store is None:
+            return authorization_pb2.GetPublicKeysResponse()
+        return authorization_pb2.GetPublicKeysResponse(
+            keys=[
+                authorization_pb2.PublicKey(
+                    kid=kid, algorithm=key_store.algorithm, pem=pem
+                )
+                for kid, pem in key_store.public_keys().items()
+            ]
+        )
+
+    async def CheckRevocation(
+        self,
+        request: authorization_pb2.CheckRevocationRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> authorization_pb2.CheckRevocationResponse:
+        """
+        Checks if a token ID is revoked.
+
+        Used by services that verify token signatures locally.
+
+        Args:
+            request: The request object containing the token ID.
+            context: The context object for the gRPC call.
+
+        Returns:
+            authorization_pb2.CheckRevocationResponse: A response object containing the revocation status.
+        """
+        revoked = await self._is_token_id_revoked(request.token_id)
+        return authorization_pb2.CheckRevocationResponse(revoked=revoked)
+
+    async def GetDiagnostics(
+        self,
+        request: authorization_pb2.GetDiagnosticsRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> authorization_pb2.GetDiagnosticsResponse:
+        """
+        Reports the claims cache and revocation filter counters.
+
+        Args:
+            request: The empty request object.
+            context: The context object for the gRPC call.
+
+        Returns:
+            authorization_pb2.GetDiagnosticsResponse: A response object containing the metrics of the service.
+        """
+        metrics = {
+            "claims_cache.{}".format(name): value
+            for name, value in self.auth_manager.claims_cache.stats().items()
+        }
+        if self.revocation_filter is not None:
+            metrics.update(
+                ("revocation_filter.{}".format(name), value)
+                for name, value in self.revocation_filter.stats().items()
+            )
+        return authorization_pb2.GetDiagnosticsResponse(metrics=metrics)
@@ -13,7 +13,19 @@ class Config:
     """
 
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "default_secret_key")
+    JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+    JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR", "keys")
+    JWT_KEY_ROTATION_HOURS = os.getenv("JWT_KEY_ROTATION_HOURS", "0")
+    JWT_CLAIMS_CACHE_SIZE = os.getenv("JWT_CLAIMS_CACHE_SIZE", "10000")
+    VERIFY_TOKENS_MAX_BATCH_SIZE = os.getenv("VERIFY_TOKENS_MAX_BATCH_SIZE", "1000")
     REDIS_HOSTNAME = os.getenv("REDIS_HOSTNAME", "localhost")
+    REDIS_MAX_CONNECTIONS = os.getenv("REDIS_MAX_CONNECTIONS", "50")
+    REVOCATION_FILTER_ENABLED = os.getenv("REVOCATION_FILTER_ENABLED", "true")
+    REVOCATION_FILTER_CAPACITY = os.getenv("REVOCATION_FILTER_CAPACITY", "100000")
+    REVOCATION_FILTER_ERROR_RATE = os.getenv("REVOCATION_FILTER_ERROR_RATE", "0.001")
+    REVOCATION_FILTER_REFRESH_SECONDS = os.getenv(
+        "REVOCATION_FILTER_REFRESH_SECONDS", "300"
+    )
     SERVER_PORT = os.getenv("SERVER_PORT", "50053")
 
 
@@ -1,9 +1,123 @@
+import hashlib
 import logging
-from datetime import datetime, timedelta
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable
 
 import jwt
 
 from grpc_auth.src.config import config
+from grpc_auth.src.key_store import KeyStore
+
+
+class ClaimsCache:
+    """
+    Bounded LRU cache of decoded token claims.
+
+    Entries are keyed by a digest of the token and expire together with the
+    token, so a cached entry never outlives the `exp` claim it was decoded with.
+
+    Attributes:
+        max_size (int): The maximum number of cached tokens.
+        hits (int): The number of lookups served from the cache.
+        misses (int): The number of lookups that had to decode the token.
+        evictions (int): The number of entries dropped because the cache was full.
+        expirations (int): The number of entries dropped because their token expired.
+        invalidations (int): The number of entries dropped by revocations.
+
+    Methods:
+        get: Returns the cached claims of a token.
+        put: Stores the claims of a token.
+        invalidate: Drops the claims of a token.
+        stats: Returns the cache counters.
+    """
+
+    def __init__(self, max_size: int, clock: Callable[[], float] = time.time) -> None:
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: OrderedDict[bytes, dict] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=32).digest()
+
+    def get(self, token: str) -> dict | None:
+        """
+        Returns the cached claims of a token.
+
+        Args:
+            token (str): The JWT token.
+
+        Returns:
+            dict or None: The claims of the token, or None if they are not cached or the token has expired.
+        """
+        key = self._key(token)
+        claims = self._entries.get(key)
+        if claims is not None and claims["exp"] <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            claims = None
+        if claims is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, token: str, claims: dict) -> None:
+        """
+        Stores the claims of a successfully verified token.
+
+        Args:
+            token (str): The JWT token.
+            claims (dict): The decoded claims of the token.
+        """
+        if self.max_size <= 0:
+            return
+        key = self._key(token)
+        self._entries[key] = claims
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, token: str) -> None:
+        """
+        Drops the claims of a token.
+
+        Args:
+            token (str): The JWT token.
+        """
+        if self._entries.pop(self._key(token), None) is not None:
+            self.invalidations += 1
+
+    def stats(self) -> dict[str, float]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict[str, float]: The counters, current size and hit rate of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
 
 
 class JwtManager:
@@ -13,35 +127,91 @@ class JwtManager:
     This class provides methods for generating and verifying JWT tokens.
     It also handles token revocation.
 
+    Tokens are signed with the shared HS256 secret by default. With
+    `JWT_ALGORITHM` set to "EdDSA" or "RS256", they are signed with the newest
+    key of the key store and carry its ID in the `kid` header, so that other
+    services can verify them with the public keys.
+
     Attributes:
-        secret_key (str): The secret key used to sign and verify JWT tokens.
+        secret_key (str): The secret key used to sign and verify HS256 tokens.
+        key_store (KeyStore): The asymmetric signing keys, or None for HS256.
+        claims_cache (ClaimsCache): The cache of claims of already verified tokens.
 
     Methods:
         generate_token: Generates a JWT token for a given user ID.
         verify_token: Verifies a given JWT token.
+        get_claims: Verifies a given JWT token and returns its claims.
+        get_token_id: Returns the ID under which a token is revoked.
+        resolve_revocation: Returns the ID and expiry of a valid token.
+        evict: Drops a token from the claims cache.
     """
 
     JWT_ALGORITHM = ["HS256"]
+    TOKEN_LIFETIME = timedelta(days=1)
 
     def __init__(self) -> None:
         self.secret_key = config.JWT_SECRET_KEY
+        self.claims_cache = ClaimsCache(int(config.JWT_CLAIMS_CACHE_SIZE))
+        self.key_store = None
+        if config.JWT_ALGORITHM != "HS256":
+            self.key_store = KeyStore(config.JWT_KEYS_DIR, config.JWT_ALGORITHM)
+            self.key_store.load()
 
-    def generate_token(self, user_id: int) -> str:
+    def generate_token(self, user_id: int, role: str = "user") -> str:
         """
         Generates a JWT token for a given user ID.
 
+        The token carries the user's role, so authorization needs no lookup in
+        the user service. A role change takes effect with the next token.
+
         Args:
             user_id (int): The ID of the user to generate the token for.
+            role (str): The role of the user, e.g. "user" or "admin".
 
         Returns:
             str: A JWT token that can be used for authentication.
         """
+        issued_at = datetime.now(timezone.utc)
         payload = {
             "user_id": user_id,
-            "exp": datetime.now() + timedelta(days=1),
+            "role": role or "user",
+            "jti": uuid.uuid4().hex,
+            "iat": issued_at,
+            "exp": issued_at + self.TOKEN_LIFETIME,
         }
-        token = jwt.encode(payload, self.secret_key, algorithm=self.JWT_ALGORITHM[0])
-        return token
+        if self.key_store is None:
+            return jwt.encode(payload, self.secret_key, algorithm=self.JWT_ALGORITHM[0])
+        kid = self.key_store.signing_kid
+        return jwt.encode(
+            payload,
+            self.key_store.private_keys[kid],
+            algorithm=self.key_store.algorithm,
+            headers={"kid": kid},
+        )
+
+    def _decode(self, token: str) -> dict:
+        """
+        Verifies the signature and expiry of a token and returns its claims.
+
+        Tokens verified before are served from the claims cache until they expire.
+
+        Raises:
+            jwt.InvalidTokenError: If the token is invalid or has expired.
+        """
+        claims = self.claims_cache.get(token)
+        if claims is None:
+            claims = self._verify_signature(token)
+            self.claims_cache.put(token, claims)
+        return claims
+
+    def _verify_signature(self, token: str) -> dict:
+        if self.key_store is None:
+            return jwt.decode(token, self.secret_key, algorithms=self.JWT_ALGORITHM)
+        kid = jwt.get_unverified_header(token).get("kid")
+        public_key = self.key_store.public_key(kid)
+        if public_key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return jwt.decode(token, public_key, algorithms=[self.key_store.algorithm])
 
     def verify_token(self, token: str) -> bool:
         """
@@ -54,7 +224,7 @@ class JwtManager:
             bool: True if the token is valid, False otherwise.
         """
         try:
-            jwt.decode(token, self.secret_key, algorithms=self.JWT_ALGORITHM)
+            self._decode(token)
             return True
         except jwt.ExpiredSignatureError:
             logging.error("JWT token has expired")
@@ -63,6 +233,66 @@ class JwtManager:
             logging.error("Invalid JWT token")
             return False
 
+    def get_claims(self, token: str) -> dict | None:
+        """
+        Verifies a given JWT token and returns its claims.
+
+        Args:
+            token (str): The JWT token to decode.
+
+        Returns:
+            dict or None: The claims of the token, or None if the token is invalid or has expired.
+        """
+        try:
+            return self._decode(token)
+        except jwt.ExpiredSignatureError:
+            logging.error("JWT token has expired")
+            return None
+        except jwt.InvalidTokenError:
+            logging.error("Invalid JWT token")
+            return None
+
+    @staticmethod
+    def get_token_id(token: str, claims: dict) -> str:
+        """
+        Returns the ID under which a token is revoked.
+
+        Tokens issued before the `jti` claim was introduced are identified by
+        the SHA-256 digest of the token instead.
+
+        Args:
+            token (str): The JWT token.
+            claims (dict): The claims of the token.
+
+        Returns:
+            str: The `jti` claim of the token, or the digest of the token if it has none.
+        """
+        return claims.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+    def resolve_revocation(self, token: str) -> tuple[str, float] | None:
+        """
+        Returns the ID and expiry of a token that is still valid.
+
+        Args:
+            token (str): The JWT token.
+
+        Returns:
+            tuple[str, float] or None: The ID and expiry of the token, or None if the token is invalid or has expired.
+        """
+        claims = self.get_claims(token)
+        if claims is None:
+            return None
+        return self.get_token_id(token, claims), claims["exp"]
+
+    def evict(self, token: str) -> None:
+        """
+        Drops a token from the claims cache, e.g. when it is revoked.
+
+        Args:
+            token (str): The JWT token.
+        """
+        self.claims_cache.invalidate(token)
+
     def get_user_info_from_token(self, token: str) -> int | None:
         """
         Retrieves user information from a given JWT token.
@@ -74,7 +304,7 @@ class JwtManager:
             int or None: The user ID if the token is valid, None if the token has expired, or -1 if the token is invalid.
         """
         try:
-            decoded_token = jwt.decode(token, self.secret_key, self.JWT_ALGORITHM)
+            decoded_token = self._decode(token)
             return decoded_token.get("user_id")
         except jwt.ExpiredSignatureError:
             logging.error("JWT token has expired")
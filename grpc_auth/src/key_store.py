@@ -0,0 +1,177 @@
+import logging
+import os
+import secrets
+import time
+from datetime import datetime, timezone
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+"""
+This module contains the store of asymmetric keys used to sign JWT tokens.
+
+Every key is a PEM encoded private key in the keys directory, named after its
+key ID. Key IDs start with their creation time, so the newest key signs new
+tokens, while the older ones stay available for verifying tokens issued before
+a rotation.
+"""
+
+SUPPORTED_ALGORITHMS = ("EdDSA", "RS256")
+RELOAD_INTERVAL_SECONDS = 10
+
+
+class KeyStore:
+    """
+    Store of the signing keys of the authorization service.
+
+    Attributes:
+        directory (str): The directory holding the private keys.
+        algorithm (str): The JWT algorithm of the keys, "EdDSA" or "RS256".
+        private_keys (dict): Key ID mapped to the private key.
+        signing_kid (str): The ID of the key used to sign new tokens.
+
+    Methods:
+        load: Loads all keys from the keys directory.
+        rotate: Creates a new signing key.
+        signing_key_age: Returns the age of the signing key.
+        prune: Deletes keys older than a given age.
+        public_keys: Returns the public keys in PEM format.
+        public_key: Returns the public key of a key ID.
+    """
+
+    def __init__(self, directory: str, algorithm: str) -> None:
+        if algorithm not in SUPPORTED_ALGORITHMS:
+            raise ValueError("Unsupported JWT algorithm: {}".format(algorithm))
+        self.directory = directory
+        self.algorithm = algorithm
+        self.private_keys = {}
+        self.signing_kid = None
+        self._public_keys = {}
+        self._loaded_at = 0.0
+
+    def _generate_key(self):
+        if self.algorithm == "EdDSA":
+            return ed25519.Ed25519PrivateKey.generate()
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def load(self) -> None:
+        """
+        Loads all keys from the keys directory, creating a first key if there is none.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        private_keys = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith(".pem"):
+                continue
+            with open(os.path.join(self.directory, name), "rb") as key_file:
+                private_keys[name[: -len(".pem")]] = (
+                    serialization.load_pem_private_key(key_file.read(), password=None)
+                )
+        self.private_keys = private_keys
+        self._public_keys = {
+            kid: private_key.public_key() for kid, private_key in private_keys.items()
+        }
+        self._loaded_at = time.monotonic()
+        if not self.private_keys:
+            self.rotate()
+            return
+        self.signing_kid = max(self.private_keys)
+        logging.info(
+            "Loaded {} signing keys, signing with {}".format(
+                len(self.private_keys), self.signing_kid
+            )
+        )
+
+    def rotate(self) -> str:
+        """
+        Creates a new key and makes it the signing key.
+
+        Returns:
+            str: The ID of the new key.
+        """
+        kid = "{}-{}".format(
+            datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S"), secrets.token_hex(4)
+        )
+        private_key = self._generate_key()
+        pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+        path = os.path.join(self.directory, kid + ".pem")
+        # The file is written under a temporary name and renamed, so instances
+        # sharing the directory never read a partially written key.
+        with open(path + ".tmp", "wb") as key_file:
+            key_file.write(pem)
+        os.chmod(path + ".tmp", 0o600)
+        os.replace(path + ".tmp", path)
+        self.private_keys[kid] = private_key
+        self._public_keys[kid] = private_key.public_key()
+        self.signing_kid = kid
+        logging.info("Rotated signing key, signing with {}".format(kid))
+        return kid
+
+    def signing_key_age(self) -> float:
+        """
+        Returns the age of the signing key in seconds.
+        """
+        created_at = datetime.strptime(
+            self.signing_kid.split("-")[0], "%Y%m%d%H%M%S"
+        ).replace(tzinfo=timezone.utc)
+        return time.time() - created_at.timestamp()
+
+    def prune(self, max_age: float) -> None:
+        """
+        Deletes keys older than `max_age`, except for the signing key.
+
+        Args:
+            max_age (float): The age in seconds after which a key can no longer have valid tokens.
+        """
+        threshold = datetime.fromtimestamp(time.time() - max_age, timezone.utc)
+        oldest_kid = threshold.strftime("%Y%m%d%H%M%S")
+        for kid in list(self.private_keys):
+            if kid < oldest_kid and kid != self.signing_kid:
+                del self.private_keys[kid]
+                del self._public_keys[kid]
+                try:
+                    os.remove(os.path.join(self.directory, kid + ".pem"))
+                except FileNotFoundError:
+                    pass
+                logging.info("Pruned signing key {}".format(kid))
+
+    def public_keys(self) -> dict[str, str]:
+        """
+        Returns the public keys in PEM format.
+
+        Returns:
+            dict[str, str]: Key ID mapped to the PEM encoded public key.
+        """
+        return {
+            kid: public_key.public_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo,
+            ).decode()
+            for kid, public_key in self._public_keys.items()
+        }
+
+    def public_key(self, kid: str):
+        """
+        Returns the public key of a key ID.
+
+        An unknown key ID may belong to a key just created by another instance
+        sharing the keys directory, so the directory is reloaded, at most once
+        every few seconds.
+
+        Args:
+            kid (str): The key ID from the token header.
+
+        Returns:
+            The public key, or None if the key ID is unknown.
+        """
+        public_key = self._public_keys.get(kid)
+        if public_key is None and (
+            time.monotonic() - self._loaded_at > RELOAD_INTERVAL_SECONDS
+        ):
+            self.load()
+            public_key = self._public_keys.get(kid)
+        return public_key
@@ -1,24 +1,54 @@
 import logging
-from typing import Any, Literal
+import math
+import time
+from typing import AsyncIterator, Callable
 
 from redis import asyncio as aioredis
 
 from grpc_auth.src.config import config
 
+REVOKED_KEY_PREFIX = "revoked:"
+LEGACY_REVOKED_SET = "revoked_tokens"
+REVOCATION_CHANNEL = "revocations"
+
 
 class RedisManager:
+    """
+    Manager for handling Redis-related tasks.
+
+    Revoked tokens are stored as one key per token ID that expires together
+    with the token, so Redis only holds revocations that still matter.
+
+    Attributes:
+        redis (aioredis.Redis): The client shared by all requests.
+
+    Methods:
+        connect: Connects to Redis.
+        close: Closes the connection to Redis.
+        revoke: Marks a token ID as revoked until the token expires.
+        is_revoked: Checks if a token ID is revoked.
+        are_revoked: Checks several token IDs with a single command.
+        iter_revoked: Yields the IDs of all revoked tokens.
+        migrate_legacy_revocations: Moves revoked tokens from the legacy set to expiring keys.
+    """
+
     def __init__(self) -> None:
         self.redis_pool = None
+        self.redis = None
 
     async def connect(self) -> None:
         """
         Establishes a connection to the Redis database.
 
-        This method sets up a connection pool to the Redis database using the hostname specified in the config.
+        This method sets up a connection pool to the Redis database using the hostname specified in the config,
+        and a client on top of it that is reused by every call.
         """
         try:
             host = config.REDIS_HOSTNAME
-            self.redis_pool = aioredis.ConnectionPool.from_url(f"redis://{host}")
+            self.redis_pool = aioredis.ConnectionPool.from_url(
+                f"redis://{host}", max_connections=int(config.REDIS_MAX_CONNECTIONS)
+            )
+            self.redis = aioredis.Redis(connection_pool=self.redis_pool)
             logging.info("Connected to Redis")
         except Exception as e:
             logging.error(f"Error connecting to Redis: {e}")
@@ -31,29 +61,118 @@ class RedisManager:
         This method checks if a connection pool exists and if so, closes it asynchronously.
         """
         if self.redis_pool:
+            await self.redis.aclose()
             await self.redis_pool.aclose()
             logging.info("Disconnected from Redis")
 
-    async def add_revoked_token(self, token: str) -> None:
+    async def revoke(self, token_id: str, expires_at: float) -> None:
         """
-        Adds a revoked token to the Redis database.
+        Marks a token ID as revoked until the token expires.
+
+        Tokens that have already expired are not stored, since they are rejected anyway.
+        The revocation is also published on the `revocations` channel, so that
+        the revocation filters of all service instances learn about it.
 
         Args:
-            token (str): The token to be added to the revoked tokens set.
+            token_id (str): The ID of the token, i.e. its `jti` claim.
+            expires_at (float): The expiry of the token as a Unix timestamp.
         """
-        async with aioredis.Redis.from_pool(self.redis_pool) as conn:
-            await conn.sadd("revoked_tokens", token)
+        ttl = math.ceil(expires_at - time.time())
+        if ttl <= 0:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(REVOKED_KEY_PREFIX + token_id, 1, ex=ttl)
+            pipe.publish(REVOCATION_CHANNEL, "{} {}".format(token_id, expires_at))
+            await pipe.execute()
 
-    async def is_token_revoked(self, token: str) -> bool:
+    async def is_revoked(self, token_id: str) -> bool:
         """
-        Checks if a given token is revoked by querying the Redis database.
+        Checks if a token ID is revoked.
 
         Args:
-            token (str): The token to be checked for revocation.
+            token_id (str): The ID of the token, i.e. its `jti` claim.
 
         Returns:
             bool: True if the token is revoked, False otherwise.
         """
-        async with aioredis.Redis.from_pool(self.redis_pool) as conn:
-            result = await conn.sismember("revoked_tokens", token)
-        return result
+        return bool(await self.redis.exists(REVOKED_KEY_PREFIX + token_id))
+
+    async def are_revoked(self, token_ids: list[str]) -> list[bool]:
+        """
+        Checks several token IDs with a single MGET command.
+
+        Args:
+            token_ids (list[str]): The IDs of the tokens.
+
+        Returns:
+            list[bool]: Whether each token is revoked, in the order of `token_ids`.
+        """
+        if not token_ids:
+            return []
+        values = await self.redis.mget(
+            [REVOKED_KEY_PREFIX + token_id for token_id in token_ids]
+        )
+        return [value is not None for value in values]
+
+    async def iter_revoked(self, batch_size: int = 1000) -> AsyncIterator[str]:
+        """
+        Yields the IDs of all revoked tokens.
+
+        Keys are read with SCAN, so Redis is not blocked by large key spaces.
+
+        Args:
+            batch_size (int): The number of keys read at a time.
+
+        Yields:
+            str: The ID of a revoked token.
+        """
+        async for key in self.redis.scan_iter(
+            match=REVOKED_KEY_PREFIX + "*", count=batch_size
+        ):
+            key = key.decode() if isinstance(key, bytes) else key
+            yield key[len(REVOKED_KEY_PREFIX) :]
+
+    async def migrate_legacy_revocations(
+        self,
+        resolve: Callable[[str], tuple[str, float] | None],
+        batch_size: int = 500,
+    ) -> int:
+        """
+        Moves revoked tokens from the legacy `revoked_tokens` set to expiring keys.
+
+        The set is scanned in batches and every migrated member is removed from
+        it, so the migration can be interrupted and run again safely.
+
+        Args:
+            resolve (Callable): Maps a token to its ID and expiry, or to None if the token is invalid or expired.
+            batch_size (int): The number of members read from the set at a time.
+
+        Returns:
+            int: The number of tokens that are still live and were migrated.
+        """
+        migrated = 0
+        cursor = 0
+        while True:
+            cursor, tokens = await self.redis.sscan(
+                LEGACY_REVOKED_SET, cursor, count=batch_size
+            )
+            if tokens:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for token in tokens:
+                        resolved = resolve(
+                            token.decode() if isinstance(token, bytes) else token
+                        )
+                        if resolved is None:
+                            continue
+                        token_id, expires_at = resolved
+                        ttl = math.ceil(expires_at - time.time())
+                        if ttl > 0:
+                            pipe.set(REVOKED_KEY_PREFIX + token_id, 1, ex=ttl)
+                            migrated += 1
+                    pipe.srem(LEGACY_REVOKED_SET, *tokens)
+                    await pipe.execute()
+            if cursor == 0:
+                break
+        if migrated:
+            logging.info("Migrated {} legacy revoked tokens".format(migrated))
+        return migrated
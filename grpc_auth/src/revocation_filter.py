@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import AsyncIterator
+
+from grpc_auth.src.redis_manager import REVOCATION_CHANNEL, RedisManager
+
+"""
+This module contains the in-process revocation filter of the authorization service.
+
+Almost no tokens are ever revoked, so most revocation checks can be answered
+locally: a Bloom filter seeded from Redis rules out tokens that were never
+revoked, and an exact set holds the revocations received since then. Redis is
+only asked about tokens that hit the Bloom filter.
+"""
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Attributes:
+        capacity (int): The number of items the filter is sized for.
+        error_rate (float): The false positive rate at full capacity.
+        size (int): The number of bits.
+        hash_count (int): The number of bits set per item.
+        count (int): The number of items added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        # Double hashing: k positions derived from two independent 64-bit hashes.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevocationFilter:
+    """
+    Local view of the revoked token IDs, kept in sync with Redis.
+
+    The Bloom filter is rebuilt from Redis periodically, which also drops
+    revocations that have expired since. Revocations published while the
+    filter is running go to an exact set that is pruned as tokens expire.
+    Until the filter is seeded, and whenever the subscription is lost, every
+    check is left to Redis.
+
+    Attributes:
+        capacity (int): The minimum number of revocations the Bloom filter is sized for.
+        error_rate (float): The false positive rate of the Bloom filter.
+        refresh_interval (float): How often the Bloom filter is rebuilt, in seconds.
+        ready (bool): Whether the filter is seeded and subscribed to revocations.
+        local_answers (int): The number of checks answered without Redis.
+        redis_checks (int): The number of checks left to Redis.
+
+    Methods:
+        check: Checks a token ID against the filter.
+        add: Records a revocation.
+        seed: Rebuilds the Bloom filter from a stream of revoked token IDs.
+        run: Keeps the filter in sync with Redis until cancelled.
+        stats: Returns the filter counters.
+    """
+
+    def __init__(
+        self, capacity: int, error_rate: float, refresh_interval: float
+    ) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.ready = False
+        self.local_answers = 0
+        self.redis_checks = 0
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._recent: dict[str, float] = {}
+        self._seeded_at = 0.0
+
+    def check(self, token_id: str) -> bool | None:
+        """
+        Checks a token ID against the filter.
+
+        Args:
+            token_id (str): The ID of the token.
+
+        Returns:
+            bool or None: True if the token is known to be revoked, False if it is known not to be,
+            or None if Redis has to be asked.
+        """
+        if self.ready:
+            expires_at = self._recent.get(token_id)
+            if expires_at is not None and expires_at > time.time():
+                self.local_answers += 1
+                return True
+            if token_id not in self._bloom:
+                self.local_answers += 1
+                return False
+        self.redis_checks += 1
+        return None
+
+    def add(self, token_id: str, expires_at: float) -> None:
+        """
+        Records a revocation.
+
+        Args:
+            token_id (str): The ID of the revoked token.
+            expires_at (float): The expiry of the token as a Unix timestamp.
+        """
+        self._recent[token_id] = expires_at
+
+    def _prune(self) -> None:
+        now = time.time()
+        self._recent = {
+            token_id: expires_at
+            for token_id, expires_at in self._recent.items()
+            if expires_at > now
+        }
+
+    async def seed(self, token_ids: AsyncIterator[str]) -> None:
+        """
+        Rebuilds the Bloom filter from a stream of revoked token IDs.
+
+        The new filter replaces the old one only once it is complete, so checks
+        running meanwhile keep using the old one.
+
+        Args:
+            token_ids (AsyncIterator[str]): The IDs of all currently revoked tokens.
+        """
+        start = time.perf_counter()
+        seeded = [token_id async for token_id in token_ids]
+        bloom = BloomFilter(max(self.capacity, 2 * len(seeded)), self.error_rate)
+        for token_id in seeded:
+            bloom.add(token_id)
+        self._bloom = bloom
+        self._prune()
+        self._seeded_at = time.monotonic()
+        logging.info(
+            "Seeded revocation filter with {} tokens in {:.2f}s".format(
+                len(seeded), time.perf_counter() - start
+            )
+        )
+
+    async def run(self, redis_manager: RedisManager, retry_delay: float = 1.0) -> None:
+        """
+        Keeps the filter in sync with Redis until cancelled.
+
+        The channel is subscribed to before seeding, so no revocation published
+        during the seed is missed. If the connection fails, the filter stops
+        answering until it is subscribed and seeded again.
+
+        Args:
+            redis_manager (RedisManager): The manager of the Redis connection.
+            retry_delay (float): The delay before reconnecting after a failure, in seconds.
+        """
+        while True:
+            pubsub = redis_manager.redis.pubsub()
+            try:
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                await self.seed(redis_manager.iter_revoked())
+                self.ready = True
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        token_id, expires_at = message["data"].decode().split(" ")
+                        self.add(token_id, float(expires_at))
+                    if time.monotonic() - self._seeded_at > self.refresh_interval:
+                        await self.seed(redis_manager.iter_revoked())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error("Revocation filter lost sync with Redis: {}".format(e))
+            finally:
+                self.ready = False
+                await pubsub.aclose()
+            await asyncio.sleep(retry_delay)
+
+    def stats(self) -> dict[str, float]:
+        """
+        Returns the filter counters.
+
+        Returns:
+            dict[str, float]: The counters and sizes of the filter.
+        """
+        return {
+            "ready": float(self.ready),
+            "seeded": self._bloom.count,
+            "recent": len(self._recent),
+            "local_answers": self.local_answers,
+            "redis_checks": self.redis_checks,
+        }
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 import grpc
@@ -6,6 +7,32 @@ from grpc_reflection.v1alpha import reflection
 from grpc_auth.proto import authorization_pb2, authorization_pb2_grpc
 from grpc_auth.src.auth_servicer import AuthorizationServicer
 from grpc_auth.src.config import config
+from grpc_auth.src.jwt_manager import JwtManager
+
+
+async def rotate_keys(jwt_manager: JwtManager, rotation_interval: float) -> None:
+    """
+    Rotates the signing key once it is older than `rotation_interval`.
+
+    Keys are kept until every token they signed has expired, and the keys
+    directory is reloaded on every pass, so that instances sharing it pick up
+    keys rotated by each other.
+
+    Args:
+        jwt_manager (JwtManager): The manager owning the key store.
+        rotation_interval (float): The lifetime of a signing key in seconds.
+    """
+    key_store = jwt_manager.key_store
+    max_age = rotation_interval + jwt_manager.TOKEN_LIFETIME.total_seconds()
+    while True:
+        try:
+            key_store.load()
+            if key_store.signing_key_age() >= rotation_interval:
+                key_store.rotate()
+            key_store.prune(max_age)
+        except OSError as e:
+            logging.error("Failed to rotate signing keys: {}".format(e))
+        await asyncio.sleep(min(rotation_interval / 4, 3600))
 
 
 async def serve() -> None:
@@ -17,6 +44,22 @@ async def serve() -> None:
     server = grpc.aio.server()
     authorization_servicer = AuthorizationServicer()
     await authorization_servicer.redis_manager.connect()
+    await authorization_servicer.redis_manager.migrate_legacy_revocations(
+        authorization_servicer.auth_manager.resolve_revocation
+    )
+    key_rotation_task = None
+    rotation_hours = float(config.JWT_KEY_ROTATION_HOURS)
+    if authorization_servicer.auth_manager.key_store is not None and rotation_hours > 0:
+        key_rotation_task = asyncio.create_task(
+            rotate_keys(authorization_servicer.auth_manager, rotation_hours * 3600)
+        )
+    revocation_filter_task = None
+    if authorization_servicer.revocation_filter is not None:
+        revocation_filter_task = asyncio.create_task(
+            authorization_servicer.revocation_filter.run(
+                authorization_servicer.redis_manager
+            )
+        )
 
     authorization_pb2_grpc.add_AuthorizationServicer_to_server(
         authorization_servicer, server
@@ -32,4 +75,10 @@ async def serve() -> None:
     server.add_insecure_port(listen_addr)
     logging.info(f"Starting authorization server on {listen_addr}")
     await server.start()
-    await server.wait_for_termination()
+    try:
+        await server.wait_for_termination()
+    finally:
+        for task in (key_rotation_task, revocation_filter_task):
+            if task is not None:
+                task.cancel()
+        await authorization_servicer.redis_manager.close()
@@ -0,0 +1,88 @@
+import asyncio
+import sys
+import time
+from datetime import timedelta
+
+import grpc
+import pytest
+
+from grpc_auth.src.config import config
+from grpc_auth.src.redis_manager import REVOKED_KEY_PREFIX
+from test_redis_manager import make_manager
+
+class FakeContext:
+    def __init__(self):
+        self.code, self.details = None, None
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+async def stream(items):
+    for item in items:
+        yield item
+
+@pytest.fixture
+def servicer():
+    # Pytest imports every test module before running any test, so by now the
+    # gateway's copy of authorization.proto is loaded if its tests were
+    # collected too, and both copies cannot share the descriptor pool.
+    if "rest_gateway.proto.authorization_pb2" in sys.modules:
+        pytest.skip("run the grpc_auth tests on their own to test the servicer")
+    from grpc_auth.src.auth_servicer import AuthorizationServicer
+    servicer = AuthorizationServicer()
+    servicer.redis_manager = make_manager()
+    mget = servicer.redis_manager.redis.mget
+    servicer.mget_calls = []
+    async def recording_mget(keys):
+        servicer.mget_calls.append(keys)
+        return await mget(keys)
+    servicer.redis_manager.redis.mget = recording_mget
+    return servicer
+
+def verify(servicer, tokens, context=None):
+    from grpc_auth.proto import authorization_pb2
+    request = authorization_pb2.VerifyTokensRequest(tokens=tokens)
+    return asyncio.run(servicer.VerifyTokens(request, context or FakeContext()))
+
+def token_id(servicer, token):
+    return servicer.auth_manager.get_token_id(token, servicer.auth_manager.get_claims(token))
+
+def test_verify_tokens_in_request_order(servicer):
+    first = servicer.auth_manager.generate_token(1, "admin")
+    revoked = servicer.auth_manager.generate_token(2)
+    servicer.auth_manager.TOKEN_LIFETIME = timedelta(seconds=-1)
+    expired = servicer.auth_manager.generate_token(3)
+    asyncio.run(servicer.redis_manager.revoke(token_id(servicer, revoked), time.time() + 60))
+    response = verify(servicer, [first, "invalid_token", revoked, expired, first])
+    assert [(result.valid, result.user_id, result.role) for result in response.results] == [
+        (True, 1, "admin"), (False, 0, ""), (False, 0, ""), (False, 0, ""), (True, 1, "admin")
+    ]
+    # Duplicates are checked once, invalid and expired tokens not at all.
+    assert len(servicer.mget_calls) == 1
+    assert sorted(servicer.mget_calls[0]) == sorted(
+        REVOKED_KEY_PREFIX + token_id(servicer, token) for token in (first, revoked)
+    )
+
+def test_verify_tokens_merges_filter_and_redis_answers(servicer):
+    tokens = [servicer.auth_manager.generate_token(user_id) for user_id in (1, 2, 3)]
+    locally_revoked, maybe_revoked, not_revoked = (token_id(servicer, token) for token in tokens)
+    revocation_filter = servicer.revocation_filter
+    asyncio.run(revocation_filter.seed(stream([maybe_revoked])))
+    revocation_filter.ready = True
+    revocation_filter.add(locally_revoked, time.time() + 60)
+    asyncio.run(servicer.redis_manager.revoke(maybe_revoked, time.time() + 60))
+    response = verify(servicer, tokens)
+    assert [result.valid for result in response.results] == [False, False, True]
+    assert servicer.mget_calls == [[REVOKED_KEY_PREFIX + maybe_revoked]]
+
+def test_verify_tokens_rejects_oversized_batches(servicer, monkeypatch):
+    monkeypatch.setattr(config, "VERIFY_TOKENS_MAX_BATCH_SIZE", "2")
+    context = FakeContext()
+    token = servicer.auth_manager.generate_token(1)
+    response = verify(servicer, [token] * 3, context)
+    assert context.code == grpc.StatusCode.INVALID_ARGUMENT
+    assert len(response.results) == 0
+    assert servicer.mget_calls == []
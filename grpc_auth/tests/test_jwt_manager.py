@@ -1,5 +1,6 @@
+import jwt
 import pytest
-from grpc_auth.src.jwt_manager import JwtManager
+from grpc_auth.src.jwt_manager import ClaimsCache, JwtManager
 
 def test_verify_token():
     jwt_manager = JwtManager()
@@ -9,10 +10,56 @@ def test_verify_token():
 def test_verify_token_expired():
     jwt_manager = JwtManager()
     token = jwt_manager.generate_token(1)
-    token = token[:-1] + '0'
+    # All bits of the second to last signature character are significant.
+    token = token[:-2] + ('A' if token[-2] != 'A' else 'B') + token[-1]
     assert jwt_manager.verify_token(token) is False
 
 def test_verify_token_invalid():
     jwt_manager = JwtManager()
     token = 'invalid_token'
-    assert jwt_manager.verify_token(token) is False
\ No newline at end of file
+    assert jwt_manager.verify_token(token) is False
+
+def test_get_claims():
+    jwt_manager = JwtManager()
+    token = jwt_manager.generate_token(1, "admin")
+    claims = jwt_manager.get_claims(token)
+    assert claims["user_id"] == 1
+    assert claims["role"] == "admin"
+    assert claims["exp"] > claims["iat"]
+    assert claims["jti"] != jwt_manager.get_claims(jwt_manager.generate_token(1))["jti"]
+
+def test_get_claims_invalid():
+    jwt_manager = JwtManager()
+    assert jwt_manager.get_claims('invalid_token') is None
+
+def test_asymmetric_tokens_carry_kid(tmp_path, monkeypatch):
+    from grpc_auth.src.config import config
+    monkeypatch.setattr(config, "JWT_ALGORITHM", "EdDSA")
+    monkeypatch.setattr(config, "JWT_KEYS_DIR", str(tmp_path))
+    jwt_manager = JwtManager()
+    old_token = jwt_manager.generate_token(1)
+    jwt_manager.key_store.rotate()
+    new_token = jwt_manager.generate_token(1)
+    assert jwt.get_unverified_header(old_token)["kid"] != jwt.get_unverified_header(new_token)["kid"]
+    assert jwt_manager.verify_token(old_token) is True
+    assert jwt_manager.verify_token(new_token) is True
+    assert len(jwt_manager.key_store.public_keys()) == 2
+
+def test_claims_cache():
+    jwt_manager = JwtManager()
+    token = jwt_manager.generate_token(1)
+    assert jwt_manager.verify_token(token) is True
+    assert jwt_manager.get_user_info_from_token(token) == 1
+    assert (jwt_manager.claims_cache.hits, jwt_manager.claims_cache.misses) == (1, 1)
+    jwt_manager.evict(token)
+    assert len(jwt_manager.claims_cache) == 0
+
+def test_claims_cache_entries_expire_with_token():
+    now = [1000.0]
+    cache = ClaimsCache(2, clock=lambda: now[0])
+    cache.put("a", {"exp": 1010})
+    cache.put("b", {"exp": 2000})
+    cache.put("c", {"exp": 2000})
+    assert cache.get("a") is None and cache.evictions == 1
+    now[0] = 2001.0
+    assert cache.get("b") is None and cache.expirations == 1
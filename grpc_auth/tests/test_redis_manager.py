@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+from grpc_auth.src.jwt_manager import JwtManager
+from grpc_auth.src.redis_manager import (
+    LEGACY_REVOKED_SET,
+    REVOKED_KEY_PREFIX,
+    RedisManager,
+)
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def set(self, *args, **kwargs):
+        self.commands.append((self.redis.set, args, kwargs))
+
+    def srem(self, *args):
+        self.commands.append((self.redis.srem, args, {}))
+
+    def publish(self, *args):
+        self.commands.append((self.redis.publish, args, {}))
+
+    async def execute(self):
+        for command, args, kwargs in self.commands:
+            await command(*args, **kwargs)
+
+class FakeRedis:
+    def __init__(self):
+        self.values, self.ttls, self.sets = {}, {}, {}
+        self.published = []
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    async def set(self, key, value, ex=None):
+        self.values[key], self.ttls[key] = value, ex
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+    async def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    async def sscan(self, key, cursor, count=None):
+        return 0, list(self.sets.get(key, ()))
+
+    async def srem(self, key, *members):
+        self.sets[key] -= set(members)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+def make_manager():
+    manager = RedisManager()
+    manager.redis = FakeRedis()
+    return manager
+
+def test_revoke_expires_with_token():
+    manager = make_manager()
+    asyncio.run(manager.revoke("abc", time.time() + 60))
+    assert asyncio.run(manager.is_revoked("abc")) is True
+    assert 59 <= manager.redis.ttls[REVOKED_KEY_PREFIX + "abc"] <= 60
+    assert manager.redis.published[0][1].startswith("abc ")
+
+def test_revoke_expired_token_is_not_stored():
+    manager = make_manager()
+    asyncio.run(manager.revoke("abc", time.time() - 1))
+    assert asyncio.run(manager.is_revoked("abc")) is False
+
+def test_migrate_legacy_revocations():
+    jwt_manager = JwtManager()
+    live = jwt_manager.generate_token(1)
+    manager = make_manager()
+    manager.redis.sets[LEGACY_REVOKED_SET] = {live, "invalid_token"}
+    migrated = asyncio.run(
+        manager.migrate_legacy_revocations(jwt_manager.resolve_revocation)
+    )
+    assert migrated == 1
+    assert manager.redis.sets[LEGACY_REVOKED_SET] == set()
+    token_id = jwt_manager.get_token_id(live, jwt_manager.get_claims(live))
+    assert asyncio.run(manager.is_revoked(token_id)) is True
+
+def test_are_revoked():
+    manager = make_manager()
+    asyncio.run(manager.revoke("b", time.time() + 60))
+    assert asyncio.run(manager.are_revoked(["a", "b", "c"])) == [False, True, False]
@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+from grpc_auth.src.revocation_filter import BloomFilter, RevocationFilter
+
+async def stream(items):
+    for item in items:
+        yield item
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(str(i))
+    assert all(str(i) in bloom for i in range(1000))
+    false_positives = sum(str(i) in bloom for i in range(1000, 11000))
+    assert false_positives < 300
+
+def test_check_is_left_to_redis_until_seeded():
+    revocation_filter = RevocationFilter(100, 0.01, 300)
+    assert revocation_filter.check("abc") is None
+
+def test_check_after_seed():
+    revocation_filter = RevocationFilter(100, 0.01, 300)
+    asyncio.run(revocation_filter.seed(stream(["old"])))
+    revocation_filter.ready = True
+    revocation_filter.add("new", time.time() + 60)
+    assert revocation_filter.check("new") is True
+    assert revocation_filter.check("old") is None
+    assert revocation_filter.check("live") is False
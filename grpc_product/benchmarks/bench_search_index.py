@@ -0,0 +1,88 @@
+"""
+Benchmark of full-text query latency of the product search index.
+
+Builds the index over synthetic furniture listings of the given sizes and
+reports build time and query latency percentiles for a fixed set of queries.
+Descriptions draw from a Zipf-distributed vocabulary, so a few words are very
+common and most are rare, as in real listings.
+
+Usage:
+    python -m grpc_product.benchmarks.bench_search_index --sizes 100000 1000000
+"""
+
+import argparse
+import itertools
+import random
+import statistics
+import time
+
+from grpc_product.src.search_index import SearchIndex
+
+MATERIALS = ["oak", "pine", "walnut", "birch", "steel", "glass", "leather", "rattan"]
+ITEMS = ["wardrobe", "table", "chair", "sofa", "bed", "shelf", "desk", "dresser"]
+ADJECTIVES = ["vintage", "modern", "solid", "light", "dark", "antique", "compact"]
+WORDS = [
+    "doors", "drawers", "scratches", "restored", "pickup", "delivery", "seats",
+    "legs", "handles", "mirror", "cushions", "frame", "varnish", "condition",
+]
+VOCABULARY = WORDS + MATERIALS + ["word{}".format(i) for i in range(20_000)]
+CUMULATIVE_WEIGHTS = list(
+    itertools.accumulate(1 / rank for rank in range(1, len(VOCABULARY) + 1))
+)
+QUERIES = [
+    "oak wardrobe",
+    "vintage leather sofa",
+    "glass desk",
+    "walnut dresser mirror",
+    "compact steel shelf delivery",
+    "chair",
+]
+
+
+def listing(rng: random.Random) -> tuple[str, str]:
+    name = "{} {} {}".format(
+        rng.choice(ADJECTIVES), rng.choice(MATERIALS), rng.choice(ITEMS)
+    )
+    words = rng.choices(
+        VOCABULARY, cum_weights=CUMULATIVE_WEIGHTS, k=rng.randint(5, 25)
+    )
+    description = " ".join(words)
+    return name, description
+
+
+def bench(size: int, rounds: int, k: int) -> None:
+    rng = random.Random(size)
+    index = SearchIndex()
+    start = time.perf_counter()
+    for product_id in range(size):
+        index.add(str(product_id), *listing(rng))
+    build_seconds = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            index.search(query, k)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(
+        "listings={:>9} build={:6.1f}s p50={:7.2f}ms p95={:7.2f}ms "
+        "p99={:7.2f}ms mean={:7.2f}ms".format(
+            size,
+            build_seconds,
+            latencies[len(latencies) // 2],
+            latencies[int(len(latencies) * 0.95)],
+            latencies[int(len(latencies) * 0.99)],
+            statistics.mean(latencies),
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--k", type=int, default=20)
+    args = parser.parse_args()
+    for size in args.sizes:
+        bench(size, args.rounds, args.k)
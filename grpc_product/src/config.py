@@ -16,7 +16,17 @@ class Config:
     MONGO_PORT = os.getenv("MONGO_PORT", "27017")
     MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "my_database")
     MONGO_COLLECTION_NAME = os.getenv("MONGO_COLLECTION_NAME", "products")
+    MONGO_MAX_POOL_SIZE = os.getenv("MONGO_MAX_POOL_SIZE", "100")
+    MONGO_MIN_POOL_SIZE = os.getenv("MONGO_MIN_POOL_SIZE", "0")
+    MONGO_MAX_IDLE_TIME_MS = os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000")
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")
     SERVER_PORT = os.getenv("SERVER_PORT", "50053")
+    PRODUCTS_DEFAULT_PAGE_SIZE = os.getenv("PRODUCTS_DEFAULT_PAGE_SIZE", "20")
+    PRODUCTS_MAX_PAGE_SIZE = os.getenv("PRODUCTS_MAX_PAGE_SIZE", "100")
+    PRODUCTS_MAX_BATCH_SIZE = os.getenv("PRODUCTS_MAX_BATCH_SIZE", "100")
+    PRODUCTS_STREAM_BATCH_SIZE = os.getenv("PRODUCTS_STREAM_BATCH_SIZE", "500")
+    PRODUCT_CACHE_SIZE = os.getenv("PRODUCT_CACHE_SIZE", "10000")
+    PRODUCT_CACHE_TTL_SECONDS = os.getenv("PRODUCT_CACHE_TTL_SECONDS", "60")
 
 
 config = Config()
@@ -1,27 +1,83 @@
 import logging
+from typing import AsyncIterator
 
 from bson.objectid import ObjectId
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 from grpc_product.src.config import config
 from grpc_product.src.models import Product
 
+PRODUCT_FIELDS = ("name", "description", "price", "state", "owner_id")
+
+# Compound indexes backing SearchProducts: equality filters first, then the
+# sort/range field, so a filtered and sorted search reads only matching keys.
+# Searches break ties on `_id`, which MongoDB does not append to secondary
+# indexes, so every index ends with it; otherwise the sort happens in memory.
+PRODUCT_INDEXES = [
+    IndexModel(
+        [("state", ASCENDING), ("price", ASCENDING), ("_id", ASCENDING)],
+        name="state_price_id",
+    ),
+    IndexModel(
+        [("owner_id", ASCENDING), ("price", ASCENDING), ("_id", ASCENDING)],
+        name="owner_id_price_id",
+    ),
+    IndexModel([("price", ASCENDING), ("_id", ASCENDING)], name="price_id"),
+    IndexModel([("state", ASCENDING), ("_id", ASCENDING)], name="state_id"),
+    IndexModel([("owner_id", ASCENDING), ("_id", ASCENDING)], name="owner_id_id"),
+]
+
+# Indexes replaced by the ones above, dropped when the indexes are ensured.
+LEGACY_PRODUCT_INDEXES = ("state_price", "owner_id_price", "price")
+
 
 class ProductDB:
     """
     Class responsible for managing operations with MongoDB
 
     Class contains methods for creating, reading, updating and deleting
-    products from MongoDB.
+    products from MongoDB. All operations go through the asynchronous Motor
+    driver, so a slow query does not block other RPCs on the event loop.
     """
 
     def __init__(self) -> None:
         DSN = f"mongodb://{config.MONGO_HOSTNAME}:{config.MONGO_PORT}"
-        self.client = MongoClient(DSN)
+        self.client = AsyncIOMotorClient(
+            DSN,
+            maxPoolSize=int(config.MONGO_MAX_POOL_SIZE),
+            minPoolSize=int(config.MONGO_MIN_POOL_SIZE),
+            maxIdleTimeMS=int(config.MONGO_MAX_IDLE_TIME_MS),
+            waitQueueTimeoutMS=int(config.MONGO_WAIT_QUEUE_TIMEOUT_MS),
+        )
         self.db = self.client[config.MONGO_DB_NAME]
         self.collection = self.db[config.MONGO_COLLECTION_NAME]
 
-    def create_product(self, product: Product) -> str:
+    async def ensure_indexes(self) -> None:
+        """
+        Creates the indexes used by product searches if they do not exist yet
+        and drops the ones they replace.
+        """
+        try:
+            names = await self.collection.create_indexes(PRODUCT_INDEXES)
+            logging.info("Ensured product indexes: {}".format(", ".join(names)))
+            existing = await self.collection.index_information()
+            for name in LEGACY_PRODUCT_INDEXES:
+                if name in existing:
+                    await self.collection.drop_index(name)
+                    logging.info("Dropped legacy product index {}".format(name))
+        except Exception as e:
+            logging.error("Failed to create product indexes: {}".format(e))
+            raise
+
+    def close(self) -> None:
+        """
+        Closes the connection pool to MongoDB.
+        """
+        self.client.close()
+        logging.info("Connection to MongoDB was closed")
+
+    async def create_product(self, product: Product) -> str:
         """
         Creates a new product in the MongoDB collection.
 
@@ -32,13 +88,13 @@ class ProductDB:
             str: The ID of the inserted product.
         """
         try:
-            result = self.collection.insert_one(product)
+            result = await self.collection.insert_one(product)
             return str(result.inserted_id)
         except Exception as e:
             logging.error("Failed to create product: {}".format(e))
             raise
 
-    def get_product(self, product_id: int) -> Product:
+    async def get_product(self, product_id: int) -> Product:
         """
         Retrieves a product from the MongoDB collection by its ID.
 
@@ -49,13 +105,42 @@ class ProductDB:
             Product: The product object if found, otherwise raises an exception.
         """
         try:
-            product = self.collection.find_one({"_id": ObjectId(product_id)})
+            product = await self.collection.find_one({"_id": ObjectId(product_id)})
             return product
         except Exception as e:
             logging.error("Failed to get product: {}".format(e))
             raise
 
-    def update_product(self, product_id: int, product: Product) -> bool:
+    async def get_products(
+        self, product_ids: list[str], fields: list[str] = ()
+    ) -> list[Product]:
+        """
+        Retrieves several products by their IDs with a single query.
+
+        Args:
+            product_ids (list[str]): The IDs of the products, invalid IDs are skipped.
+            fields (list[str]): The product fields to return, all fields if empty.
+
+        Returns:
+            list[Product]: The products found, in no particular order.
+        """
+        object_ids = [
+            ObjectId(product_id)
+            for product_id in product_ids
+            if ObjectId.is_valid(product_id)
+        ]
+        if not object_ids:
+            return []
+        try:
+            cursor = self.collection.find(
+                {"_id": {"$in": object_ids}}, self._projection(fields)
+            )
+            return await cursor.to_list(length=len(object_ids))
+        except Exception as e:
+            logging.error("Failed to get products: {}".format(e))
+            raise
+
+    async def update_product(self, product_id: int, product: Product) -> bool:
         """
         Updates a product in the MongoDB collection.
 
@@ -67,7 +152,7 @@ class ProductDB:
             bool: True if the product was updated, False otherwise.
         """
         try:
-            result = self.collection.update_one(
+            result = await self.collection.update_one(
                 {"_id": ObjectId(product_id)}, {"$set": product}
             )
             return result.modified_count > 0
@@ -75,7 +160,7 @@ class ProductDB:
             logging.error("Failed to update product: {}".format(e))
             raise
 
-    def delete_product(self, product_id: int) -> bool:
+    async def delete_product(self, product_id: int) -> bool:
         """
         Deletes a product from the MongoDB collection.
 
@@ -86,13 +171,13 @@ class ProductDB:
             bool: True if the product was deleted, False otherwise.
         """
         try:
-            result = self.collection.delete_one({"_id": ObjectId(product_id)})
+            result = await self.collection.delete_one({"_id": ObjectId(product_id)})
             return result.deleted_count > 0
         except Exception as e:
             logging.error("Failed to delete product: {}".format(e))
             raise
 
-    def get_all_products(self) -> list[Product]:
+    async def get_all_products(self) -> list[Product]:
         """
         Retrieves all products from the MongoDB collection.
 
@@ -100,8 +185,181 @@ class ProductDB:
             list[Product]: A list of all products in the collection.
         """
         try:
-            products = self.collection.find()
-            return list(products)
+            products = await self.collection.find().to_list(length=None)
+            return products
         except Exception as e:
             logging.error("Failed to get all products: {}".format(e))
             raise
+
+    @staticmethod
+    def _projection(fields: list[str]) -> dict[str, int] | None:
+        """
+        Builds a MongoDB projection for the given product fields.
+
+        Args:
+            fields (list[str]): The product fields to return, all fields if empty.
+
+        Returns:
+            dict[str, int] or None: The projection, or None to return whole documents.
+        """
+        if not fields:
+            return None
+        return {field: 1 for field in fields}
+
+    async def list_products(
+        self, limit: int, after_id: ObjectId | None = None, fields: list[str] = ()
+    ) -> list[Product]:
+        """
+        Retrieves a page of products ordered by their ID.
+
+        The page starts right after `after_id`, so the cost of a page does not
+        depend on how deep into the collection it is.
+
+        Args:
+            limit (int): The maximum number of products to return.
+            after_id (ObjectId): The ID of the last product of the previous page.
+            fields (list[str]): The product fields to return, all fields if empty.
+
+        Returns:
+            list[Product]: Up to `limit` products with IDs greater than `after_id`.
+        """
+        try:
+            query = {"_id": {"$gt": after_id}} if after_id is not None else {}
+            cursor = (
+                self.collection.find(query, self._projection(fields))
+                .sort("_id", 1)
+                .limit(limit)
+            )
+            return await cursor.to_list(length=limit)
+        except Exception as e:
+            logging.error("Failed to list products: {}".format(e))
+            raise
+
+    async def iter_products(
+        self, fields: list[str] = (), batch_size: int = 500
+    ) -> AsyncIterator[Product]:
+        """
+        Iterates over all products without loading the collection into memory.
+
+        Args:
+            fields (list[str]): The product fields to return, all fields if empty.
+            batch_size (int): The number of documents fetched from MongoDB per batch.
+
+        Yields:
+            Product: The products ordered by their ID.
+        """
+        cursor = self.collection.find(
+            {}, self._projection(fields), batch_size=batch_size
+        ).sort("_id", 1)
+        async for product in cursor:
+            yield product
+
+    @staticmethod
+    def build_search_query(
+        min_price: float | None = None,
+        max_price: float | None = None,
+        state: str | None = None,
+        owner_id: str | None = None,
+    ) -> dict:
+        """
+        Builds a MongoDB filter from product search parameters.
+
+        Args:
+            min_price (float): The minimum price, inclusive.
+            max_price (float): The maximum price, inclusive.
+            state (str): The exact state of the product.
+            owner_id (str): The ID of the product's owner.
+
+        Returns:
+            dict: The MongoDB filter document.
+        """
+        query = {}
+        if state:
+            query["state"] = state
+        if owner_id:
+            query["owner_id"] = owner_id
+        price = {}
+        if min_price is not None:
+            price["$gte"] = min_price
+        if max_price is not None:
+            price["$lte"] = max_price
+        if price:
+            query["price"] = price
+        return query
+
+    @staticmethod
+    def _winning_index(plan: dict) -> str | None:
+        """
+        Finds the name of the index used by a query plan.
+
+        Args:
+            plan (dict): A stage of the winning plan reported by `explain`.
+
+        Returns:
+            str or None: The index name, or None if the plan scans the collection.
+        """
+        if "indexName" in plan:
+            return plan["indexName"]
+        stages = [plan.get("inputStage"), plan.get("queryPlan")]
+        stages.extend(plan.get("inputStages", []))
+        for stage in stages:
+            if stage:
+                index_name = ProductDB._winning_index(stage)
+                if index_name:
+                    return index_name
+        return None
+
+    def _search_cursor(
+        self,
+        query: dict,
+        sort_field: str,
+        descending: bool,
+        limit: int,
+        fields: list[str] = (),
+    ):
+        direction = DESCENDING if descending else ASCENDING
+        sort = [(sort_field, direction)]
+        if sort_field != "_id":
+            sort.append(("_id", direction))
+        return (
+            self.collection.find(query, self._projection(fields))
+            .sort(sort)
+            .limit(limit)
+        )
+
+    async def search_products(
+        self,
+        query: dict,
+        sort_field: str,
+        descending: bool,
+        limit: int,
+        fields: list[str] = (),
+        explain: bool = False,
+    ) -> tuple[list[Product], str | None]:
+        """
+        Searches products matching a filter in the given order.
+
+        Args:
+            query (dict): The MongoDB filter, see `build_search_query`.
+            sort_field (str): The field to sort by, ties are broken by `_id`.
+            descending (bool): Whether to sort in descending order.
+            limit (int): The maximum number of products to return.
+            fields (list[str]): The product fields to return, all fields if empty.
+            explain (bool): Whether to report the index chosen for the query.
+
+        Returns:
+            tuple[list[Product], str or None]: The products found and, if requested,
+            the name of the index used ("COLLSCAN" if none).
+        """
+        try:
+            cursor = self._search_cursor(query, sort_field, descending, limit, fields)
+            index_name = None
+            if explain:
+                plan = await cursor.clone().explain()
+                winning_plan = plan["queryPlanner"]["winningPlan"]
+                index_name = self._winning_index(winning_plan) or "COLLSCAN"
+            products = await cursor.to_list(length=limit)
+            return products, index_name
+        except Exception as e:
+            logging.error("Failed to search products: {}".format(e))
+            raise
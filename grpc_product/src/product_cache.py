@@ -0,0 +1,192 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+
+class ProductCache:
+    """
+    Bounded read-through cache of product documents.
+
+    Entries are evicted in least-recently-used order once the cache is full
+    and expire after a fixed time to live. Concurrent misses on the same key
+    share a single load, so a popular product that falls out of the cache
+    triggers only one database fetch.
+
+    Attributes:
+        max_size (int): The maximum number of cached products.
+        ttl (float): The time to live of an entry in seconds.
+        hits (int): The number of lookups served from the cache.
+        misses (int): The number of lookups that had to load the product.
+        coalesced (int): The number of misses that waited for a load already in flight.
+        evictions (int): The number of entries dropped because the cache was full.
+        expirations (int): The number of entries dropped because they were too old.
+        invalidations (int): The number of entries dropped by writes.
+
+    Methods:
+        get: Returns a cached product or loads it.
+        peek: Returns a cached product without loading it.
+        version: Returns a token that changes on every invalidation.
+        put: Stores a product loaded outside of `get`.
+        invalidate: Drops a product from the cache.
+        stats: Returns the cache counters.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._loads: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: str) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: str, value: dict) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(
+        self, key: str, loader: Callable[[], Awaitable[dict | None]]
+    ) -> dict | None:
+        """
+        Returns a cached product or loads it with `loader`.
+
+        Products that are not found are not cached. If the loader fails, the
+        error is raised to every caller waiting for that load.
+
+        Args:
+            key (str): The ID of the product.
+            loader (Callable): A coroutine function fetching the product from the database.
+
+        Returns:
+            dict or None: The product document, or None if it does not exist.
+        """
+        value = self._lookup(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        load = self._loads.get(key)
+        if load is not None:
+            self.coalesced += 1
+        else:
+            load = asyncio.ensure_future(loader())
+            self._loads[key] = load
+            load.add_done_callback(lambda future: self._finish_load(key, future))
+        # Shielded so that a cancelled caller does not cancel the shared load.
+        return await asyncio.shield(load)
+
+    def peek(self, key: str) -> dict | None:
+        """
+        Returns a cached product without loading it on a miss.
+
+        Args:
+            key (str): The ID of the product.
+
+        Returns:
+            dict or None: The cached product document, or None if it is not cached.
+        """
+        value = self._lookup(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def version(self) -> int:
+        """
+        Returns a token that changes whenever a product is invalidated.
+
+        A caller loading products itself takes the token before the load and
+        passes it to `put`, so products written meanwhile are not cached.
+
+        Returns:
+            int: The current invalidation version.
+        """
+        return self._version
+
+    def put(self, key: str, value: dict, version: int) -> None:
+        """
+        Stores a product loaded outside of `get`.
+
+        Args:
+            key (str): The ID of the product.
+            value (dict): The full product document.
+            version (int): The token returned by `version` before the load.
+        """
+        if version == self._version:
+            self._store(key, value)
+
+    def _finish_load(self, key: str, load: asyncio.Future) -> None:
+        # A write invalidates the key while the load is in flight by dropping
+        # it from `_loads`; its possibly stale result must not be cached then.
+        if self._loads.get(key) is not load:
+            return
+        del self._loads[key]
+        if load.cancelled() or load.exception() is not None:
+            return
+        if load.result() is not None:
+            self._store(key, load.result())
+
+    def invalidate(self, key: str) -> None:
+        """
+        Drops a product from the cache, including a load in flight for it.
+
+        Args:
+            key (str): The ID of the product.
+        """
+        self._version += 1
+        dropped = self._entries.pop(key, None) is not None
+        dropped = self._loads.pop(key, None) is not None or dropped
+        if dropped:
+            self.invalidations += 1
+
+    def stats(self) -> dict[str, float]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict[str, float]: The counters, current size and hit rate of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,11 +1,53 @@
+import base64
+import binascii
 import logging
 
 import grpc
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
 from google.protobuf.json_format import MessageToDict
 
 from grpc_product.proto import product_pb2, product_pb2_grpc
+from grpc_product.src.config import config
 from grpc_product.src.models import Product
-from grpc_product.src.mongo_manager import ProductDB
+from grpc_product.src.mongo_manager import PRODUCT_FIELDS, ProductDB
+from grpc_product.src.product_cache import ProductCache
+from grpc_product.src.search_index import SearchIndex
+
+SEARCH_SORT_FIELDS = {"": "_id", "created": "_id", "price": "price"}
+
+
+def encode_cursor(product_id: ObjectId) -> str:
+    """
+    Encodes the ID of the last product of a page into an opaque cursor.
+
+    Args:
+        product_id (ObjectId): The ID of the last product of the page.
+
+    Returns:
+        str: A URL-safe cursor for the next page.
+    """
+    return base64.urlsafe_b64encode(product_id.binary).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ObjectId:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor received from the client.
+
+    Returns:
+        ObjectId: The ID of the last product of the previous page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        return ObjectId(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, InvalidId, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
 
 
 class ProductServicer(product_pb2_grpc.ProductServiceServicer):
@@ -16,12 +58,20 @@ class ProductServicer(product_pb2_grpc.ProductServiceServicer):
 
     Attributes:
         db (ProductDB): The manager for handling MongoDB-related tasks.
+        search_index (SearchIndex): The full-text index over product names and descriptions.
+        cache (ProductCache): The read-through cache of product documents.
 
     Methods:
         CreateProduct: Creates a product in the database.
         GetProduct: Retrieves a product from the database.
         UpdateProduct: Updates a product in the database.
         DeleteProduct: Deletes a product from the database.
+        ListProducts: Retrieves a page of products after a cursor.
+        StreamProducts: Streams all products from the database.
+        SearchProducts: Searches products by price, state and owner.
+        FullTextSearch: Searches products by words in their name and description.
+        GetDiagnostics: Reports cache and search index metrics.
+        BatchGetProducts: Retrieves several products by their IDs.
     """
 
     def _handle_error(self, context: grpc.ServicerContext, error: Exception) -> None:
@@ -29,7 +79,7 @@ class ProductServicer(product_pb2_grpc.ProductServiceServicer):
         Handles an error by logging it and setting the gRPC service context.
 
         Args:
-            context (grpc.ServicerContext): The gRPC service context.
+            context (grpc.aio.ServicerContext): The gRPC service context.
             error (Exception): The error to be handled.
         """
         logging.error("Failed to perform operation: {}".format(error))
@@ -38,17 +88,70 @@ class ProductServicer(product_pb2_grpc.ProductServiceServicer):
 
     def __init__(self) -> None:
         self.db = ProductDB()
+        self.search_index = SearchIndex()
+        self.cache = ProductCache(
+            max_size=int(config.PRODUCT_CACHE_SIZE),
+            ttl=float(config.PRODUCT_CACHE_TTL_SECONDS),
+        )
         logging.info("Product Service successfully initialized!")
 
-    def CreateProduct(
-        self, request: product_pb2.Product, context: grpc.ServicerContext
+    @staticmethod
+    def _to_message(product: dict, fields: list[str] = ()) -> product_pb2.Product:
+        """
+        Converts a MongoDB document into a Product message.
+
+        Fields missing from the document, e.g. because of a projection, keep
+        their default values.
+
+        Args:
+            product (dict): The product document.
+            fields (list[str]): The product fields to copy, all fields if empty.
+
+        Returns:
+            product_pb2.Product: The product message.
+        """
+        message = product_pb2.Product(_id=str(product["_id"]))
+        for field in fields or PRODUCT_FIELDS:
+            if field in product:
+                setattr(message, field, product[field])
+        return message
+
+    @staticmethod
+    def _invalid_argument(context: grpc.aio.ServicerContext, details: str) -> None:
+        logging.info("Invalid argument: {}".format(details))
+        context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        context.set_details(details)
+
+    def _check_fields(
+        self, fields: list[str], context: grpc.aio.ServicerContext
+    ) -> bool:
+        """
+        Checks that all requested projection fields are product fields.
+
+        Args:
+            fields (list[str]): The requested field names.
+            context (grpc.aio.ServicerContext): The gRPC service context.
+
+        Returns:
+            bool: True if all fields are known, otherwise False with INVALID_ARGUMENT set on the context.
+        """
+        unknown_fields = set(fields) - set(PRODUCT_FIELDS)
+        if unknown_fields:
+            self._invalid_argument(
+                context, "Unknown fields: {}".format(", ".join(sorted(unknown_fields)))
+            )
+            return False
+        return True
+
+    async def CreateProduct(
+        self, request: product_pb2.Product, context: grpc.aio.ServicerContext
     ) -> product_pb2.Product:
         """
         Creates a new product in the database.
 
         Args:
             request (product_pb2.Product): The product to be created.
-            context (grpc.ServicerContext): The gRPC service context.
+            context (grpc.aio.ServicerContext): The gRPC service context.
 
         Returns:
             product_pb2.Product: The created product.
@@ -61,7 +164,10 @@ class ProductServicer(product_pb2_grpc.ProductServiceServicer):
                 "state": request.product.state,
                 "owner_id": request.product.owner_id,
             }
-            product_id = self.db.create_product(product_fields)
+            product_id = await self.db.create_product(product_fields)
+            self.search_index.add(
+                product_id, product_fields["name"], product_fields["description"]
+            )
             logging.info("Product {} successfully created!".format(product_id))
 
             return product_pb2.Product(
@@ -76,21 +182,23 @@ class ProductServicer(product_pb2_grpc.ProductServiceServicer):
             self._handle_error(context, e)
             return product_pb2.Product()
 
-    def GetProduct(
-        self, request: product_pb2.GetProductRequest, context: grpc.ServicerContext
+    async def GetProduct(
+        self, request: product_pb2.GetProductRequest, context: grpc.aio.ServicerContext
     ) -> product_pb2.Product:
         """
         Retrieves a product from the database based on the provided product ID.
 
         Args:
             request (product_pb2.GetProductRequest): The request containing the product ID.
-            context (grpc.ServicerContext): The gRPC service context.
+            context (grpc.aio.ServicerContext): The gRPC service context.
 
         Returns:
             product_pb2.Product: The retrieved product if found, otherwise an empty product.
         """
         try:
-            product = self.db.get_product(request.id)
+            product = await self.cache.get(
+                request.id, lambda: self.db.get_product(request.id)
+            )
             if product is None:
                 logging.info("Product {} not found".format(request.id))
                 context.set_code(grpc.StatusCode.NOT_FOUND)
@@ -98,61 +206,69 @@ class ProductServicer(product_pb2_grpc.ProductServiceServicer):
                 return product_pb2.Product()
 
             logging.info("Product {} found".format(request.id))
-            return product_pb2.Product(
-                _id=str(product["_id"]),
-                name=product["name"],
-                description=product["description"],
-                price=product["price"],
-                state=product["state"],
-                owner_id=product["owner_id"],
-            )
+            return self._to_message(product)
         except Exception as e:
             self._handle_error(context, e)
             return product_pb2.Product()
 
-    def UpdateProduct(
-        self, request: product_pb2.Product, context: grpc.ServicerContext
+    async def UpdateProduct(
+        self, request: product_pb2.Product, context: grpc.aio.ServicerContext
     ) -> product_pb2.Product:
         """
         Updates a product in the database based on the provided product information.
 
         Args:
             request (product_pb2.Product): The request containing the product information to be updated.
-            context (grpc.ServicerContext): The gRPC service context.
+            context (grpc.aio.ServicerContext): The gRPC service context.
 
         Returns:
             product_pb2.Product: The updated product if successful, otherwise an empty product.
         """
         try:
-            product_dict = MessageToDict(request.product)
-            success = self.db.update_product(request.product._id, product_dict)
+            product_dict = MessageToDict(
+                request.product, preserving_proto_field_name=True
+            )
+            product_dict.pop("_id", None)
+            success = await self.db.update_product(request.product._id, product_dict)
+            self.cache.invalidate(request.product._id)
             if not success:
                 logging.info("Product {} not found".format(request.product._id))
                 context.set_code(grpc.StatusCode.NOT_FOUND)
                 context.set_details("Product not found")
                 return product_pb2.Product()
 
+            if "name" in product_dict or "description" in product_dict:
+                product = await self.db.get_product(request.product._id)
+                if product is not None:
+                    self.search_index.add(
+                        request.product._id,
+                        product.get("name", ""),
+                        product.get("description", ""),
+                    )
+
             logging.info("Product {} successfully updated".format(request.product._id))
             return request.product
         except Exception as e:
             self._handle_error(context, e)
             return product_pb2.Product()
 
-    def DeleteProduct(
-        self, request: product_pb2.GetProductRequest, context: grpc.ServicerContext
+    async def DeleteProduct(
+        self, request: product_pb2.GetProductRequest, context: grpc.aio.ServicerContext
     ) -> product_pb2.DeleteProductResponse:
         """
         Deletes a product from the database based on the provided product ID.
 
         Args:
             request (product_pb2.GetProductRequest): The request containing the product ID.
-            context (grpc.ServicerContext): The gRPC service context.
+            context (grpc.aio.ServicerContext): The gRPC service context.
 
         Returns:
             product_pb2.DeleteProductResponse: The response indicating whether the product was deleted successfully.
         """
         try:
-            success = self.db.delete_product(request.id)
+            success = await self.db.delete_product(request.id)
+            self.cache.invalidate(request.id)
+            self.search_index.remove(request.id)
             if not success:
                 logging.info("Product {} not found".format(request.id))
                 context.set_code(grpc.StatusCode.NOT_FOUND)
@@ -165,33 +281,298 @@ class ProductServicer(product_pb2_grpc.ProductServiceServicer):
             self._handle_error(context, e)
             return product_pb2.DeleteProductResponse(success=False)
 
-    def GetAllProducts(
-        self, request: product_pb2.GetAllProductsRequest, context: grpc.ServicerContext
+    async def GetAllProducts(
+        self,
+        request: product_pb2.GetAllProductsRequest,
+        context: grpc.aio.ServicerContext,
     ) -> product_pb2.GetAllProductsResponse:
         """
         Retrieves all products from the database.
 
         Args:
             request (product_pb2.GetAllProductsRequest): The request for all products.
-            context (grpc.ServicerContext): The gRPC service context.
+            context (grpc.aio.ServicerContext): The gRPC service context.
 
         Returns:
             product_pb2.GetAllProductsResponse: The response containing the list of all products.
         """
         try:
-            products = self.db.get_all_products()
-            product_list = [
-                product_pb2.Product(
-                    _id=str(product["_id"]),
-                    name=product["name"],
-                    description=product["description"],
-                    price=product["price"],
-                    state=product["state"],
-                    owner_id=product["owner_id"],
-                )
-                for product in products
-            ]
+            products = await self.db.get_all_products()
+            product_list = [self._to_message(product) for product in products]
             return product_pb2.GetAllProductsResponse(products=product_list)
         except Exception as e:
             self._handle_error(context, e)
             return product_pb2.GetAllProductsResponse(products=[])
+
+    async def ListProducts(
+        self,
+        request: product_pb2.ListProductsRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> product_pb2.ListProductsResponse:
+        """
+        Retrieves a page of products ordered by their ID.
+
+        Args:
+            request (product_pb2.ListProductsRequest): The request containing the page size, cursor and fields.
+            context (grpc.aio.ServicerContext): The gRPC service context.
+
+        Returns:
+            product_pb2.ListProductsResponse: The page of products and the cursor of the next page.
+        """
+        if not self._check_fields(request.fields, context):
+            return product_pb2.ListProductsResponse()
+
+        try:
+            after_id = decode_cursor(request.cursor) if request.cursor else None
+            if request.page_size < 0:
+                raise ValueError("Page size must not be negative")
+        except ValueError as e:
+            self._invalid_argument(context, str(e))
+            return product_pb2.ListProductsResponse()
+
+        page_size = request.page_size or int(config.PRODUCTS_DEFAULT_PAGE_SIZE)
+        page_size = min(page_size, int(config.PRODUCTS_MAX_PAGE_SIZE))
+        try:
+            # One extra document tells whether there is a next page at all.
+            products = await self.db.list_products(
+                page_size + 1, after_id, list(request.fields)
+            )
+            next_cursor = ""
+            if len(products) > page_size:
+                products = products[:page_size]
+                next_cursor = encode_cursor(products[-1]["_id"])
+            return product_pb2.ListProductsResponse(
+                products=[self._to_message(product) for product in products],
+                next_cursor=next_cursor,
+            )
+        except Exception as e:
+            self._handle_error(context, e)
+            return product_pb2.ListProductsResponse()
+
+    async def StreamProducts(
+        self,
+        request: product_pb2.StreamProductsRequest,
+        context: grpc.aio.ServicerContext,
+    ):
+        """
+        Streams all products from the database ordered by their ID.
+
+        Documents are read from MongoDB in batches and sent one by one, so the
+        memory used does not grow with the size of the catalog.
+
+        Args:
+            request (product_pb2.StreamProductsRequest): The request containing the fields to return.
+            context (grpc.aio.ServicerContext): The gRPC service context.
+
+        Yields:
+            product_pb2.Product: The products of the catalog.
+        """
+        if not self._check_fields(request.fields, context):
+            return
+
+        try:
+            products = self.db.iter_products(
+                list(request.fields), int(config.PRODUCTS_STREAM_BATCH_SIZE)
+            )
+            async for product in products:
+                yield self._to_message(product)
+        except Exception as e:
+            self._handle_error(context, e)
+
+    async def SearchProducts(
+        self,
+        request: product_pb2.SearchProductsRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> product_pb2.SearchProductsResponse:
+        """
+        Searches products by price range, state and owner.
+
+        Filtering, sorting and limiting are done by MongoDB using the indexes
+        created by `ProductDB.ensure_indexes`.
+
+        Args:
+            request (product_pb2.SearchProductsRequest): The request containing the filters, sort order and limit.
+            context (grpc.aio.ServicerContext): The gRPC service context.
+
+        Returns:
+            product_pb2.SearchProductsResponse: The products found and, if requested, the index used.
+        """
+        if not self._check_fields(request.fields, context):
+            return product_pb2.SearchProductsResponse()
+        if request.sort_by not in SEARCH_SORT_FIELDS:
+            self._invalid_argument(
+                context, "Unknown sort field: {}".format(request.sort_by)
+            )
+            return product_pb2.SearchProductsResponse()
+        if request.limit < 0:
+            self._invalid_argument(context, "Limit must not be negative")
+            return product_pb2.SearchProductsResponse()
+
+        query = ProductDB.build_search_query(
+            min_price=request.min_price if request.HasField("min_price") else None,
+            max_price=request.max_price if request.HasField("max_price") else None,
+            state=request.state,
+            owner_id=request.owner_id,
+        )
+        limit = request.limit or int(config.PRODUCTS_DEFAULT_PAGE_SIZE)
+        limit = min(limit, int(config.PRODUCTS_MAX_PAGE_SIZE))
+        try:
+            products, index_used = await self.db.search_products(
+                query,
+                SEARCH_SORT_FIELDS[request.sort_by],
+                request.descending,
+                limit,
+                list(request.fields),
+                request.explain,
+            )
+            if index_used:
+                logging.info("Product search {} used index {}".format(query, index_used))
+            return product_pb2.SearchProductsResponse(
+                products=[self._to_message(product) for product in products],
+                index_used=index_used or "",
+            )
+        except Exception as e:
+            self._handle_error(context, e)
+            return product_pb2.SearchProductsResponse()
+
+    async def FullTextSearch(
+        self,
+        request: product_pb2.FullTextSearchRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> product_pb2.FullTextSearchResponse:
+        """
+        Searches products by words in their name and description.
+
+        Candidates are ranked by the in-memory search index, and only the top
+        results are fetched from the database.
+
+        Args:
+            request (product_pb2.FullTextSearchRequest): The request containing the query, limit and fields.
+            context (grpc.aio.ServicerContext): The gRPC service context.
+
+        Returns:
+            product_pb2.FullTextSearchResponse: The matching products, best match first.
+        """
+        if not self._check_fields(request.fields, context):
+            return product_pb2.FullTextSearchResponse()
+
+        limit = request.limit or int(config.PRODUCTS_DEFAULT_PAGE_SIZE)
+        limit = min(limit, int(config.PRODUCTS_MAX_PAGE_SIZE))
+        try:
+            hits = self.search_index.search(request.query, limit)
+            if not hits:
+                return product_pb2.FullTextSearchResponse()
+
+            products = await self.db.get_products(
+                [product_id for product_id, _ in hits], list(request.fields)
+            )
+            products_by_id = {str(product["_id"]): product for product in products}
+            return product_pb2.FullTextSearchResponse(
+                results=[
+                    product_pb2.ScoredProduct(
+                        product=self._to_message(products_by_id[product_id]),
+                        score=score,
+                    )
+                    for product_id, score in hits
+                    if product_id in products_by_id
+                ]
+            )
+        except Exception as e:
+            self._handle_error(context, e)
+            return product_pb2.FullTextSearchResponse()
+
+    async def GetDiagnostics(
+        self,
+        request: product_pb2.GetDiagnosticsRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> product_pb2.GetDiagnosticsResponse:
+        """
+        Reports the product cache counters and the size of the search index.
+
+        Args:
+            request (product_pb2.GetDiagnosticsRequest): The empty request.
+            context (grpc.aio.ServicerContext): The gRPC service context.
+
+        Returns:
+            product_pb2.GetDiagnosticsResponse: The metrics of the service.
+        """
+        metrics = {
+            "product_cache.{}".format(name): value
+            for name, value in self.cache.stats().items()
+        }
+        metrics["search_index.products"] = len(self.search_index)
+        return product_pb2.GetDiagnosticsResponse(metrics=metrics)
+
+    async def BatchGetProducts(
+        self,
+        request: product_pb2.BatchGetProductsRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> product_pb2.BatchGetProductsResponse:
+        """
+        Retrieves several products by their IDs.
+
+        Cached products are served from the cache, and all the others are
+        fetched with a single `$in` query. Results follow the order of the
+        requested IDs, and IDs that do not exist are reported as not found
+        instead of failing the whole batch.
+
+        Args:
+            request (product_pb2.BatchGetProductsRequest): The request containing the product IDs and fields.
+            context (grpc.aio.ServicerContext): The gRPC service context.
+
+        Returns:
+            product_pb2.BatchGetProductsResponse: One lookup result per requested ID.
+        """
+        if not self._check_fields(request.fields, context):
+            return product_pb2.BatchGetProductsResponse()
+        max_batch_size = int(config.PRODUCTS_MAX_BATCH_SIZE)
+        if len(request.ids) > max_batch_size:
+            self._invalid_argument(
+                context, "At most {} IDs can be requested".format(max_batch_size)
+            )
+            return product_pb2.BatchGetProductsResponse()
+
+        fields = list(request.fields)
+        try:
+            unique_ids = list(dict.fromkeys(request.ids))
+            products_by_id = {}
+            for product_id in unique_ids:
+                product = self.cache.peek(product_id)
+                if product is not None:
+                    products_by_id[product_id] = product
+
+            missing_ids = [
+                product_id
+                for product_id in unique_ids
+                if product_id not in products_by_id
+            ]
+            if missing_ids:
+                version = self.cache.version()
+                products = await self.db.get_products(missing_ids, fields)
+                for product in products:
+                    product_id = str(product["_id"])
+                    products_by_id[product_id] = product
+                    # Only full documents may be cached, projections are not.
+                    if not fields:
+                        self.cache.put(product_id, product, version)
+
+            logging.info(
+                "Found {} of {} requested products".format(
+                    len(products_by_id), len(unique_ids)
+                )
+            )
+            return product_pb2.BatchGetProductsResponse(
+                results=[
+                    product_pb2.ProductLookup(
+                        id=product_id,
+                        found=True,
+                        product=self._to_message(products_by_id[product_id], fields),
+                    )
+                    if product_id in products_by_id
+                    else product_pb2.ProductLookup(id=product_id, found=False)
+                    for product_id in request.ids
+                ]
+            )
+        except Exception as e:
+            self._handle_error(context, e)
+            return product_pb2.BatchGetProductsResponse()
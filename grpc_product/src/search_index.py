@@ -0,0 +1,218 @@
+import logging
+import math
+import re
+import time
+from collections import Counter
+from typing import AsyncIterator
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits a text into lowercase word tokens.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list[str]: The tokens in the order they appear in the text.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over product names and descriptions.
+
+    Documents are ranked with BM25. Product IDs are mapped to dense integer
+    IDs so that postings stay compact for large catalogs. Postings are kept in
+    dictionaries for cheap updates, and a numpy copy of each term's postings is
+    built lazily at query time, so a term matching a large share of the catalog
+    is scored in one vectorized pass. The index is built once from the database
+    and kept up to date by the write RPCs.
+
+    Attributes:
+        k1 (float): BM25 term frequency saturation parameter.
+        b (float): BM25 document length normalization parameter.
+        name_weight (int): How many times name tokens count compared to description tokens.
+
+    Methods:
+        build: Builds the index from an asynchronous stream of products.
+        add: Adds or replaces a product in the index.
+        remove: Removes a product from the index.
+        search: Returns the IDs and scores of the best matching products.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, name_weight: int = 2) -> None:
+        self.k1 = k1
+        self.b = b
+        self.name_weight = name_weight
+        self._postings: dict[str, dict[int, int]] = {}
+        self._posting_arrays: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._doc_terms: dict[int, tuple[str, ...]] = {}
+        self._doc_lengths = np.zeros(1024)
+        self._total_length = 0
+        self._internal_ids: dict[str, int] = {}
+        self._external_ids: list[str | None] = []
+        self._free_ids: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._internal_ids)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._internal_ids
+
+    def _terms(self, name: str, description: str) -> Counter:
+        terms = Counter(tokenize(description))
+        for token in tokenize(name):
+            terms[token] += self.name_weight
+        return terms
+
+    async def build(self, products: AsyncIterator[dict]) -> None:
+        """
+        Builds the index from an asynchronous stream of product documents.
+
+        Args:
+            products (AsyncIterator[dict]): Documents with `_id`, `name` and `description`.
+        """
+        start = time.perf_counter()
+        async for product in products:
+            self.add(
+                str(product["_id"]),
+                product.get("name", ""),
+                product.get("description", ""),
+            )
+        logging.info(
+            "Built search index over {} products in {:.2f}s".format(
+                len(self), time.perf_counter() - start
+            )
+        )
+
+    def add(self, product_id: str, name: str, description: str) -> None:
+        """
+        Adds a product to the index, replacing a previously indexed version.
+
+        Args:
+            product_id (str): The ID of the product.
+            name (str): The name of the product.
+            description (str): The description of the product.
+        """
+        self.remove(product_id)
+        terms = self._terms(name, description)
+        if self._free_ids:
+            doc = self._free_ids.pop()
+            self._external_ids[doc] = product_id
+        else:
+            doc = len(self._external_ids)
+            self._external_ids.append(product_id)
+            if doc == len(self._doc_lengths):
+                self._doc_lengths = np.concatenate(
+                    [self._doc_lengths, np.zeros(len(self._doc_lengths))]
+                )
+        self._internal_ids[product_id] = doc
+
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[doc] = frequency
+            self._posting_arrays.pop(term, None)
+        length = sum(terms.values())
+        self._doc_terms[doc] = tuple(terms)
+        self._doc_lengths[doc] = length
+        self._total_length += length
+
+    def remove(self, product_id: str) -> bool:
+        """
+        Removes a product from the index.
+
+        Args:
+            product_id (str): The ID of the product.
+
+        Returns:
+            bool: True if the product was indexed, False otherwise.
+        """
+        doc = self._internal_ids.pop(product_id, None)
+        if doc is None:
+            return False
+        for term in self._doc_terms.pop(doc):
+            postings = self._postings[term]
+            del postings[doc]
+            if not postings:
+                del self._postings[term]
+            self._posting_arrays.pop(term, None)
+        self._total_length -= int(self._doc_lengths[doc])
+        self._doc_lengths[doc] = 0
+        self._external_ids[doc] = None
+        self._free_ids.append(doc)
+        return True
+
+    def _term_arrays(self, term: str) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        Returns the postings of a term as arrays of document IDs and frequencies.
+
+        The arrays are cached until a document containing the term changes.
+        """
+        arrays = self._posting_arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if not postings:
+                return None
+            docs = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            frequencies = np.fromiter(
+                postings.values(), dtype=np.float64, count=len(postings)
+            )
+            arrays = (docs, frequencies)
+            self._posting_arrays[term] = arrays
+        return arrays
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        """
+        Returns the products best matching a query, ranked by BM25.
+
+        Args:
+            query (str): The free-text query, e.g. "oak wardrobe".
+            k (int): The maximum number of results.
+
+        Returns:
+            list[tuple[str, float]]: Product IDs and scores, best match first.
+        """
+        total_docs = len(self._internal_ids)
+        # Documents without any term cannot match, and would divide by zero below.
+        if not self._total_length or k <= 0:
+            return []
+        average_length = self._total_length / total_docs
+
+        # norm(doc) = k1 * (1 - b + b * length / average_length)
+        norm_base = self.k1 * (1 - self.b)
+        norm_scale = self.k1 * self.b / average_length
+
+        scores = np.zeros(len(self._external_ids))
+        matched = []
+        for term in set(tokenize(query)):
+            arrays = self._term_arrays(term)
+            if arrays is None:
+                continue
+            docs, frequencies = arrays
+            df = len(docs)
+            weight = math.log(1 + (total_docs - df + 0.5) / (df + 0.5)) * (self.k1 + 1)
+            norms = norm_base + norm_scale * self._doc_lengths[docs]
+            # Document IDs are unique within one term, so fancy-index addition is safe.
+            scores[docs] += weight * frequencies / (frequencies + norms)
+            matched.append(docs)
+        if not matched:
+            return []
+
+        # Every matching document has a positive score, so non-zero entries are
+        # exactly the candidates, without deduplicating the postings.
+        candidates = matched[0] if len(matched) == 1 else np.flatnonzero(scores)
+        candidate_scores = scores[candidates]
+        if len(candidates) > k:
+            best = np.argpartition(-candidate_scores, k - 1)[:k]
+        else:
+            best = np.arange(len(candidates))
+        best = best[np.argsort(-candidate_scores[best], kind="stable")]
+        return [
+            (self._external_ids[candidates[i]], float(candidate_scores[i]))
+            for i in best
+        ]
@@ -16,6 +16,10 @@ async def serve() -> None:
     """
     server = grpc.aio.server()
     product_servicer = ProductServicer()
+    await product_servicer.db.ensure_indexes()
+    await product_servicer.search_index.build(
+        product_servicer.db.iter_products(["name", "description"])
+    )
 
     product_pb2_grpc.add_ProductServiceServicer_to_server(product_servicer, server)
 
@@ -29,4 +33,7 @@ async def serve() -> None:
     server.add_insecure_port(listen_addr)
     logging.info(f"Starting product server on {listen_addr}")
     await server.start()
-    await server.wait_for_termination()
+    try:
+        await server.wait_for_termination()
+    finally:
+        product_servicer.db.close()
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from grpc_product.src.config import config
+from grpc_product.src.mongo_manager import PRODUCT_INDEXES, ProductDB
+
+EXPLAIN_COLLECTION = "products_explain_test"
+
+@pytest.fixture(scope="module")
+def mongo():
+    client = MongoClient(
+        f"mongodb://{config.MONGO_HOSTNAME}:{config.MONGO_PORT}",
+        serverSelectionTimeoutMS=500,
+    )
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip("MongoDB is not reachable")
+    finally:
+        client.close()
+
+def plan_stages(plan):
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if plan.get(key):
+            stages.extend(plan_stages(plan[key]))
+    for stage in plan.get("inputStages", []):
+        stages.extend(plan_stages(stage))
+    return stages
+
+def explain_search(query, sort_field, descending=False):
+    async def run():
+        db = ProductDB()
+        db.collection = db.db[EXPLAIN_COLLECTION]
+        try:
+            await db.collection.drop()
+            await db.collection.insert_many(
+                [
+                    {"name": str(i), "price": float(i % 50), "state": ("new", "used")[i % 2], "owner_id": str(i % 10)}
+                    for i in range(500)
+                ]
+            )
+            await db.collection.create_indexes(PRODUCT_INDEXES)
+            plan = await db._search_cursor(query, sort_field, descending, 20).explain()
+            return plan["queryPlanner"]["winningPlan"]
+        finally:
+            await db.collection.drop()
+            db.close()
+    return asyncio.run(run())
+
+def test_build_search_query_empty():
+    assert ProductDB.build_search_query() == {}
+
+def test_build_search_query_all_filters():
+    query = ProductDB.build_search_query(
+        min_price=10, max_price=100, state="used", owner_id="1"
+    )
+    assert query == {
+        "state": "used",
+        "owner_id": "1",
+        "price": {"$gte": 10, "$lte": 100},
+    }
+
+def test_build_search_query_zero_min_price():
+    assert ProductDB.build_search_query(min_price=0) == {"price": {"$gte": 0}}
+
+def test_winning_index_nested():
+    plan = {
+        "stage": "LIMIT",
+        "inputStage": {
+            "stage": "FETCH",
+            "inputStage": {"stage": "IXSCAN", "indexName": "state_price"},
+        },
+    }
+    assert ProductDB._winning_index(plan) == "state_price"
+
+def test_winning_index_collscan():
+    assert ProductDB._winning_index({"stage": "COLLSCAN"}) is None
+
+def test_search_sorted_by_price_uses_index_order(mongo):
+    for query in ({}, {"state": "used"}, {"owner_id": "1", "price": {"$gte": 10}}):
+        for descending in (False, True):
+            assert "SORT" not in plan_stages(explain_search(query, "price", descending))
+
+def test_search_by_state_sorted_by_creation_uses_index_order(mongo):
+    plan = explain_search({"state": "used"}, "_id")
+    assert "SORT" not in plan_stages(plan)
+    assert ProductDB._winning_index(plan) == "state_id"
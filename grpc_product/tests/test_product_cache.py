@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from grpc_product.src.product_cache import ProductCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_loader(calls, value=None, delay=0):
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value if value is not None else {"_id": "1", "name": "Oak wardrobe"}
+    return loader
+
+def test_get_caches_value():
+    async def run():
+        cache, calls = ProductCache(10, 60), []
+        await cache.get("1", make_loader(calls))
+        await cache.get("1", make_loader(calls))
+        return cache, calls
+    cache, calls = asyncio.run(run())
+    assert len(calls) == 1
+    assert cache.hits == 1 and cache.misses == 1
+
+def test_get_does_not_cache_missing():
+    async def run():
+        cache = ProductCache(10, 60)
+        async def loader():
+            return None
+        assert await cache.get("1", loader) is None
+        return cache
+    assert len(asyncio.run(run())) == 0
+
+def test_concurrent_misses_share_one_load():
+    async def run():
+        cache, calls = ProductCache(10, 60), []
+        results = await asyncio.gather(
+            *(cache.get("1", make_loader(calls, delay=0.01)) for _ in range(10))
+        )
+        return cache, calls, results
+    cache, calls, results = asyncio.run(run())
+    assert len(calls) == 1
+    assert cache.coalesced == 9
+    assert all(result == results[0] for result in results)
+
+def test_ttl_expiration():
+    clock = FakeClock()
+    async def run():
+        cache, calls = ProductCache(10, 60, clock=clock), []
+        await cache.get("1", make_loader(calls))
+        clock.now = 61
+        await cache.get("1", make_loader(calls))
+        return cache, calls
+    cache, calls = asyncio.run(run())
+    assert len(calls) == 2
+    assert cache.expirations == 1
+
+def test_lru_eviction():
+    async def run():
+        cache, calls = ProductCache(2, 60), []
+        for key in ["1", "2", "1", "3"]:
+            await cache.get(key, make_loader(calls, value={"_id": key}))
+        await cache.get("1", make_loader(calls))
+        return cache, calls
+    cache, calls = asyncio.run(run())
+    assert cache.evictions == 1
+    assert len(calls) == 3
+
+def test_invalidate():
+    async def run():
+        cache, calls = ProductCache(10, 60), []
+        await cache.get("1", make_loader(calls))
+        cache.invalidate("1")
+        await cache.get("1", make_loader(calls))
+        return cache, calls
+    cache, calls = asyncio.run(run())
+    assert len(calls) == 2
+    assert cache.invalidations == 1
+
+def test_invalidate_during_load_discards_stale_result():
+    async def run():
+        cache, calls = ProductCache(10, 60), []
+        load = asyncio.ensure_future(cache.get("1", make_loader(calls, delay=0.01)))
+        await asyncio.sleep(0)
+        cache.invalidate("1")
+        await load
+        return cache
+    assert len(asyncio.run(run())) == 0
+
+def test_loader_error_is_not_cached():
+    async def run():
+        cache = ProductCache(10, 60)
+        async def loader():
+            raise RuntimeError("db down")
+        with pytest.raises(RuntimeError):
+            await cache.get("1", loader)
+        return cache
+    assert len(asyncio.run(run())) == 0
+
+def test_put_is_skipped_after_invalidation():
+    cache = ProductCache(10, 60)
+    version = cache.version()
+    cache.invalidate("2")
+    cache.put("1", {"_id": "1"}, version)
+    assert cache.peek("1") is None
+    cache.put("1", {"_id": "1"}, cache.version())
+    assert cache.peek("1") == {"_id": "1"}
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,57 @@
+import asyncio
+import sys
+
+import grpc
+import pytest
+
+class FakeContext:
+    def __init__(self):
+        self.code, self.details = None, None
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+class FakeProductDB:
+    def __init__(self):
+        self.calls = []
+
+    async def list_products(self, *args):
+        self.calls.append(("list_products", args))
+        return []
+
+    async def search_products(self, *args):
+        self.calls.append(("search_products", args))
+        return [], None
+
+@pytest.fixture
+def servicer():
+    # Pytest imports every test module before running any test, so by now the
+    # gateway's copy of product.proto is loaded if its tests were collected
+    # too, and both copies cannot share the descriptor pool.
+    if "rest_gateway.proto.product_pb2" in sys.modules:
+        pytest.skip("run the grpc_product tests on their own to test the servicer")
+    from grpc_product.src.product_servicer import ProductServicer
+    servicer = ProductServicer()
+    servicer.db = FakeProductDB()
+    return servicer
+
+def test_list_products_rejects_negative_page_size(servicer):
+    from grpc_product.proto import product_pb2
+    for page_size in (-1, -5):
+        context = FakeContext()
+        request = product_pb2.ListProductsRequest(page_size=page_size)
+        response = asyncio.run(servicer.ListProducts(request, context))
+        assert context.code == grpc.StatusCode.INVALID_ARGUMENT
+        assert len(response.products) == 0
+    assert servicer.db.calls == []
+
+def test_search_products_rejects_negative_limit(servicer):
+    from grpc_product.proto import product_pb2
+    context = FakeContext()
+    request = product_pb2.SearchProductsRequest(limit=-1)
+    asyncio.run(servicer.SearchProducts(request, context))
+    assert context.code == grpc.StatusCode.INVALID_ARGUMENT
+    assert servicer.db.calls == []
@@ -0,0 +1,60 @@
+import asyncio
+
+from grpc_product.src.search_index import SearchIndex, tokenize
+
+def make_index():
+    index = SearchIndex()
+    index.add("1", "Oak wardrobe", "Solid oak, two doors")
+    index.add("2", "Pine wardrobe", "Light pine wood")
+    index.add("3", "Oak table", "Dining table for six")
+    return index
+
+def test_tokenize():
+    assert tokenize("Oak-Wardrobe, 2 doors!") == ["oak", "wardrobe", "2", "doors"]
+
+def test_tokenize_unicode():
+    assert tokenize("Дубовый шкаф") == ["дубовый", "шкаф"]
+
+def test_search_ranks_best_match_first():
+    results = make_index().search("oak wardrobe", 3)
+    assert [product_id for product_id, _ in results][0] == "1"
+    assert len(results) == 3
+
+def test_search_top_k():
+    assert len(make_index().search("oak wardrobe", 1)) == 1
+
+def test_search_unknown_term():
+    assert make_index().search("sofa", 10) == []
+
+def test_search_documents_without_terms():
+    index = SearchIndex()
+    index.add("1", "", "")
+    assert index.search("chair", 5) == []
+    index.add("2", "!!", "")
+    index.add("3", "Oak chair", "")
+    index.remove("3")
+    assert index.search("chair", 5) == []
+
+def test_remove():
+    index = make_index()
+    assert index.remove("1") is True
+    assert index.remove("1") is False
+    assert "1" not in index
+    assert [product_id for product_id, _ in index.search("oak", 10)] == ["3"]
+
+def test_add_replaces_existing():
+    index = make_index()
+    index.add("1", "Leather sofa", "Brown")
+    assert len(index) == 3
+    assert [product_id for product_id, _ in index.search("oak", 10)] == ["3"]
+    assert [product_id for product_id, _ in index.search("sofa", 10)] == ["1"]
+
+def test_build():
+    async def products():
+        yield {"_id": "a", "name": "Oak chair", "description": ""}
+        yield {"_id": "b", "name": "Steel chair", "description": "Industrial"}
+
+    index = SearchIndex()
+    asyncio.run(index.build(products()))
+    assert len(index) == 2
+    assert index.search("oak", 10)[0][0] == "a"
@@ -1,7 +1,15 @@
+import argparse
 import asyncio
+import csv
 import logging
 
+from grpc_user.src.availability_filter import AvailabilityFilter
+from grpc_user.src.config import config
+from grpc_user.src.migration_runner import MigrationRunner
+from grpc_user.src.password_manager import PasswordHasher
+from grpc_user.src.postgre_manager import DatabaseManager
 from grpc_user.src.server import serve as server_user_service
+from grpc_user.src.user_importer import ImportRow, UserImporter
 
 
 async def main():
@@ -15,5 +23,92 @@ async def main():
         raise
 
 
+async def migrate(show_status: bool) -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    db_manager = DatabaseManager()
+    await db_manager.connect()
+    try:
+        runner = MigrationRunner(db_manager.engine)
+        if show_status:
+            for migration, applied in await runner.status():
+                print(
+                    "{} {}".format("applied" if applied else "pending", migration.name)
+                )
+        else:
+            await runner.upgrade()
+    finally:
+        await db_manager.shutdown()
+
+
+async def import_users(path: str, batch_size: int, workers: int) -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    async def rows():
+        # The file is read lazily, so its size does not matter.
+        with open(path, newline="") as file:
+            for number, row in enumerate(csv.DictReader(file), start=1):
+                yield ImportRow(
+                    number,
+                    (row.get("username") or "").strip(),
+                    (row.get("email") or "").strip(),
+                    row.get("password") or "",
+                )
+
+    db_manager = DatabaseManager()
+    password_hasher = PasswordHasher(workers, n=int(config.PASSWORD_SCRYPT_N))
+    # Only publishes the imported names to the filters of running instances.
+    availability = AvailabilityFilter.from_url(
+        int(config.USER_AVAILABILITY_CAPACITY),
+        float(config.USER_AVAILABILITY_ERROR_RATE),
+        redis_url=config.USER_AVAILABILITY_REDIS_URL,
+    )
+    await db_manager.connect()
+    try:
+        importer = UserImporter(
+            db_manager, password_hasher, batch_size, availability=availability
+        )
+        report = await importer.import_users(rows())
+    finally:
+        password_hasher.shutdown()
+        await availability.close()
+        await db_manager.shutdown()
+
+    for number, username, reason in report.errors:
+        print("row {} ({}): {}".format(number, username, reason))
+    print(
+        "imported {}, rejected {}, {:.0f} rows/s".format(
+            report.imported, report.failed, report.rows_per_second
+        )
+    )
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(prog="python -m grpc_user")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("serve", help="Run the user service (default)")
+    migrate_parser = commands.add_parser("migrate", help="Apply pending migrations")
+    migrate_parser.add_argument(
+        "--status", action="store_true", help="List migrations without applying them"
+    )
+    import_parser = commands.add_parser(
+        "import", help="Import users from a CSV file with a username,email,password header"
+    )
+    import_parser.add_argument("path", help="The CSV file to import")
+    import_parser.add_argument(
+        "--batch-size", type=int, default=int(config.USERS_IMPORT_BATCH_SIZE)
+    )
+    import_parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(config.PASSWORD_HASH_WORKERS),
+        help="The number of password hashing processes",
+    )
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        asyncio.run(migrate(args.status))
+    elif args.command == "import":
+        asyncio.run(import_users(args.path, args.batch_size, args.workers))
+    else:
+        asyncio.run(main())
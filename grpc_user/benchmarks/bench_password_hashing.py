@@ -0,0 +1,100 @@
+"""
+Benchmark of login throughput with passwords checked in the hashing pool.
+
+Checks scrypt hashes through `PasswordHasher` with a growing number of worker
+processes, keeping a fixed number of logins in flight, and reports logins per
+second overall and per worker. A ticker task measures how late the event loop
+wakes it up, which shows whether hashing blocks other requests: the same
+logins checked inline on the loop are reported as the baseline.
+
+Usage:
+    python -m grpc_user.benchmarks.bench_password_hashing --logins 200 --workers 1 2 4
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from grpc_user.src.password_manager import Hasher, PasswordHasher
+
+TICK_SECONDS = 0.005
+
+
+async def measure_lag(stop: asyncio.Event) -> float:
+    """
+    Wakes up every few milliseconds until `stop` is set.
+
+    Returns:
+        float: The largest delay of a wake-up in milliseconds.
+    """
+    max_lag = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK_SECONDS
+        await asyncio.sleep(TICK_SECONDS)
+        max_lag = max(max_lag, time.perf_counter() - expected)
+    return max_lag * 1000
+
+
+async def drive(check, logins: int, concurrency: int) -> tuple[float, float]:
+    """
+    Runs `logins` password checks with `concurrency` checks in flight.
+
+    Returns:
+        tuple[float, float]: The logins per second and the largest event loop delay in milliseconds.
+    """
+    remaining = iter(range(logins))
+    stop = asyncio.Event()
+    lag = asyncio.create_task(measure_lag(stop))
+
+    async def worker() -> None:
+        for _ in remaining:
+            valid, _ = await check()
+            assert valid
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return logins / elapsed, await lag
+
+
+async def main(args: argparse.Namespace) -> None:
+    password = "correct horse battery staple"
+    encoded = Hasher.hash_scrypt(password, n=args.n)
+    print(
+        "logins={} concurrency={} scrypt_n={} cpus={}".format(
+            args.logins, args.concurrency, args.n, os.cpu_count()
+        )
+    )
+    line = "{:<12} {:8.1f} logins/s  {:7.1f} logins/s/worker  max loop lag={:.1f}ms"
+
+    async def check_inline():
+        return Hasher.verify_scrypt(password, encoded), None
+
+    throughput, lag = await drive(check_inline, args.logins, args.concurrency)
+    print(line.format("inline:", throughput, throughput, lag))
+
+    for workers in args.workers:
+        hasher = PasswordHasher(workers, n=args.n)
+        try:
+            # Starts the worker processes before measuring.
+            await asyncio.gather(*(hasher.hash(password) for _ in range(workers)))
+            throughput, lag = await drive(
+                lambda: hasher.verify(password, encoded),
+                args.logins,
+                args.concurrency,
+            )
+        finally:
+            hasher.shutdown()
+        label = "{} workers:".format(workers)
+        print(line.format(label, throughput, throughput / workers, lag))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--n", type=int, default=2**14)
+    asyncio.run(main(parser.parse_args()))
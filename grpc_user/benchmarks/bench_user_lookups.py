@@ -0,0 +1,119 @@
+"""
+Benchmark of login and lookup query latency on a large users table.
+
+Creates the user tables in a separate schema of the configured PostgreSQL
+database, fills them with the given number of users and times the statements
+the user service runs for `CheckCredentials`, `GetUser` and `BatchGetUsers`.
+The credentials lookup is timed once with the indexes and once after dropping
+them, which shows the cost of a sequential scan per login. The schema is
+dropped at the end.
+
+Usage:
+    python -m grpc_user.benchmarks.bench_user_lookups --users 1000000 --lookups 2000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from grpc_user.src.models import Base
+from grpc_user.src.postgre_manager import DatabaseManager
+from grpc_user.src.queries import GET_CREDENTIALS, GET_USER, GET_USERS
+
+SCHEMA = "bench_user_lookups"
+
+
+async def seed(engine: AsyncEngine, users: int, schema: str = SCHEMA) -> None:
+    """
+    Creates the tables in `schema` and fills them with `users` users.
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP SCHEMA IF EXISTS {} CASCADE".format(schema)))
+        await conn.execute(text("CREATE SCHEMA {}".format(schema)))
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            text(
+                "INSERT INTO users (username, email) "
+                "SELECT 'user' || i, 'user' || i || '@example.com' "
+                "FROM generate_series(1, :users) AS i"
+            ),
+            {"users": users},
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO passwords (user_id, password_hash) "
+                "SELECT id, 'scrypt$16384$8$1$c2FsdA==$a2V5' FROM users"
+            )
+        )
+        await conn.execute(text("ANALYZE users"))
+        await conn.execute(text("ANALYZE passwords"))
+
+
+async def drive(engine: AsyncEngine, statement, parameters: list[dict]) -> tuple:
+    """
+    Runs `statement` once per parameter set on a single connection.
+
+    Returns:
+        tuple[float, float]: The p50 and p99 latency in milliseconds.
+    """
+    latencies = []
+    async with engine.connect() as conn:
+        for params in parameters:
+            start = time.perf_counter()
+            rows = await conn.execute(statement, params)
+            rows.all()
+            latencies.append(time.perf_counter() - start)
+    percentiles = statistics.quantiles(latencies, n=100)
+    return percentiles[49] * 1000, percentiles[98] * 1000
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(
+        DatabaseManager().url,
+        connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    try:
+        start = time.perf_counter()
+        await seed(engine, args.users)
+        print(
+            "seeded {} users in {:.1f}s".format(
+                args.users, time.perf_counter() - start
+            )
+        )
+
+        ids = [random.randint(1, args.users) for _ in range(args.lookups)]
+        credentials = [{"username": "user{}".format(i)} for i in ids]
+        lookups = [{"user_id": i} for i in ids]
+        batches = [{"user_ids": ids[i : i + 100]} for i in range(0, len(ids), 100)]
+        line = "{:<28} p50={:.3f}ms  p99={:.3f}ms"
+        result = await drive(engine, GET_CREDENTIALS, credentials)
+        print(line.format("credentials (indexed):", *result))
+        result = await drive(engine, GET_USER, lookups)
+        print(line.format("get user:", *result))
+        result = await drive(engine, GET_USERS, batches)
+        print(line.format("batch of 100 users:", *result))
+
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP INDEX ix_users_username_active"))
+            await conn.execute(text("DROP INDEX ix_passwords_user_id"))
+        result = await drive(
+            engine, GET_CREDENTIALS, credentials[: args.unindexed_lookups]
+        )
+        print(line.format("credentials (no indexes):", *result))
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA IF EXISTS {} CASCADE".format(SCHEMA)))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--unindexed-lookups", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,124 @@
+"""
+Benchmark of database round trips and latency of user updates and deletions.
+
+Seeds a separate schema of the configured PostgreSQL database with users and
+runs updates and soft deletions two ways: the former ORM path, which selects
+the user, changes its attributes, commits and refreshes it, and the
+`UPDATE ... RETURNING` statements the user service runs now. Round trips are
+counted from the statements, transaction starts and commits sent per call.
+
+Usage:
+    python -m grpc_user.benchmarks.bench_user_writes --users 100000 --writes 2000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from grpc_user.benchmarks.bench_user_lookups import seed
+from grpc_user.src.models import User
+from grpc_user.src.postgre_manager import DatabaseManager
+from grpc_user.src.queries import DELETE_USER, UPDATE_USER
+
+SCHEMA = "bench_user_writes"
+
+
+class RoundTripCounter:
+    """
+    Counts the statements, transaction starts and commits sent by an engine.
+    """
+
+    def __init__(self, engine) -> None:
+        self.count = 0
+        for name in ("before_cursor_execute", "begin", "commit"):
+            event.listen(engine.sync_engine, name, self._increment)
+
+    def _increment(self, *args, **kwargs) -> None:
+        self.count += 1
+
+
+async def orm_update(session, user_id: int) -> None:
+    user = (await session.execute(select(User).where(User.id == user_id))).scalar()
+    user.role = "admin"
+    await session.commit()
+    await session.refresh(user)
+
+
+async def statement_update(session, user_id: int) -> None:
+    params = {"user_id": user_id, "new_username": None, "new_email": None}
+    await session.execute(UPDATE_USER, {**params, "new_role": "admin"})
+    await session.commit()
+
+
+async def orm_delete(session, user_id: int) -> None:
+    user = (await session.execute(select(User).where(User.id == user_id))).scalar()
+    user.deleted = True
+    await session.commit()
+
+
+async def statement_delete(session, user_id: int) -> None:
+    await session.execute(DELETE_USER, {"user_id": user_id})
+    await session.commit()
+
+
+async def drive(get_session, counter, write, user_ids: list[int]) -> tuple:
+    """
+    Runs `write` once per user, each in its own session.
+
+    Returns:
+        tuple[float, float, float]: The round trips per call, and the p50 and p99 latency in milliseconds.
+    """
+    latencies = []
+    counter.count = 0
+    for user_id in user_ids:
+        start = time.perf_counter()
+        async with get_session() as session:
+            await write(session, user_id)
+        latencies.append(time.perf_counter() - start)
+    percentiles = statistics.quantiles(latencies, n=100)
+    return (
+        counter.count / len(user_ids),
+        percentiles[49] * 1000,
+        percentiles[98] * 1000,
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(
+        DatabaseManager().url,
+        connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    get_session = async_sessionmaker(engine)
+    counter = RoundTripCounter(engine)
+    try:
+        await seed(engine, args.users, SCHEMA)
+        # Every write touches a different user, so deletions never hit a
+        # user deleted by an earlier run.
+        user_ids = random.sample(range(1, args.users + 1), 4 * args.writes)
+        batches = [user_ids[i :: 4] for i in range(4)]
+
+        line = "{:<20} {:4.1f} round trips  p50={:.3f}ms  p99={:.3f}ms"
+        for label, write, batch in (
+            ("update (orm):", orm_update, batches[0]),
+            ("update (returning):", statement_update, batches[1]),
+            ("delete (orm):", orm_delete, batches[2]),
+            ("delete (returning):", statement_delete, batches[3]),
+        ):
+            result = await drive(get_session, counter, write, batch)
+            print(line.format(label, *result))
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA IF EXISTS {} CASCADE".format(SCHEMA)))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--writes", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,41 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+"""
+Creates the users and passwords tables as the service created them before migrations.
+
+Databases set up by the former `initialize_schema` already have these tables,
+so they are only created if they do not exist.
+"""
+
+TRANSACTIONAL = True
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    await conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                username VARCHAR NOT NULL,
+                role VARCHAR NOT NULL DEFAULT 'user',
+                email VARCHAR NOT NULL,
+                created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+                updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+                deleted BOOLEAN NOT NULL DEFAULT false
+            )
+            """
+        )
+    )
+    await conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS passwords (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL REFERENCES users (id),
+                md5_password VARCHAR NOT NULL,
+                sha256_password VARCHAR NOT NULL
+            )
+            """
+        )
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+"""
+Adds the scrypt password hash and makes the legacy hashes optional.
+"""
+
+TRANSACTIONAL = True
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    await conn.execute(
+        text("ALTER TABLE passwords ADD COLUMN IF NOT EXISTS password_hash VARCHAR")
+    )
+    await conn.execute(
+        text("ALTER TABLE passwords ALTER COLUMN md5_password DROP NOT NULL")
+    )
+    await conn.execute(
+        text("ALTER TABLE passwords ALTER COLUMN sha256_password DROP NOT NULL")
+    )
@@ -0,0 +1,24 @@
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from grpc_user.src.migration_runner import create_index_concurrently
+
+"""
+Indexes the username, email and password lookups.
+
+The indexes are built concurrently, so the service keeps serving reads and
+writes on the tables while they are built.
+"""
+
+TRANSACTIONAL = False
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    await create_index_concurrently(
+        conn, "ix_users_username", "users", ["username"], unique=True
+    )
+    await create_index_concurrently(
+        conn, "ix_users_email", "users", ["email"], unique=True
+    )
+    await create_index_concurrently(
+        conn, "ix_passwords_user_id", "passwords", ["user_id"], unique=True
+    )
@@ -0,0 +1,36 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from grpc_user.src.migration_runner import create_index_concurrently
+
+"""
+Restricts the username and email indexes to users that are not deleted.
+
+Lookups by username and email skip soft-deleted users, so partial indexes on
+`NOT deleted` match them exactly and stay smaller than the full ones. A deleted
+user no longer holds on to its username and email. The partial indexes are
+built before the full ones are dropped, so lookups stay indexed throughout.
+"""
+
+TRANSACTIONAL = False
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    await create_index_concurrently(
+        conn,
+        "ix_users_username_active",
+        "users",
+        ["username"],
+        unique=True,
+        where="NOT deleted",
+    )
+    await create_index_concurrently(
+        conn,
+        "ix_users_email_active",
+        "users",
+        ["email"],
+        unique=True,
+        where="NOT deleted",
+    )
+    await conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS ix_users_username"))
+    await conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS ix_users_email"))
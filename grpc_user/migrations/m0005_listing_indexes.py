@@ -0,0 +1,39 @@
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from grpc_user.src.migration_runner import create_index_concurrently
+
+"""
+Indexes the admin listing of users.
+
+Pages are read in ID order after the last ID of the previous page, so every
+index ends with, or is ordered by, the ID: reading a page costs the same at
+any depth. Prefix searches use `text_pattern_ops` indexes, which answer range
+scans in code point order whatever the collation of the database; their
+matches are still sorted by ID, so their cost grows with the number of matches
+rather than with the page depth. Deleted users get their own small index.
+"""
+
+TRANSACTIONAL = False
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    await create_index_concurrently(
+        conn, "ix_users_role_id_active", "users", ["role", "id"], where="NOT deleted"
+    )
+    await create_index_concurrently(
+        conn, "ix_users_id_deleted", "users", ["id"], where="deleted"
+    )
+    await create_index_concurrently(
+        conn,
+        "ix_users_username_prefix",
+        "users",
+        ["username text_pattern_ops"],
+        where="NOT deleted",
+    )
+    await create_index_concurrently(
+        conn,
+        "ix_users_email_prefix",
+        "users",
+        ["email text_pattern_ops"],
+        where="NOT deleted",
+    )
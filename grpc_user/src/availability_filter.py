@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+from typing import AsyncIterator, Callable
+
+from redis import asyncio as aioredis
+
+AVAILABILITY_CHANNEL = "user_names"
+
+"""
+This module contains the in-memory filter answering username and email availability checks.
+
+A Bloom filter never misses a value that was added to it, so a value it does
+not contain is certainly free and the check needs no database lookup. A value
+it contains may be taken and is looked up in PostgreSQL.
+
+Names taken on one instance of the service are published on a Redis channel
+that every instance adds to its filters, so they are not reported as available
+elsewhere. Without Redis, they are only picked up by the periodic rebuild and
+are reported as available on the other instances until then; the unique
+indexes still reject them on creation. Values cannot be removed from a Bloom
+filter, so the names of deleted users cost a lookup until the next rebuild.
+"""
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter of strings.
+
+    Attributes:
+        capacity (int): The number of values the filter is sized for.
+        error_rate (float): The false positive rate at capacity.
+        size (int): The number of bits.
+        hashes (int): The number of bits set per value.
+        count (int): The number of values added.
+
+    Methods:
+        add: Adds a value.
+        stats: Returns the fill and estimated false positive rate.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / max(capacity, 1) * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str) -> list[int]:
+        # Double hashing: k positions from the two halves of a single digest.
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+    def stats(self) -> dict[str, float]:
+        """
+        Returns the number of values, the share of bits set and the estimated false positive rate.
+        """
+        fill = int.from_bytes(self._bits, "little").bit_count() / self.size
+        return {
+            "count": self.count,
+            "fill": fill,
+            "false_positive_rate": fill**self.hashes,
+        }
+
+
+class AvailabilityFilter:
+    """
+    Bloom filters of the usernames and emails of active users.
+
+    Until the first build completes, every value may be taken, so checks fall
+    back to the database instead of reporting names as available. With Redis,
+    the same holds whenever the subscription to the names taken on other
+    instances is lost.
+
+    Attributes:
+        capacity (int): The number of users each filter is sized for.
+        error_rate (float): The false positive rate at capacity.
+        redis (aioredis.Redis or None): The client sharing taken names between instances, if any.
+        usernames (BloomFilter): The filter of usernames.
+        emails (BloomFilter): The filter of emails.
+        ready (bool): Whether the filters have been built.
+        checks (int): The number of values checked.
+        lookups (int): The number of checks that have to go to the database.
+
+    Methods:
+        add: Adds the username and email of a new or updated user.
+        publish: Adds taken names and shares them with the other instances.
+        might_be_taken: Tells whether a username or email may be taken.
+        rebuild: Builds new filters from all active users and swaps them in.
+        run: Keeps the filters up to date until cancelled.
+        close: Closes the Redis connection.
+        stats: Returns the state of the filters.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        redis: aioredis.Redis | None = None,
+    ) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.redis = redis
+        self.usernames = BloomFilter(capacity, error_rate)
+        self.emails = BloomFilter(capacity, error_rate)
+        self.ready = False
+        self.checks = 0
+        self.lookups = 0
+        self._pending: list[tuple[str | None, str | None]] | None = None
+
+    @classmethod
+    def from_url(
+        cls, capacity: int, error_rate: float, redis_url: str
+    ) -> "AvailabilityFilter":
+        """
+        Creates filters shared over Redis at `redis_url`, or local ones if the URL is empty.
+        """
+        redis = aioredis.Redis.from_url(redis_url) if redis_url else None
+        return cls(capacity, error_rate, redis=redis)
+
+    def add(self, username: str | None = None, email: str | None = None) -> None:
+        """
+        Adds the username and email of a new or updated user.
+
+        Args:
+            username (str or None): The taken username, if any.
+            email (str or None): The taken email, if any.
+        """
+        if username:
+            self.usernames.add(username)
+        if email:
+            self.emails.add(email)
+        if self._pending is not None:
+            # A rebuild in progress may have read the users before this one.
+            self._pending.append((username, email))
+
+    async def publish(self, names: list[tuple[str | None, str | None]]) -> None:
+        """
+        Adds taken names and shares them with the other instances.
+
+        A failed publication is logged: the other instances then only learn
+        about the names from their next rebuild.
+
+        Args:
+            names (list[tuple[str or None, str or None]]): The taken username and email of each user.
+        """
+        for username, email in names:
+            self.add(username, email)
+        if self.redis is None or not names:
+            return
+        try:
+            await self.redis.publish(AVAILABILITY_CHANNEL, json.dumps(names))
+        except Exception as e:
+            logging.error("Failed to publish taken names: {}".format(e))
+
+    def might_be_taken(self, field: str, value: str) -> bool:
+        """
+        Tells whether a username or email may be taken.
+
+        Args:
+            field (str): Either "username" or "email".
+            value (str): The checked value.
+
+        Returns:
+            bool: False if the value is certainly free, True if it has to be looked up.
+        """
+        self.checks += 1
+        bloom_filter = self.usernames if field == "username" else self.emails
+        if self.ready and value not in bloom_filter:
+            return False
+        self.lookups += 1
+        return True
+
+    async def rebuild(self, rows: AsyncIterator[tuple[str, str]]) -> None:
+        """
+        Builds new filters from all active users and swaps them in.
+
+        The current filters keep answering checks during the build. Users
+        added meanwhile go into both, so none is lost by the swap.
+
+        Args:
+            rows (AsyncIterator[tuple[str, str]]): The username and email of every active user.
+        """
+        usernames = BloomFilter(self.capacity, self.error_rate)
+        emails = BloomFilter(self.capacity, self.error_rate)
+        self._pending = []
+        try:
+            async for username, email in rows:
+                usernames.add(username)
+                emails.add(email)
+            for username, email in self._pending:
+                if username:
+                    usernames.add(username)
+                if email:
+                    emails.add(email)
+        finally:
+            self._pending = None
+        self.usernames, self.emails = usernames, emails
+        self.ready = True
+
+    async def _rebuild(
+        self, rows: Callable[[], AsyncIterator[tuple[str, str]]]
+    ) -> None:
+        await self.rebuild(rows())
+        logging.info(
+            "Availability filters built from {} users".format(self.usernames.count)
+        )
+
+    async def run(
+        self,
+        rows: Callable[[], AsyncIterator[tuple[str, str]]],
+        refresh_interval: float,
+        retry_delay: float = 1.0,
+    ) -> None:
+        """
+        Keeps the filters up to date until cancelled.
+
+        The filters are rebuilt every `refresh_interval` seconds. With Redis,
+        the channel of taken names is subscribed to before each first build,
+        so no name published during it is missed, and a lost subscription
+        stops the filters from answering until they are subscribed and built
+        again. Failures are logged and retried.
+
+        Args:
+            rows (Callable[[], AsyncIterator[tuple[str, str]]]): Returns the username and email of every active user.
+            refresh_interval (float): How often the filters are rebuilt, in seconds.
+            retry_delay (float): The delay before reconnecting to Redis after a failure, in seconds.
+        """
+        if self.redis is None:
+            while True:
+                try:
+                    await self._rebuild(rows)
+                except Exception as e:
+                    logging.error("Failed to build availability filters: {}".format(e))
+                await asyncio.sleep(refresh_interval)
+
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(AVAILABILITY_CHANNEL)
+                await self._rebuild(rows)
+                built_at = time.monotonic()
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        for username, email in json.loads(message["data"]):
+                            self.add(username, email)
+                    if time.monotonic() - built_at > refresh_interval:
+                        await self._rebuild(rows)
+                        built_at = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error("Availability filters lost sync with Redis: {}".format(e))
+            finally:
+                self.ready = False
+                await pubsub.aclose()
+            await asyncio.sleep(retry_delay)
+
+    async def close(self) -> None:
+        """
+        Closes the Redis connection, if any.
+        """
+        if self.redis is not None:
+            await self.redis.aclose()
+
+    def stats(self) -> dict[str, float]:
+        """
+        Returns the state of the filters.
+
+        Returns:
+            dict[str, float]: Whether the filters are built, the share of checks
+            looked up in the database, and the counts, fill and false positive rates of both filters.
+        """
+        stats = {
+            "ready": float(self.ready),
+            "checks": self.checks,
+            "lookups": self.lookups,
+            "lookup_rate": self.lookups / self.checks if self.checks else 0.0,
+        }
+        for name, bloom_filter in (
+            ("usernames", self.usernames),
+            ("emails", self.emails),
+        ):
+            stats.update(
+                {
+                    "{}.{}".format(name, key): value
+                    for key, value in bloom_filter.stats().items()
+                }
+            )
+        return stats
@@ -16,7 +16,56 @@ class Config:
     POSTGRES_DB_NAME: str = os.getenv("POSTGRES_DB_NAME")
     POSTGRES_USERNAME: str = os.getenv("POSTGRES_USERNAME")
     POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD")
+    POSTGRES_REPLICA_URLS: str = os.getenv("POSTGRES_REPLICA_URLS", "")
+    POSTGRES_READ_YOUR_WRITES_SECONDS: str = os.getenv(
+        "POSTGRES_READ_YOUR_WRITES_SECONDS", "5"
+    )
+    POSTGRES_ECHO: str = os.getenv("POSTGRES_ECHO", "false")
+    POSTGRES_POOL_SIZE: str = os.getenv("POSTGRES_POOL_SIZE", "5")
+    POSTGRES_MAX_OVERFLOW: str = os.getenv("POSTGRES_MAX_OVERFLOW", "10")
+    POSTGRES_POOL_TIMEOUT_SECONDS: str = os.getenv(
+        "POSTGRES_POOL_TIMEOUT_SECONDS", "30"
+    )
+    POSTGRES_POOL_RECYCLE_SECONDS: str = os.getenv(
+        "POSTGRES_POOL_RECYCLE_SECONDS", "1800"
+    )
+    POSTGRES_STATEMENT_CACHE_SIZE: str = os.getenv(
+        "POSTGRES_STATEMENT_CACHE_SIZE", "100"
+    )
+    POSTGRES_PGBOUNCER_MODE: str = os.getenv("POSTGRES_PGBOUNCER_MODE", "false")
+    POSTGRES_SLOW_QUERY_MS: str = os.getenv("POSTGRES_SLOW_QUERY_MS", "200")
+    POSTGRES_QUERY_STATS_MAX_STATEMENTS: str = os.getenv(
+        "POSTGRES_QUERY_STATS_MAX_STATEMENTS", "500"
+    )
     SERVER_PORT: str = os.getenv("SERVER_PORT")
+    MIGRATE_ON_STARTUP: str = os.getenv("MIGRATE_ON_STARTUP", "true")
+    USERS_MAX_BATCH_SIZE: str = os.getenv("USERS_MAX_BATCH_SIZE", "100")
+    USERS_DEFAULT_PAGE_SIZE: str = os.getenv("USERS_DEFAULT_PAGE_SIZE", "20")
+    USERS_MAX_PAGE_SIZE: str = os.getenv("USERS_MAX_PAGE_SIZE", "100")
+    USERS_IMPORT_BATCH_SIZE: str = os.getenv("USERS_IMPORT_BATCH_SIZE", "1000")
+    PASSWORD_HASH_WORKERS: str = os.getenv("PASSWORD_HASH_WORKERS", "2")
+    PASSWORD_SCRYPT_N: str = os.getenv("PASSWORD_SCRYPT_N", "16384")
+    USER_CACHE_SIZE: str = os.getenv("USER_CACHE_SIZE", "10000")
+    USER_CACHE_TTL_SECONDS: str = os.getenv("USER_CACHE_TTL_SECONDS", "5")
+    USER_CACHE_REDIS_URL: str = os.getenv("USER_CACHE_REDIS_URL", "")
+    USER_CACHE_REDIS_TTL_SECONDS: str = os.getenv(
+        "USER_CACHE_REDIS_TTL_SECONDS", "60"
+    )
+    USER_CACHE_REDIS_TOMBSTONE_SECONDS: str = os.getenv(
+        "USER_CACHE_REDIS_TOMBSTONE_SECONDS", "30"
+    )
+    USER_AVAILABILITY_CAPACITY: str = os.getenv(
+        "USER_AVAILABILITY_CAPACITY", "1000000"
+    )
+    USER_AVAILABILITY_ERROR_RATE: str = os.getenv(
+        "USER_AVAILABILITY_ERROR_RATE", "0.01"
+    )
+    USER_AVAILABILITY_REFRESH_SECONDS: str = os.getenv(
+        "USER_AVAILABILITY_REFRESH_SECONDS", "600"
+    )
+    USER_AVAILABILITY_REDIS_URL: str = os.getenv(
+        "USER_AVAILABILITY_REDIS_URL", os.getenv("USER_CACHE_REDIS_URL", "")
+    )
 
 
 config = Config()
@@ -0,0 +1,219 @@
+import importlib
+import logging
+import pkgutil
+from types import ModuleType
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+"""
+This module contains the runner of the versioned schema migrations.
+
+Migrations are the modules of the `grpc_user.migrations` package named
+`m<version>_<description>.py`. Each defines an `upgrade(conn)` coroutine and a
+`TRANSACTIONAL` flag. Transactional migrations run in one transaction together
+with recording their version, so they are applied completely or not at all.
+The others run in autocommit mode, which statements like
+`CREATE INDEX CONCURRENTLY` require, and have to be safe to run again if they
+fail halfway.
+"""
+
+MIGRATIONS_PACKAGE = "grpc_user.migrations"
+# Key of the PostgreSQL advisory lock held while migrating, so that instances
+# starting at the same time do not apply the same migration twice.
+MIGRATION_LOCK_ID = 7_134_001
+
+
+class Migration:
+    """
+    A single schema migration.
+
+    Attributes:
+        version (int): The version number from the module name.
+        name (str): The name of the module.
+        module (ModuleType): The module defining `upgrade` and `TRANSACTIONAL`.
+    """
+
+    def __init__(self, version: int, name: str, module: ModuleType) -> None:
+        self.version = version
+        self.name = name
+        self.module = module
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "TRANSACTIONAL", True)
+
+
+def discover_migrations(package: str = MIGRATIONS_PACKAGE) -> list[Migration]:
+    """
+    Finds the migrations of a package.
+
+    Args:
+        package (str): The package holding the migration modules.
+
+    Returns:
+        list[Migration]: The migrations ordered by version.
+    """
+    migrations = []
+    for module_info in pkgutil.iter_modules(importlib.import_module(package).__path__):
+        prefix = module_info.name.split("_")[0]
+        if not (prefix.startswith("m") and prefix[1:].isdigit()):
+            continue
+        module = importlib.import_module("{}.{}".format(package, module_info.name))
+        migrations.append(Migration(int(prefix[1:]), module_info.name, module))
+    migrations.sort(key=lambda migration: migration.version)
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError("Duplicate migration versions in {}".format(package))
+    return migrations
+
+
+async def create_index_concurrently(
+    conn: AsyncConnection,
+    name: str,
+    table: str,
+    columns: list[str],
+    unique: bool = False,
+    where: str | None = None,
+) -> None:
+    """
+    Builds an index without blocking writes to the table.
+
+    A concurrent build that fails, for example on duplicate values of a unique
+    index, leaves an invalid index behind. Such an index is dropped first, so
+    the build is retried instead of being skipped by `IF NOT EXISTS`.
+
+    Args:
+        conn (AsyncConnection): A connection in autocommit mode.
+        name (str): The name of the index.
+        table (str): The indexed table.
+        columns (list[str]): The indexed columns.
+        unique (bool): Whether the index enforces unique values.
+        where (str or None): The predicate of a partial index.
+    """
+    invalid = await conn.execute(
+        text(
+            "SELECT 1 FROM pg_index "
+            "JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+            "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+        ),
+        {"name": name},
+    )
+    if invalid.first() is not None:
+        logging.warning("Dropping invalid index {}".format(name))
+        await conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS {}".format(name)))
+    await conn.execute(
+        text(
+            "CREATE {}INDEX CONCURRENTLY IF NOT EXISTS {} ON {} ({}){}".format(
+                "UNIQUE " if unique else "",
+                name,
+                table,
+                ", ".join(columns),
+                " WHERE {}".format(where) if where else "",
+            )
+        )
+    )
+
+
+class MigrationRunner:
+    """
+    Applies pending schema migrations in version order.
+
+    Attributes:
+        engine (AsyncEngine): The engine of the migrated database.
+        migrations (list[Migration]): The known migrations ordered by version.
+
+    Methods:
+        applied_versions: Returns the versions already applied.
+        status: Returns every migration with whether it is applied.
+        upgrade: Applies the pending migrations.
+    """
+
+    def __init__(
+        self, engine: AsyncEngine, migrations: list[Migration] | None = None
+    ) -> None:
+        self.engine = engine
+        self.migrations = (
+            discover_migrations() if migrations is None else migrations
+        )
+
+    async def _ensure_version_table(self, conn: AsyncConnection) -> None:
+        await conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INTEGER PRIMARY KEY, "
+                "name VARCHAR NOT NULL, "
+                "applied_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now())"
+            )
+        )
+
+    async def applied_versions(self) -> set[int]:
+        """
+        Returns the versions of the migrations already applied.
+        """
+        async with self.engine.begin() as conn:
+            await self._ensure_version_table(conn)
+            rows = await conn.execute(text("SELECT version FROM schema_migrations"))
+            return {row.version for row in rows}
+
+    async def status(self) -> list[tuple[Migration, bool]]:
+        """
+        Returns every known migration with whether it is applied.
+        """
+        applied = await self.applied_versions()
+        return [
+            (migration, migration.version in applied) for migration in self.migrations
+        ]
+
+    async def _record(self, conn: AsyncConnection, migration: Migration) -> None:
+        await conn.execute(
+            text(
+                "INSERT INTO schema_migrations (version, name) "
+                "VALUES (:version, :name)"
+            ),
+            {"version": migration.version, "name": migration.name},
+        )
+
+    async def _apply(self, migration: Migration) -> None:
+        if migration.transactional:
+            async with self.engine.begin() as conn:
+                await migration.module.upgrade(conn)
+                await self._record(conn, migration)
+            return
+        async with self.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await migration.module.upgrade(conn)
+            await self._record(conn, migration)
+
+    async def upgrade(self) -> list[Migration]:
+        """
+        Applies the pending migrations in version order.
+
+        Running it again once the schema is up to date does nothing, so every
+        instance can run it on startup.
+
+        Returns:
+            list[Migration]: The migrations that were applied.
+        """
+        applied = []
+        async with self.engine.connect() as lock_conn:
+            lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+            await lock_conn.execute(
+                text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID}
+            )
+            try:
+                done = await self.applied_versions()
+                for migration in self.migrations:
+                    if migration.version in done:
+                        continue
+                    logging.info("Applying migration {}".format(migration.name))
+                    await self._apply(migration)
+                    applied.append(migration)
+            finally:
+                await lock_conn.execute(
+                    text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID}
+                )
+        logging.info(
+            "Schema is up to date, applied {} migrations".format(len(applied))
+        )
+        return applied
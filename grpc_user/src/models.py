@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, func, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -10,13 +10,51 @@ class Base(DeclarativeBase):
 
 class User(Base):
     __tablename__ = "users"
+    # Usernames and emails are unique among users that are not deleted, and
+    # lookups by them only ever search those users. The other indexes serve
+    # the admin listing, see the migration adding them.
+    __table_args__ = (
+        Index(
+            "ix_users_username_active",
+            "username",
+            unique=True,
+            postgresql_where=text("NOT deleted"),
+        ),
+        Index(
+            "ix_users_email_active",
+            "email",
+            unique=True,
+            postgresql_where=text("NOT deleted"),
+        ),
+        Index(
+            "ix_users_role_id_active",
+            "role",
+            "id",
+            postgresql_where=text("NOT deleted"),
+        ),
+        Index("ix_users_id_deleted", "id", postgresql_where=text("deleted")),
+        Index(
+            "ix_users_username_prefix",
+            "username",
+            postgresql_ops={"username": "text_pattern_ops"},
+            postgresql_where=text("NOT deleted"),
+        ),
+        Index(
+            "ix_users_email_prefix",
+            "email",
+            postgresql_ops={"email": "text_pattern_ops"},
+            postgresql_where=text("NOT deleted"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     username: Mapped[str] = mapped_column()
     role: Mapped[str] = mapped_column(server_default="user")
     email: Mapped[str] = mapped_column()
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), onupdate=func.now()
+    )
     deleted: Mapped[bool] = mapped_column(server_default="false")
 
     password = relationship("Password", back_populates="user", uselist=False)
@@ -26,8 +64,11 @@ class Password(Base):
     __tablename__ = "passwords"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
-    md5_password: Mapped[str] = mapped_column()
-    sha256_password: Mapped[str] = mapped_column()
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id"), unique=True, index=True
+    )
+    password_hash: Mapped[str | None] = mapped_column()
+    md5_password: Mapped[str | None] = mapped_column()
+    sha256_password: Mapped[str | None] = mapped_column()
 
     user = relationship("User", back_populates="password")
@@ -1,4 +1,26 @@
+import asyncio
+import base64
 import hashlib
+import hmac
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+"""
+This module contains the hashing of user passwords.
+
+Passwords are hashed with scrypt, a salted and memory-hard key derivation
+function. Hashes are stored as `scrypt$<n>$<r>$<p>$<salt>$<key>`, so that the
+cost parameters can be raised later without invalidating existing hashes.
+Passwords stored by earlier versions as unsalted MD5 and SHA-256 digests are
+still accepted and are replaced by scrypt hashes on the next successful login.
+"""
+
+SCRYPT_N = 2**14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_SIZE = 16
+KEY_SIZE = 32
 
 
 class Hasher:
@@ -6,7 +28,8 @@ class Hasher:
     Class for hashing passwords.
 
     This class provides static methods for hashing passwords in different
-    formats. The currently supported formats are MD5 and SHA-256.
+    formats. New passwords are hashed with scrypt, MD5 and SHA-256 are only
+    kept to check passwords stored before scrypt was introduced.
 
     """
 
@@ -39,3 +62,221 @@ class Hasher:
         sha256_hash = hashlib.sha256()
         sha256_hash.update(password.encode("utf-8"))
         return sha256_hash.hexdigest()
+
+    @staticmethod
+    def hash_scrypt(
+        password: str, n: int = SCRYPT_N, r: int = SCRYPT_R, p: int = SCRYPT_P
+    ) -> str:
+        """
+        Generates a salted scrypt hash for a given password.
+
+        Args:
+            password (str): The password to be hashed.
+            n (int): The CPU and memory cost, a power of two.
+            r (int): The block size.
+            p (int): The parallelization factor.
+
+        Returns:
+            str: The encoded scrypt hash, including its parameters and salt.
+        """
+        salt = os.urandom(SALT_SIZE)
+        key = hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=256 * n * r,
+            dklen=KEY_SIZE,
+        )
+        return "scrypt${}${}${}${}${}".format(
+            n,
+            r,
+            p,
+            base64.b64encode(salt).decode(),
+            base64.b64encode(key).decode(),
+        )
+
+    @staticmethod
+    def verify_scrypt(password: str, encoded: str) -> bool:
+        """
+        Checks a password against an encoded scrypt hash.
+
+        Args:
+            password (str): The password to be checked.
+            encoded (str): The hash returned by `hash_scrypt`.
+
+        Returns:
+            bool: Whether the password matches the hash.
+        """
+        try:
+            algorithm, n, r, p, salt, key = encoded.split("$")
+        except ValueError:
+            return False
+        if algorithm != "scrypt":
+            return False
+        expected = base64.b64decode(key)
+        actual = hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=base64.b64decode(salt),
+            n=int(n),
+            r=int(r),
+            p=int(p),
+            maxmem=256 * int(n) * int(r),
+            dklen=len(expected),
+        )
+        return hmac.compare_digest(actual, expected)
+
+    @staticmethod
+    def needs_rehash(
+        encoded: str, n: int = SCRYPT_N, r: int = SCRYPT_R, p: int = SCRYPT_P
+    ) -> bool:
+        """
+        Checks whether an encoded scrypt hash was made with other parameters.
+
+        Args:
+            encoded (str): The hash returned by `hash_scrypt`.
+            n (int): The current CPU and memory cost.
+            r (int): The current block size.
+            p (int): The current parallelization factor.
+
+        Returns:
+            bool: Whether the password should be hashed again.
+        """
+        return not encoded.startswith("scrypt${}${}${}$".format(n, r, p))
+
+
+def _verify(
+    password: str,
+    password_hash: str | None,
+    md5_password: str | None,
+    sha256_password: str | None,
+    n: int,
+) -> tuple[bool, str | None]:
+    # Runs in a worker process: checks the password against whichever hash is
+    # stored and returns a new hash if the stored one has to be upgraded.
+    if password_hash:
+        if not Hasher.verify_scrypt(password, password_hash):
+            return False, None
+        if Hasher.needs_rehash(password_hash, n=n):
+            return True, Hasher.hash_scrypt(password, n=n)
+        return True, None
+    legacy_match = (
+        md5_password is not None
+        and hmac.compare_digest(md5_password, Hasher.hash_md5(password))
+    ) or (
+        sha256_password is not None
+        and hmac.compare_digest(sha256_password, Hasher.hash_sha256(password))
+    )
+    if not legacy_match:
+        return False, None
+    return True, Hasher.hash_scrypt(password, n=n)
+
+
+def _hash_all(passwords: list[str], n: int) -> list[str]:
+    # Runs in a worker process: hashes a chunk of passwords in one call, so a
+    # bulk import pays one round trip to the pool per chunk, not per password.
+    return [Hasher.hash_scrypt(password, n=n) for password in passwords]
+
+
+class PasswordHasher:
+    """
+    Hashes and checks passwords in a pool of worker processes.
+
+    scrypt takes tens of milliseconds of CPU per password on purpose, so it
+    runs in a bounded process pool instead of on the event loop, which keeps
+    serving other requests meanwhile. Calls beyond the number of workers wait
+    in the pool's queue.
+
+    Attributes:
+        workers (int): The number of worker processes, the maximum number of passwords hashed at once.
+        n (int): The scrypt CPU and memory cost of new hashes.
+
+    Methods:
+        hash: Hashes a new password.
+        hash_many: Hashes many new passwords across all workers.
+        verify: Checks a password against the stored hashes.
+        shutdown: Stops the worker processes.
+    """
+
+    def __init__(self, workers: int, n: int = SCRYPT_N) -> None:
+        self.workers = workers
+        self.n = n
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        logging.info("Password hashing runs in {} worker processes".format(workers))
+
+    async def hash(self, password: str) -> str:
+        """
+        Hashes a new password.
+
+        Args:
+            password (str): The password to be hashed.
+
+        Returns:
+            str: The encoded scrypt hash.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, Hasher.hash_scrypt, password, self.n
+        )
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """
+        Hashes many new passwords, split into one chunk per worker process.
+
+        Args:
+            passwords (list[str]): The passwords to be hashed.
+
+        Returns:
+            list[str]: The encoded scrypt hashes in the order of the passwords.
+        """
+        loop = asyncio.get_running_loop()
+        chunk_size = -(-len(passwords) // self.workers)
+        chunks = [
+            passwords[i : i + chunk_size]
+            for i in range(0, len(passwords), chunk_size or 1)
+        ]
+        hashed = await asyncio.gather(
+            *(
+                loop.run_in_executor(self._executor, _hash_all, chunk, self.n)
+                for chunk in chunks
+            )
+        )
+        return [password_hash for chunk in hashed for password_hash in chunk]
+
+    async def verify(
+        self,
+        password: str,
+        password_hash: str | None,
+        md5_password: str | None = None,
+        sha256_password: str | None = None,
+    ) -> tuple[bool, str | None]:
+        """
+        Checks a password against the stored hashes.
+
+        Args:
+            password (str): The password to be checked.
+            password_hash (str or None): The stored scrypt hash.
+            md5_password (str or None): The stored legacy MD5 hash.
+            sha256_password (str or None): The stored legacy SHA-256 hash.
+
+        Returns:
+            tuple[bool, str or None]: Whether the password matches, and a new scrypt hash to store
+            if the stored hash is a legacy one or uses outdated parameters.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            _verify,
+            password,
+            password_hash,
+            md5_password,
+            sha256_password,
+            self.n,
+        )
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker processes.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
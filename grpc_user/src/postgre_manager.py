@@ -1,39 +1,390 @@
+import bisect
+import itertools
 import logging
+import re
+import statistics
+import time
+import uuid
+from collections import deque
+from typing import Callable, Hashable
 
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from grpc_user.src.config import config
-from grpc_user.src.models import Base
+from grpc_user.src.migration_runner import MigrationRunner
+
+
+class PoolMetrics:
+    """
+    Counters of connection checkouts from the pool.
+
+    Attributes:
+        checkouts (int): The number of connections handed out.
+        timeouts (int): The number of checkouts that gave up waiting for a connection.
+        max_wait (float): The longest checkout in seconds.
+    """
+
+    def __init__(self, samples: int = 1024) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_wait = 0.0
+        self._waits = deque(maxlen=samples)
+
+    def record(self, wait: float) -> None:
+        self.checkouts += 1
+        self.max_wait = max(self.max_wait, wait)
+        self._waits.append(wait)
+
+    def stats(self) -> dict[str, float]:
+        """
+        Returns the checkout counters and the latency percentiles of recent checkouts.
+        """
+        waits = sorted(self._waits)
+        if len(waits) > 1:
+            percentiles = statistics.quantiles(waits, n=100, method="inclusive")
+            p50, p99 = percentiles[49], percentiles[98]
+        else:
+            p50 = p99 = waits[0] if waits else 0.0
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_p50_ms": p50 * 1000,
+            "wait_p99_ms": p99 * 1000,
+            "wait_max_ms": self.max_wait * 1000,
+        }
+
+
+# Upper bounds of the statement latency histogram buckets in milliseconds; the
+# last bucket holds everything slower.
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|(?<![$\w])\d+(?:\.\d+)?\b")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Reduces a SQL statement to its shape, so that its executions aggregate together.
+
+    Whitespace is collapsed and inline literals are replaced by `?`. Bound
+    parameters like `$1` are kept as they are.
+
+    Args:
+        statement (str): The SQL statement as sent to the database.
+
+    Returns:
+        str: The normalized statement.
+    """
+    statement = LITERAL_PATTERN.sub("?", statement)
+    return WHITESPACE_PATTERN.sub(" ", statement).strip()
+
+
+class StatementStats:
+    """
+    Latency histogram of one normalized statement.
+
+    Attributes:
+        count (int): The number of executions.
+        total (float): The total execution time in milliseconds.
+        max (float): The longest execution in milliseconds.
+        buckets (list[int]): The number of executions per latency bucket.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total += elapsed_ms
+        self.max = max(self.max, elapsed_ms)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Estimates a latency percentile as the upper bound of the bucket holding it.
+
+        Args:
+            fraction (float): The percentile as a fraction, e.g. 0.99.
+
+        Returns:
+            float: The estimated latency in milliseconds, at most the longest execution.
+        """
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                if index < len(LATENCY_BUCKETS_MS):
+                    return min(LATENCY_BUCKETS_MS[index], self.max)
+                return self.max
+        return self.max
+
+
+class QueryStats:
+    """
+    Times every statement executed by the attached engines.
+
+    Executions are aggregated per normalized statement into latency
+    histograms, and statements slower than the threshold are logged without
+    their parameters. Once `max_statements` distinct statements are tracked,
+    any further ones are aggregated under "<other>".
+
+    Attributes:
+        slow_query_ms (float): The execution time above which a statement is logged, in milliseconds.
+        max_statements (int): The maximum number of distinct statements tracked.
+        slow_queries (int): The number of statements logged as slow.
+        statements (dict[str, StatementStats]): The histograms by normalized statement.
+
+    Methods:
+        attach: Starts timing the statements of an engine.
+        record: Records one execution of a statement.
+    """
+
+    def __init__(self, slow_query_ms: float, max_statements: int = 500) -> None:
+        self.slow_query_ms = slow_query_ms
+        self.max_statements = max_statements
+        self.slow_queries = 0
+        self.statements: dict[str, StatementStats] = {}
+
+    def attach(self, engine: AsyncEngine) -> None:
+        """
+        Starts timing the statements of an engine.
+
+        Args:
+            engine (AsyncEngine): The engine to time.
+        """
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after)
+
+    # The start time is kept on the execution context, which is dropped with
+    # the statement: `after_cursor_execute` does not fire when it raises.
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is not None:
+            self.record(statement, (time.perf_counter() - start) * 1000)
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        """
+        Records one execution of a statement.
+
+        Args:
+            statement (str): The SQL statement as sent to the database.
+            elapsed_ms (float): The execution time in milliseconds.
+        """
+        normalized = normalize_statement(statement)
+        stats = self.statements.get(normalized)
+        if stats is None:
+            if len(self.statements) >= self.max_statements:
+                normalized = "<other>"
+            stats = self.statements.setdefault(normalized, StatementStats())
+        stats.record(elapsed_ms)
+        if elapsed_ms >= self.slow_query_ms:
+            self.slow_queries += 1
+            logging.warning(
+                "Slow query ({:.1f} ms): {}".format(elapsed_ms, normalized[:1000])
+            )
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Connection pool that measures how long checkouts wait for a connection.
+
+    Attributes:
+        metrics (PoolMetrics): The checkout counters, kept when the pool is recreated.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self) -> "InstrumentedPool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
 
 
 class DatabaseManager:
     """
     Class responsible for managing the connection to the PostgreSQL database.
 
+    Writes always go to the primary. Reads that tolerate replication lag go
+    round-robin to the read replicas, if any, except for keys written within
+    the read-your-writes window, which are read from the primary until the
+    replicas have caught up. The window is tracked per instance.
+
     Attributes:
         url (str): The URL of the PostgreSQL database.
+        replica_urls (list[str]): The URLs of the read replicas.
+        read_your_writes_window (float): How long reads of a written key stay on the primary, in seconds.
         engine (sqlalchemy.ext.asyncio.AsyncEngine): The SQLAlchemy engine object.
+        replica_engines (list[sqlalchemy.ext.asyncio.AsyncEngine]): The engines of the read replicas.
+        query_stats (QueryStats): The timings of the statements run on all engines.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        replica_hosts: list[str] | None = None,
+        read_your_writes_window: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         username = config.POSTGRES_USERNAME
         password = config.POSTGRES_PASSWORD
         url = config.POSTGRES_URL
         db_name = config.POSTGRES_DB_NAME
         DSN_URL = f"postgresql+asyncpg://{username}:{password}@{url}/{db_name}"
         self.url = DSN_URL
+        if replica_hosts is None:
+            replica_hosts = [
+                host.strip()
+                for host in config.POSTGRES_REPLICA_URLS.split(",")
+                if host.strip()
+            ]
+        self.replica_urls = [
+            f"postgresql+asyncpg://{username}:{password}@{host}/{db_name}"
+            for host in replica_hosts
+        ]
+        if read_your_writes_window is None:
+            read_your_writes_window = float(config.POSTGRES_READ_YOUR_WRITES_SECONDS)
+        self.read_your_writes_window = read_your_writes_window
+        self.replica_engines = []
+        self.query_stats = QueryStats(
+            float(config.POSTGRES_SLOW_QUERY_MS),
+            int(config.POSTGRES_QUERY_STATS_MAX_STATEMENTS),
+        )
+        self._clock = clock
+        self._written: dict[Hashable, float] = {}
+
+    @staticmethod
+    def _create_engine(url: str) -> AsyncEngine:
+        if config.POSTGRES_PGBOUNCER_MODE.lower() == "true":
+            connect_args = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: "__asyncpg_{}__".format(
+                    uuid.uuid4()
+                ),
+            }
+        else:
+            connect_args = {
+                "prepared_statement_cache_size": int(
+                    config.POSTGRES_STATEMENT_CACHE_SIZE
+                ),
+            }
+        return create_async_engine(
+            url=url,
+            echo=config.POSTGRES_ECHO.lower() == "true",
+            poolclass=InstrumentedPool,
+            pool_size=int(config.POSTGRES_POOL_SIZE),
+            max_overflow=int(config.POSTGRES_MAX_OVERFLOW),
+            pool_timeout=float(config.POSTGRES_POOL_TIMEOUT_SECONDS),
+            pool_recycle=int(config.POSTGRES_POOL_RECYCLE_SECONDS),
+            connect_args=connect_args,
+        )
 
     async def connect(self) -> None:
         """
         Establishes a connection to the PostgreSQL database using the config URL.
 
         This method creates an asynchronous engine and session maker, and logs a success message upon completion.
+        In PgBouncer mode, prepared statements are neither cached nor reused by
+        name, since consecutive transactions may run on different server
+        connections. Migrations hold a session-level advisory lock, so they
+        should run against PostgreSQL directly rather than through PgBouncer.
         """
-        self.engine = create_async_engine(
-            url=self.url, echo=True, pool_size=5, max_overflow=10
-        )
+        self.engine = self._create_engine(self.url)
         self.get_session = async_sessionmaker(self.engine)
-        logging.info("Succesfully connected to PGSQL Database!")
+        self.replica_engines = [self._create_engine(url) for url in self.replica_urls]
+        for engine in [self.engine, *self.replica_engines]:
+            self.query_stats.attach(engine)
+        self._replica_sessions = itertools.cycle(
+            [async_sessionmaker(engine) for engine in self.replica_engines]
+        )
+        logging.info(
+            "Succesfully connected to PGSQL Database with {} read replicas!".format(
+                len(self.replica_engines)
+            )
+        )
+
+    def mark_written(self, *keys: Hashable) -> None:
+        """
+        Keeps reads of the given keys on the primary for the read-your-writes window.
+
+        Args:
+            keys (Hashable): The written keys, such as a user ID or username.
+        """
+        now = self._clock()
+        if len(self._written) > 10_000:
+            self._written = {
+                key: until for key, until in self._written.items() if until > now
+            }
+        for key in keys:
+            self._written[key] = now + self.read_your_writes_window
+
+    def get_read_session(self, *keys: Hashable) -> AsyncSession:
+        """
+        Returns a session for a read that may be served by a replica.
+
+        Args:
+            keys (Hashable): The keys the read is about, to honour recent writes of them.
+
+        Returns:
+            AsyncSession: A session on the next replica, or on the primary if there are no
+            replicas or one of the keys was written within the read-your-writes window.
+        """
+        if not self.replica_engines:
+            return self.get_session()
+        now = self._clock()
+        if any(self._written.get(key, 0.0) > now for key in keys):
+            return self.get_session()
+        return next(self._replica_sessions)()
+
+    @staticmethod
+    def _engine_pool_stats(engine: AsyncEngine) -> dict[str, float]:
+        pool = engine.pool
+        return {
+            "size": pool.size(),
+            "in_use": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "idle": pool.checkedin(),
+            **pool.metrics.stats(),
+        }
+
+    def pool_stats(self) -> dict[str, float]:
+        """
+        Returns the state of the connection pools and their checkout counters.
+
+        Returns:
+            dict[str, float]: The pool size, connections in use, overflow, idle connections and checkout metrics
+            of the primary, and the same prefixed with "replica<index>." for every read replica.
+        """
+        stats = self._engine_pool_stats(self.engine)
+        for index, engine in enumerate(self.replica_engines):
+            for name, value in self._engine_pool_stats(engine).items():
+                stats["replica{}.{}".format(index, name)] = value
+        return stats
 
     async def shutdown(self) -> None:
         """
@@ -42,13 +393,12 @@ class DatabaseManager:
         This method disposes of the SQLAlchemy engine and logs a success message upon completion.
         """
         await self.engine.dispose()
+        for engine in self.replica_engines:
+            await engine.dispose()
         logging.info("Connection to PGSQL Database was closed")
 
-    async def initialize_schema(self) -> None:
+    async def migrate(self) -> None:
         """
-        Initializes the PostgreSQL database schema by dropping all existing tables and recreating them.
+        Brings the PostgreSQL database schema up to date by applying pending migrations.
         """
-        async with self.engine.begin() as conn:
-            await conn.run_sync(Base.metadata.drop_all)
-            await conn.run_sync(Base.metadata.create_all)
-        logging.info("Successfully innitialized schema!")
+        await MigrationRunner(self.engine).upgrade()
@@ -0,0 +1,175 @@
+from functools import lru_cache
+
+from sqlalchemy import (
+    Integer,
+    Select,
+    String,
+    any_,
+    bindparam,
+    exists,
+    func,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from grpc_user.src.models import Password, User
+
+"""
+This module contains the statements of the hot lookup paths of the user service.
+
+The statements are built once with bound parameters instead of on every call,
+so SQLAlchemy reuses their compiled form and asyncpg reuses the statement it
+prepared on each connection. They select only the columns that are returned,
+which the indexes on `users.username` and `passwords.user_id` answer without
+loading full rows into ORM objects. Soft-deleted users are excluded everywhere,
+and writes are single `UPDATE ... RETURNING` statements, one round trip each.
+"""
+
+# `users.id` is a SERIAL, a 32-bit integer.
+MAX_USER_ID = 2**31 - 1
+
+
+def parse_user_id(value: str) -> int | None:
+    """
+    Parses a user ID received from a client.
+
+    Args:
+        value (str): The ID as a string of ASCII digits.
+
+    Returns:
+        int or None: The ID, or None if it is malformed or out of the range of `users.id`.
+    """
+    # `isdigit` alone accepts characters like "²" that `int` rejects.
+    if not (value.isascii() and value.isdigit()):
+        return None
+    user_id = int(value)
+    return user_id if user_id <= MAX_USER_ID else None
+
+
+GET_USER = select(User.id, User.username, User.email, User.role).where(
+    User.id == bindparam("user_id"), ~User.deleted
+)
+
+# `= ANY` of an array keeps one statement text for batches of any size, where
+# an expanded IN list would prepare a new statement per batch size.
+GET_USERS = select(User.id, User.username, User.email, User.role).where(
+    User.id == any_(bindparam("user_ids", type_=ARRAY(Integer))),
+    ~User.deleted,
+)
+
+GET_CREDENTIALS = (
+    select(
+        User.id,
+        User.role,
+        Password.password_hash,
+        Password.md5_password,
+        Password.sha256_password,
+    )
+    .join(Password, Password.user_id == User.id)
+    .where(User.username == bindparam("username"), ~User.deleted)
+)
+
+USERNAME_TAKEN = select(
+    exists().where(User.username == bindparam("username"), ~User.deleted)
+)
+
+EMAIL_TAKEN = select(exists().where(User.email == bindparam("email"), ~User.deleted))
+
+ACTIVE_NAMES = select(User.username, User.email).where(~User.deleted)
+
+# Fields passed as None keep their value, so one statement serves any subset
+# of updated fields. The locked subquery returns the username and email the
+# update replaced, which a plain RETURNING only sees after the update.
+_UPDATED_USER = (
+    select(User.id, User.username, User.email)
+    .where(User.id == bindparam("user_id"), ~User.deleted)
+    .with_for_update()
+    .subquery("old")
+)
+
+UPDATE_USER = (
+    update(User)
+    .where(User.id == _UPDATED_USER.c.id)
+    .values(
+        username=func.coalesce(bindparam("new_username", type_=String), User.username),
+        email=func.coalesce(bindparam("new_email", type_=String), User.email),
+        role=func.coalesce(bindparam("new_role", type_=String), User.role),
+        updated_at=func.now(),
+    )
+    .returning(
+        User.id,
+        User.username,
+        User.email,
+        _UPDATED_USER.c.username.label("old_username"),
+        _UPDATED_USER.c.email.label("old_email"),
+    )
+)
+
+DELETE_USER = (
+    update(User)
+    .where(User.id == bindparam("user_id"), ~User.deleted)
+    .values(deleted=True, updated_at=func.now())
+    .returning(User.id, User.username, User.email)
+)
+
+
+def prefix_range(prefix: str) -> tuple[str, str | None]:
+    """
+    Returns the bounds of the strings starting with `prefix` in code point order.
+
+    Args:
+        prefix (str): The searched prefix.
+
+    Returns:
+        tuple[str, str or None]: The inclusive lower and the exclusive upper bound,
+        which is None if no string is greater than all strings with the prefix.
+    """
+    upper = prefix
+    while upper:
+        code_point = ord(upper[-1]) + 1
+        if 0xD800 <= code_point <= 0xDFFF:
+            # Surrogates cannot be encoded, the next code point follows them.
+            code_point = 0xE000
+        if code_point <= 0x10FFFF:
+            return prefix, upper[:-1] + chr(code_point)
+        upper = upper[:-1]
+    return prefix, None
+
+
+# Conditions of the optional filters of the user listing, by parameter name.
+# Prefixes are searched as ranges with the operators of `text_pattern_ops`,
+# which prepared statements use with bound values; a bound `LIKE` pattern
+# loses the index once PostgreSQL switches the statement to a generic plan.
+LIST_USERS_FILTERS = {
+    "role": lambda value: User.role == value,
+    "username_from": lambda value: User.username.op("~>=~")(value),
+    "username_to": lambda value: User.username.op("~<~")(value),
+    "email_from": lambda value: User.email.op("~>=~")(value),
+    "email_to": lambda value: User.email.op("~<~")(value),
+}
+
+
+@lru_cache(maxsize=None)
+def list_users_query(deleted: bool, filters: frozenset[str]) -> Select:
+    """
+    Builds the statement listing a page of users after a given ID.
+
+    Filters are part of the statement rather than optional parameters, so each
+    combination gets a plan that uses its index, and the deleted flag is a
+    literal so that the partial indexes match.
+
+    Args:
+        deleted (bool): Whether to list deleted users instead of active ones.
+        filters (frozenset[str]): The names of the `LIST_USERS_FILTERS` to apply, also their parameters.
+
+    Returns:
+        Select: The statement, taking the `after_id` and `limit` parameters and those of the filters.
+    """
+    query = select(User.id, User.username, User.email, User.role).where(
+        User.deleted if deleted else ~User.deleted,
+        User.id > bindparam("after_id", type_=Integer),
+    )
+    for name in sorted(filters):
+        query = query.where(LIST_USERS_FILTERS[name](bindparam(name, type_=String)))
+    return query.order_by(User.id).limit(bindparam("limit", type_=Integer))
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 import grpc
@@ -17,7 +18,8 @@ async def serve() -> None:
     server = grpc.aio.server()
     user_servicer = UserServicer()
     await user_servicer.db_manager.connect()
-    await user_servicer.db_manager.initialize_schema()
+    if config.MIGRATE_ON_STARTUP.lower() == "true":
+        await user_servicer.db_manager.migrate()
 
     user_pb2_grpc.add_UserServiceServicer_to_server(user_servicer, server)
 
@@ -31,4 +33,11 @@ async def serve() -> None:
     server.add_insecure_port(listen_addr)
     logging.info(f"Starting user server on {listen_addr}")
     await server.start()
-    await server.wait_for_termination()
+    availability_task = asyncio.create_task(user_servicer.maintain_availability())
+    try:
+        await server.wait_for_termination()
+    finally:
+        availability_task.cancel()
+        user_servicer.password_hasher.shutdown()
+        await user_servicer.cache.close()
+        await user_servicer.availability.close()
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from redis import asyncio as aioredis
+
+"""
+This module contains the read-through cache of user profiles.
+
+Profiles are cached in process for a few seconds and, if configured, in Redis
+for longer, so that instances of the user service share their loads. Writes
+drop the profile from both tiers. Other instances may still serve their local
+copy until it expires, which is why the local time to live is kept short.
+
+In Redis, a write replaces the profile with a short-lived tombstone instead of
+deleting it, and loads store their result only if the key is absent. An
+instance that read the profile before a write on another instance, possibly
+from a lagging replica, therefore cannot put its stale copy back. A load that
+outlives the tombstone still could, so the tombstone has to outlast the
+slowest load and the replica lag.
+"""
+
+REDIS_KEY_PREFIX = "user:"
+# Value of a profile invalidated by a write; never valid JSON of a profile.
+TOMBSTONE = b"invalidated"
+
+
+class UserCache:
+    """
+    Two-tier read-through cache of user profiles.
+
+    The local tier evicts entries in least-recently-used order once it is full
+    and expires them after a fixed time to live. Concurrent misses on the same
+    user share a single load, which first asks Redis and then the database.
+    Redis failures are logged and the profile is loaded from the database, so
+    the cache never makes a lookup fail.
+
+    Attributes:
+        max_size (int): The maximum number of profiles cached in process.
+        ttl (float): The time to live of a local entry in seconds.
+        redis (aioredis.Redis or None): The client of the shared tier, if any.
+        redis_ttl (int): The time to live of a Redis entry in seconds.
+        tombstone_ttl (int): The time in seconds during which a write keeps loads from storing the profile in Redis.
+        hits (int): The number of lookups served from the local tier.
+        misses (int): The number of lookups that missed the local tier.
+        coalesced (int): The number of misses that waited for a load already in flight.
+        redis_hits (int): The number of loads served from Redis.
+        redis_errors (int): The number of failed Redis calls.
+        loads (int): The number of loads that went to the database.
+        evictions (int): The number of local entries dropped because the cache was full.
+        expirations (int): The number of local entries dropped because they were too old.
+        invalidations (int): The number of profiles dropped by writes.
+
+    Methods:
+        get: Returns a cached profile or loads it.
+        invalidate: Drops a profile from both tiers.
+        close: Closes the Redis connection.
+        stats: Returns the cache counters.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        redis: aioredis.Redis | None = None,
+        redis_ttl: int = 60,
+        tombstone_ttl: int = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis = redis
+        self.redis_ttl = redis_ttl
+        self.tombstone_ttl = tombstone_ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._loads: dict[str, asyncio.Future] = {}
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.redis_hits = 0
+        self.redis_errors = 0
+        self.loads = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_url(
+        cls,
+        max_size: int,
+        ttl: float,
+        redis_url: str,
+        redis_ttl: int,
+        tombstone_ttl: int = 30,
+    ) -> "UserCache":
+        """
+        Creates a cache with a Redis tier at `redis_url`, or a local one if the URL is empty.
+        """
+        redis = aioredis.Redis.from_url(redis_url) if redis_url else None
+        return cls(
+            max_size,
+            ttl,
+            redis=redis,
+            redis_ttl=redis_ttl,
+            tombstone_ttl=tombstone_ttl,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: str) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: str, value: dict) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _load(
+        self, key: str, loader: Callable[[], Awaitable[dict | None]]
+    ) -> dict | None:
+        tombstoned = False
+        if self.redis is not None:
+            try:
+                cached = await self.redis.get(REDIS_KEY_PREFIX + key)
+            except Exception as e:
+                self.redis_errors += 1
+                logging.error("Failed to read user {} from Redis: {}".format(key, e))
+                # Without knowing whether the profile was just written, the
+                # loaded value must not be stored.
+                tombstoned = True
+            else:
+                if cached == TOMBSTONE:
+                    tombstoned = True
+                elif cached is not None:
+                    self.redis_hits += 1
+                    return json.loads(cached)
+
+        version = self._version
+        self.loads += 1
+        value = await loader()
+        # A write during the load may have made the value stale already: on
+        # this instance it bumps the version, on others it sets the tombstone,
+        # which makes the NX write fail.
+        if (
+            value is not None
+            and self.redis is not None
+            and not tombstoned
+            and version == self._version
+        ):
+            try:
+                await self.redis.set(
+                    REDIS_KEY_PREFIX + key,
+                    json.dumps(value),
+                    ex=self.redis_ttl,
+                    nx=True,
+                )
+            except Exception as e:
+                self.redis_errors += 1
+                logging.error("Failed to write user {} to Redis: {}".format(key, e))
+        return value
+
+    async def get(
+        self, key: str, loader: Callable[[], Awaitable[dict | None]]
+    ) -> dict | None:
+        """
+        Returns a cached profile or loads it with `loader`.
+
+        Users that are not found are not cached. If the loader fails, the
+        error is raised to every caller waiting for that load.
+
+        Args:
+            key (str): The ID of the user.
+            loader (Callable): A coroutine function fetching the profile from the database.
+
+        Returns:
+            dict or None: The user profile, or None if the user does not exist.
+        """
+        value = self._lookup(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        load = self._loads.get(key)
+        if load is not None:
+            self.coalesced += 1
+        else:
+            load = asyncio.ensure_future(self._load(key, loader))
+            self._loads[key] = load
+            load.add_done_callback(lambda future: self._finish_load(key, future))
+        # Shielded so that a cancelled caller does not cancel the shared load.
+        return await asyncio.shield(load)
+
+    def _finish_load(self, key: str, load: asyncio.Future) -> None:
+        # A write invalidates the key while the load is in flight by dropping
+        # it from `_loads`; its possibly stale result must not be cached then.
+        if self._loads.get(key) is not load:
+            return
+        del self._loads[key]
+        if load.cancelled() or load.exception() is not None:
+            return
+        if load.result() is not None:
+            self._store(key, load.result())
+
+    async def invalidate(self, key: str) -> None:
+        """
+        Drops a profile from both tiers, including a load in flight for it.
+
+        In Redis, the profile is replaced by a tombstone for `tombstone_ttl`
+        seconds, during which no instance stores it again.
+
+        Args:
+            key (str): The ID of the user.
+        """
+        self._version += 1
+        self._entries.pop(key, None)
+        self._loads.pop(key, None)
+        self.invalidations += 1
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    REDIS_KEY_PREFIX + key, TOMBSTONE, ex=self.tombstone_ttl
+                )
+            except Exception as e:
+                self.redis_errors += 1
+                logging.error("Failed to drop user {} from Redis: {}".format(key, e))
+
+    async def close(self) -> None:
+        """
+        Closes the Redis connection, if any.
+        """
+        if self.redis is not None:
+            await self.redis.aclose()
+
+    def stats(self) -> dict[str, float]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict[str, float]: The counters, current size and hit rates of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "redis_hits": self.redis_hits,
+            "redis_errors": self.redis_errors,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "database_load_rate": self.loads / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,210 @@
+import logging
+import time
+from typing import AsyncIterator
+
+from sqlalchemy import text
+
+from grpc_user.src.availability_filter import AvailabilityFilter
+from grpc_user.src.password_manager import PasswordHasher
+from grpc_user.src.postgre_manager import DatabaseManager
+
+"""
+This module contains the bulk import of user accounts.
+
+Rows are imported in batches. The passwords of a batch are hashed in parallel
+by the password hashing processes, then the batch is copied with `COPY` into a
+temporary staging table and moved into `users` and `passwords` with two
+set-based inserts. Rows whose username or email is taken are skipped and
+reported, so that one conflicting account does not fail its whole batch.
+"""
+
+MAX_REPORTED_ERRORS = 1000
+
+STAGING_TABLE = "import_users"
+
+CREATE_STAGING_TABLE = text(
+    "CREATE TEMPORARY TABLE {} "
+    "(username VARCHAR NOT NULL, email VARCHAR NOT NULL, password_hash VARCHAR NOT NULL) "
+    "ON COMMIT DROP".format(STAGING_TABLE)
+)
+
+# ON CONFLICT DO NOTHING without a target skips rows violating any unique
+# index, including the partial ones on username and email.
+INSERT_STAGED_USERS = text(
+    "WITH inserted AS ("
+    "INSERT INTO users (username, email) "
+    "SELECT username, email FROM {table} "
+    "ON CONFLICT DO NOTHING "
+    "RETURNING id, username), "
+    "passwords_inserted AS ("
+    "INSERT INTO passwords (user_id, password_hash) "
+    "SELECT inserted.id, {table}.password_hash "
+    "FROM inserted JOIN {table} USING (username)) "
+    "SELECT username FROM inserted".format(table=STAGING_TABLE)
+)
+
+
+class ImportRow:
+    """
+    One account to import.
+
+    Attributes:
+        number (int): The position of the row in the import, starting at 1.
+        username (str): The username of the account.
+        email (str): The email of the account.
+        password (str): The password of the account in plain text.
+    """
+
+    def __init__(self, number: int, username: str, email: str, password: str) -> None:
+        self.number = number
+        self.username = username
+        self.email = email
+        self.password = password
+
+
+class ImportReport:
+    """
+    Outcome of an import.
+
+    Attributes:
+        imported (int): The number of accounts created.
+        failed (int): The number of rows that were rejected.
+        errors (list[tuple[int, str, str]]): The row number, username and reason of the first rejected rows.
+        elapsed (float): The duration of the import in seconds.
+    """
+
+    def __init__(self) -> None:
+        self.imported = 0
+        self.failed = 0
+        self.errors: list[tuple[int, str, str]] = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        processed = self.imported + self.failed
+        return processed / self.elapsed if self.elapsed else 0.0
+
+    def reject(self, row: ImportRow, reason: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row.number, row.username, reason))
+
+
+class UserImporter:
+    """
+    Imports user accounts in batches.
+
+    Attributes:
+        db_manager (DatabaseManager): The manager of the database connection.
+        password_hasher (PasswordHasher): The pool of processes hashing passwords.
+        batch_size (int): The number of rows hashed and copied at once.
+        availability (AvailabilityFilter or None): The filters to add the imported usernames and emails to.
+
+    Methods:
+        import_users: Imports a stream of rows.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        password_hasher: PasswordHasher,
+        batch_size: int,
+        availability: AvailabilityFilter | None = None,
+    ) -> None:
+        self.db_manager = db_manager
+        self.password_hasher = password_hasher
+        self.batch_size = batch_size
+        self.availability = availability
+
+    def _validate(self, batch: list[ImportRow], report: ImportReport) -> list[ImportRow]:
+        valid = []
+        usernames, emails = set(), set()
+        for row in batch:
+            if not row.username or not row.email or not row.password:
+                report.reject(row, "Username, email and password are required")
+            elif "@" not in row.email:
+                report.reject(row, "Invalid email")
+            elif row.username in usernames or row.email in emails:
+                report.reject(row, "Duplicate username or email in the import")
+            else:
+                usernames.add(row.username)
+                emails.add(row.email)
+                valid.append(row)
+        return valid
+
+    async def _import_batch(self, rows: list[ImportRow], report: ImportReport) -> None:
+        password_hashes = await self.password_hasher.hash_many(
+            [row.password for row in rows]
+        )
+        async with self.db_manager.get_session() as session:
+            await session.execute(CREATE_STAGING_TABLE)
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                STAGING_TABLE,
+                records=[
+                    (row.username, row.email, password_hash)
+                    for row, password_hash in zip(rows, password_hashes)
+                ],
+                columns=["username", "email", "password_hash"],
+            )
+            inserted = await session.execute(INSERT_STAGED_USERS)
+            inserted_usernames = {result.username for result in inserted}
+            await session.commit()
+
+        report.imported += len(inserted_usernames)
+        for row in rows:
+            if row.username not in inserted_usernames:
+                report.reject(row, "Username or email already exists")
+        if self.availability is not None:
+            await self.availability.publish(
+                [
+                    (row.username, row.email)
+                    for row in rows
+                    if row.username in inserted_usernames
+                ]
+            )
+
+    async def import_users(self, rows: AsyncIterator[ImportRow]) -> ImportReport:
+        """
+        Imports a stream of rows, one batch at a time.
+
+        Progress is logged after every batch. A batch that fails to load, for
+        example because the database is unreachable, is reported as failed
+        and the import goes on with the next one.
+
+        Args:
+            rows (AsyncIterator[ImportRow]): The accounts to import.
+
+        Returns:
+            ImportReport: The numbers of imported and rejected rows and the first errors.
+        """
+        report = ImportReport()
+        start = time.perf_counter()
+
+        async def flush(batch: list[ImportRow]) -> None:
+            valid = self._validate(batch, report)
+            try:
+                if valid:
+                    await self._import_batch(valid, report)
+            except Exception as e:
+                logging.error("Failed to import batch: {}".format(e))
+                for row in valid:
+                    report.reject(row, "Batch failed to load")
+            report.elapsed = time.perf_counter() - start
+            logging.info(
+                "Imported {} users, {} rows rejected, {:.0f} rows/s".format(
+                    report.imported, report.failed, report.rows_per_second
+                )
+            )
+
+        batch = []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+        report.elapsed = time.perf_counter() - start
+        return report
@@ -1,13 +1,70 @@
+import base64
+import binascii
 import logging
 
 import grpc
-from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 
 from grpc_user.proto import user_pb2, user_pb2_grpc
+from grpc_user.src.availability_filter import AvailabilityFilter
+from grpc_user.src.config import config
 from grpc_user.src.models import Password, User
-from grpc_user.src.password_manager import Hasher
-from grpc_user.src.postgre_manager import DatabaseManager
+from grpc_user.src.password_manager import PasswordHasher
+from grpc_user.src.postgre_manager import LATENCY_BUCKETS_MS, DatabaseManager
+from grpc_user.src.queries import (
+    ACTIVE_NAMES,
+    DELETE_USER,
+    EMAIL_TAKEN,
+    GET_CREDENTIALS,
+    GET_USER,
+    GET_USERS,
+    UPDATE_USER,
+    USERNAME_TAKEN,
+    list_users_query,
+    parse_user_id,
+    prefix_range,
+)
+from grpc_user.src.user_cache import UserCache
+from grpc_user.src.user_importer import ImportRow, UserImporter
+
+
+def encode_cursor(user_id: int) -> str:
+    """
+    Encodes the ID of the last user of a page into an opaque cursor.
+
+    Args:
+        user_id (int): The ID of the last user of the page.
+
+    Returns:
+        str: A URL-safe cursor for the next page.
+    """
+    return base64.urlsafe_b64encode(str(user_id).encode()).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor received from the client.
+
+    Returns:
+        int: The ID of the last user of the previous page.
+
+    Raises:
+        ValueError: If the cursor is malformed or its ID is out of the range of `users.id`.
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        user_id = parse_user_id(
+            base64.urlsafe_b64decode(cursor + padding).decode("ascii")
+        )
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if user_id is None:
+        raise ValueError("Invalid cursor")
+    return user_id
 
 
 class UserServicer(user_pb2_grpc.UserServiceServicer):
@@ -18,6 +75,10 @@ class UserServicer(user_pb2_grpc.UserServiceServicer):
 
     Attributes:
         db_manager (DatabaseManager): The manager for handling PostgreSQL-related tasks.
+        password_hasher (PasswordHasher): The pool of processes hashing passwords.
+        cache (UserCache): The read-through cache of user profiles.
+        importer (UserImporter): The bulk importer of user accounts.
+        availability (AvailabilityFilter): The Bloom filters of taken usernames and emails.
 
     Methods:
         CreateUser: Creates a user in the database.
@@ -25,6 +86,12 @@ class UserServicer(user_pb2_grpc.UserServiceServicer):
         UpdateUser: Updates a user in the database.
         DeleteUser: Deletes a user from the database.
         CheckCredentials: Verifies user's credentials.
+        BatchGetUsers: Retrieves several users from the database.
+        GetDiagnostics: Reports user cache, connection pool and query metrics.
+        ImportUsers: Creates users from a stream of rows.
+        ListUsers: Retrieves a page of users, optionally filtered.
+        CheckAvailability: Tells whether a username or email is taken.
+        maintain_availability: Builds the availability filters and rebuilds them periodically.
     """
 
     def _handle_error(self, context: grpc.ServicerContext, error: Exception) -> None:
@@ -39,10 +106,63 @@ class UserServicer(user_pb2_grpc.UserServiceServicer):
         context.set_code(grpc.StatusCode.INTERNAL)
         context.set_details("Failed to perform operation")
 
+    def _already_exists(self, context: grpc.ServicerContext) -> None:
+        """
+        Reports that a username or email is taken by another user.
+
+        Args:
+            context (grpc.ServicerContext): The gRPC service context.
+        """
+        context.set_code(grpc.StatusCode.ALREADY_EXISTS)
+        context.set_details("Username or email already exists")
+
     def __init__(self) -> None:
         self.db_manager = DatabaseManager()
+        self.password_hasher = PasswordHasher(
+            int(config.PASSWORD_HASH_WORKERS), n=int(config.PASSWORD_SCRYPT_N)
+        )
+        self.cache = UserCache.from_url(
+            max_size=int(config.USER_CACHE_SIZE),
+            ttl=float(config.USER_CACHE_TTL_SECONDS),
+            redis_url=config.USER_CACHE_REDIS_URL,
+            redis_ttl=int(config.USER_CACHE_REDIS_TTL_SECONDS),
+            tombstone_ttl=int(config.USER_CACHE_REDIS_TOMBSTONE_SECONDS),
+        )
+        self.availability = AvailabilityFilter.from_url(
+            int(config.USER_AVAILABILITY_CAPACITY),
+            float(config.USER_AVAILABILITY_ERROR_RATE),
+            redis_url=config.USER_AVAILABILITY_REDIS_URL,
+        )
+        self.importer = UserImporter(
+            self.db_manager,
+            self.password_hasher,
+            batch_size=int(config.USERS_IMPORT_BATCH_SIZE),
+            availability=self.availability,
+        )
         logging.info("User Service successfully initialized!")
 
+    async def _load_user(self, user_id: int) -> dict | None:
+        """
+        Loads a user profile from the database.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            dict or None: The ID, username, email and role of the user, or None if the user does not exist.
+        """
+        async with self.db_manager.get_read_session(("user", user_id)) as session:
+            rows = await session.execute(GET_USER, {"user_id": user_id})
+            user = rows.first()
+        if user is None:
+            return None
+        return {
+            "id": str(user.id),
+            "username": user.username,
+            "email": user.email,
+            "role": user.role,
+        }
+
     async def CreateUser(
         self, request: user_pb2.CreateUserRequest, context: grpc.aio.ServicerContext
     ) -> user_pb2.CreateUserResponse:
@@ -57,19 +177,26 @@ class UserServicer(user_pb2_grpc.UserServiceServicer):
             user_pb2.CreateUserResponse: A response containing the ID of the newly created user.
         """
         try:
+            password_hash = await self.password_hasher.hash(request.password)
             async with self.db_manager.get_session() as session:
                 new_user = User(username=request.username, email=request.email)
-                new_password = Password(
-                    md5_password=Hasher.hash_md5(request.password),
-                    sha256_password=Hasher.hash_sha256(request.password),
-                )
+                new_password = Password(password_hash=password_hash)
                 new_user.password = new_password
                 session.add(new_user)
 
                 await session.commit()
                 await session.refresh(new_user)
                 logging.info("User {} successfully created!".format(new_user.id))
+            self.db_manager.mark_written(
+                ("user", new_user.id),
+                ("username", request.username),
+                ("email", request.email),
+            )
+            await self.availability.publish([(request.username, request.email)])
             return user_pb2.CreateUserResponse(user_id=str(new_user.id))
+        except IntegrityError:
+            self._already_exists(context)
+            return user_pb2.CreateUserResponse()
         except Exception as e:
             self._handle_error(context, e)
             return user_pb2.CreateUserResponse()
@@ -78,7 +205,7 @@ class UserServicer(user_pb2_grpc.UserServiceServicer):
         self, request: user_pb2.GetUserRequest, context: grpc.aio.ServicerContext
     ) -> user_pb2.GetUserResponse:
         """
-        Retrieves a user from the database based on the provided user ID.
+        Retrieves a user from the cache or the database based on the provided user ID.
 
         Args:
             request (user_pb2.GetUserRequest): The request containing the user's ID.
@@ -88,25 +215,15 @@ class UserServicer(user_pb2_grpc.UserServiceServicer):
             user_pb2.GetUserResponse: A response containing the user's information if found, otherwise an empty response.
         """
         try:
-            async with self.db_manager.get_session() as session:
-                user = await session.execute(
-                    select(User).where(User.id == int(request.user_id))
-                )
-                user = user.scalars().first()
-
-                if user is None:
-                    context.set_code(grpc.StatusCode.NOT_FOUND)
-                    context.set_details("User not found")
-                    return user_pb2.GetUserResponse()
-
-                response = user_pb2.GetUserResponse(
-                    user=user_pb2.User(
-                        id=str(user.id),
-                        username=user.username,
-                        email=user.email,
-                        role=user.role,
-                    )
-                )
+            user_id = int(request.user_id)
+            user = await self.cache.get(str(user_id), lambda: self._load_user(user_id))
+
+            if user is None:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                context.set_details("User not found")
+                return user_pb2.GetUserResponse()
+
+            response = user_pb2.GetUserResponse(user=user_pb2.User(**user))
             logging.info("User {} successfully received!".format(request.user_id))
             return response
         except Exception as e:
@@ -128,28 +245,41 @@ class UserServicer(user_pb2_grpc.UserServiceServicer):
         """
         try:
             async with self.db_manager.get_session() as session:
-                user = await session.execute(
-                    select(User).where(User.id == int(request.user_id))
+                rows = await session.execute(
+                    UPDATE_USER,
+                    {
+                        "user_id": int(request.user_id),
+                        "new_username": request.updated_user.username or None,
+                        "new_email": request.updated_user.email or None,
+                        "new_role": request.updated_user.role or None,
+                    },
                 )
-                user = user.scalars().first()
-
-                if user is None:
-                    context.set_code(grpc.StatusCode.NOT_FOUND)
-                    context.set_details("User not found")
-                    return user_pb2.UpdateUserResponse(success=False)
-
-                if request.updated_user.username:
-                    user.username = request.updated_user.username
-                if request.updated_user.email:
-                    user.email = request.updated_user.email
-                if request.updated_user.role:
-                    user.role = request.updated_user.role
-
+                updated = rows.first()
                 await session.commit()
-                await session.refresh(user)
+            if updated is not None:
+                # Both the released and the taken names change availability.
+                self.db_manager.mark_written(
+                    ("user", updated.id),
+                    ("username", updated.old_username),
+                    ("username", updated.username),
+                    ("email", updated.old_email),
+                    ("email", updated.email),
+                )
+                await self.availability.publish(
+                    [(request.updated_user.username, request.updated_user.email)]
+                )
+            await self.cache.invalidate(str(int(request.user_id)))
+
+            if updated is None:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                context.set_details("User not found")
+                return user_pb2.UpdateUserResponse(success=False)
 
             logging.info("User {} successfully updated!".format(request.user_id))
             return user_pb2.UpdateUserResponse(success=True)
+        except IntegrityError:
+            self._already_exists(context)
+            return user_pb2.UpdateUserResponse(success=False)
         except Exception as e:
             self._handle_error(context, e)
             return user_pb2.UpdateUserResponse(success=False)
@@ -169,18 +299,24 @@ class UserServicer(user_pb2_grpc.UserServiceServicer):
         """
         try:
             async with self.db_manager.get_session() as session:
-                user = await session.execute(
-                    select(User).where(User.id == int(request.user_id))
+                rows = await session.execute(
+                    DELETE_USER, {"user_id": int(request.user_id)}
+                )
+                deleted = rows.first()
+                await session.commit()
+            if deleted is not None:
+                self.db_manager.mark_written(
+                    ("user", deleted.id),
+                    ("username", deleted.username),
+                    ("email", deleted.email),
                 )
-                user = user.scalars().first()
+            await self.cache.invalidate(str(int(request.user_id)))
 
-                if user is None:
-                    context.set_code(grpc.StatusCode.NOT_FOUND)
-                    context.set_details("User not found")
-                    return user_pb2.DeleteUserResponse(success=False)
+            if deleted is None:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                context.set_details("User not found")
+                return user_pb2.DeleteUserResponse(success=False)
 
-                user.deleted = True
-                await session.commit()
             logging.info("User {} successfully deleted!".format(request.user_id))
             return user_pb2.DeleteUserResponse(success=True)
         except Exception as e:
@@ -200,28 +336,333 @@ class UserServicer(user_pb2_grpc.UserServiceServicer):
             context (grpc.aio.ServicerContext): The gRPC context for the request.
 
         Returns:
-            user_pb2.CheckCredentialsResponse: A response containing the user ID if the credentials are valid, otherwise "-1".
+            user_pb2.CheckCredentialsResponse: A response containing the user ID and role if the credentials are valid, otherwise "-1".
         """
         try:
-            async with self.db_manager.get_session() as session:
-                user = await session.execute(
-                    select(User)
-                    .options(joinedload(User.password))
-                    .where(User.username == request.username)
+            async with self.db_manager.get_read_session(
+                ("username", request.username)
+            ) as session:
+                rows = await session.execute(
+                    GET_CREDENTIALS, {"username": request.username}
                 )
-                user = user.scalars().first()
-
-                if user is None:
-                    return user_pb2.CheckCredentialsResponse(user_id="-1")
-
-                if user.password.md5_password == Hasher.hash_md5(
-                    request.password
-                ) or user.password.sha256_password == Hasher.hash_sha256(
-                    request.password
-                ):
-                    return user_pb2.CheckCredentialsResponse(user_id=str(user.id))
-                else:
-                    return user_pb2.CheckCredentialsResponse(user_id="-1")
+                row = rows.first()
+
+            if row is None:
+                return user_pb2.CheckCredentialsResponse(user_id="-1")
+
+            # The session is closed while the password is hashed, so a slow
+            # hash does not hold a database connection.
+            valid, new_hash = await self.password_hasher.verify(
+                request.password,
+                row.password_hash,
+                row.md5_password,
+                row.sha256_password,
+            )
+            if not valid:
+                return user_pb2.CheckCredentialsResponse(user_id="-1")
+
+            if new_hash is not None:
+                async with self.db_manager.get_session() as session:
+                    await session.execute(
+                        update(Password)
+                        .where(Password.user_id == row.id)
+                        .values(
+                            password_hash=new_hash,
+                            md5_password=None,
+                            sha256_password=None,
+                        )
+                    )
+                    await session.commit()
+                logging.info("Password hash of user {} upgraded".format(row.id))
+            return user_pb2.CheckCredentialsResponse(
+                user_id=str(row.id), role=row.role
+            )
         except Exception as e:
             self._handle_error(context, e)
             return user_pb2.CheckCredentialsResponse(user_id="-1")
+
+    async def BatchGetUsers(
+        self,
+        request: user_pb2.BatchGetUsersRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> user_pb2.BatchGetUsersResponse:
+        """
+        Retrieves several users from the database with a single query.
+
+        Results follow the order of the requested IDs. IDs that are malformed
+        or do not exist are reported as not found instead of failing the batch.
+
+        Args:
+            request (user_pb2.BatchGetUsersRequest): The request containing the users' IDs.
+            context (grpc.aio.ServicerContext): The gRPC service context.
+
+        Returns:
+            user_pb2.BatchGetUsersResponse: One lookup result per requested ID.
+        """
+        max_batch_size = int(config.USERS_MAX_BATCH_SIZE)
+        if len(request.user_ids) > max_batch_size:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(
+                "At most {} IDs can be requested".format(max_batch_size)
+            )
+            return user_pb2.BatchGetUsersResponse()
+
+        user_ids = {parse_user_id(user_id) for user_id in request.user_ids} - {None}
+        try:
+            users_by_id = {}
+            if user_ids:
+                async with self.db_manager.get_read_session(
+                    *(("user", user_id) for user_id in user_ids)
+                ) as session:
+                    rows = await session.execute(
+                        GET_USERS, {"user_ids": list(user_ids)}
+                    )
+                    for row in rows:
+                        users_by_id[str(row.id)] = user_pb2.User(
+                            id=str(row.id),
+                            username=row.username,
+                            email=row.email,
+                            role=row.role,
+                        )
+
+            logging.info(
+                "Found {} of {} requested users".format(
+                    len(users_by_id), len(request.user_ids)
+                )
+            )
+            return user_pb2.BatchGetUsersResponse(
+                results=[
+                    user_pb2.UserLookup(
+                        user_id=user_id, found=True, user=users_by_id[user_id]
+                    )
+                    if user_id in users_by_id
+                    else user_pb2.UserLookup(user_id=user_id, found=False)
+                    for user_id in request.user_ids
+                ]
+            )
+        except Exception as e:
+            self._handle_error(context, e)
+            return user_pb2.BatchGetUsersResponse()
+
+    async def GetDiagnostics(
+        self,
+        request: user_pb2.UserDiagnosticsRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> user_pb2.UserDiagnosticsResponse:
+        """
+        Reports the user cache counters, the state of the connection pools and
+        the latency histograms of the SQL statements, slowest in total first.
+
+        Args:
+            request (user_pb2.UserDiagnosticsRequest): The empty request.
+            context (grpc.aio.ServicerContext): The gRPC service context.
+
+        Returns:
+            user_pb2.UserDiagnosticsResponse: The metrics of the service.
+        """
+        metrics = {
+            "user_cache.{}".format(name): value
+            for name, value in self.cache.stats().items()
+        }
+        metrics.update(
+            {
+                "db_pool.{}".format(name): value
+                for name, value in self.db_manager.pool_stats().items()
+            }
+        )
+        query_stats = self.db_manager.query_stats
+        metrics["queries.slow"] = query_stats.slow_queries
+        metrics.update(
+            {
+                "availability.{}".format(name): value
+                for name, value in self.availability.stats().items()
+            }
+        )
+        queries = [
+            user_pb2.QueryStats(
+                statement=statement,
+                count=stats.count,
+                total_ms=stats.total,
+                max_ms=stats.max,
+                p50_ms=stats.percentile(0.5),
+                p99_ms=stats.percentile(0.99),
+                bucket_bounds_ms=LATENCY_BUCKETS_MS,
+                bucket_counts=stats.buckets,
+            )
+            for statement, stats in sorted(
+                query_stats.statements.items(),
+                key=lambda item: item[1].total,
+                reverse=True,
+            )
+        ]
+        return user_pb2.UserDiagnosticsResponse(metrics=metrics, queries=queries)
+
+    async def ImportUsers(
+        self, request_iterator, context: grpc.aio.ServicerContext
+    ) -> user_pb2.ImportUsersResponse:
+        """
+        Creates users from a stream of rows, hashing and copying them in batches.
+
+        Rejected rows do not fail the import; they are counted and the first
+        ones are returned with the reason.
+
+        Args:
+            request_iterator (AsyncIterator[user_pb2.ImportUserRow]): The stream of rows to import.
+            context (grpc.aio.ServicerContext): The gRPC service context.
+
+        Returns:
+            user_pb2.ImportUsersResponse: The numbers of imported and rejected rows, the rejected rows and the import rate.
+        """
+
+        async def rows():
+            number = 0
+            async for row in request_iterator:
+                number += 1
+                yield ImportRow(number, row.username, row.email, row.password)
+
+        try:
+            report = await self.importer.import_users(rows())
+            return user_pb2.ImportUsersResponse(
+                imported=report.imported,
+                failed=report.failed,
+                errors=[
+                    user_pb2.ImportUserError(row=row, username=username, reason=reason)
+                    for row, username, reason in report.errors
+                ],
+                rows_per_second=report.rows_per_second,
+            )
+        except Exception as e:
+            self._handle_error(context, e)
+            return user_pb2.ImportUsersResponse()
+
+    async def ListUsers(
+        self, request: user_pb2.ListUsersRequest, context: grpc.aio.ServicerContext
+    ) -> user_pb2.ListUsersResponse:
+        """
+        Retrieves a page of users ordered by their ID.
+
+        Pages continue after the last ID of the previous page instead of
+        skipping rows, so deep pages cost the same as the first one.
+
+        Args:
+            request (user_pb2.ListUsersRequest): The request containing the page size, cursor and filters.
+            context (grpc.aio.ServicerContext): The gRPC service context.
+
+        Returns:
+            user_pb2.ListUsersResponse: The page of users and the cursor of the next page.
+        """
+        try:
+            after_id = decode_cursor(request.cursor) if request.cursor else 0
+            if request.page_size < 0:
+                raise ValueError("Page size must not be negative")
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return user_pb2.ListUsersResponse()
+
+        page_size = request.page_size or int(config.USERS_DEFAULT_PAGE_SIZE)
+        page_size = min(page_size, int(config.USERS_MAX_PAGE_SIZE))
+        # One extra user tells whether there is a next page at all.
+        params = {"after_id": after_id, "limit": page_size + 1}
+        if request.role:
+            params["role"] = request.role
+        for field in ("username", "email"):
+            prefix = getattr(request, "{}_prefix".format(field))
+            if prefix:
+                lower, upper = prefix_range(prefix)
+                params["{}_from".format(field)] = lower
+                if upper is not None:
+                    params["{}_to".format(field)] = upper
+        query = list_users_query(
+            request.deleted, frozenset(params) - {"after_id", "limit"}
+        )
+        try:
+            async with self.db_manager.get_read_session() as session:
+                rows = (await session.execute(query, params)).all()
+            next_cursor = ""
+            if len(rows) > page_size:
+                rows = rows[:page_size]
+                next_cursor = encode_cursor(rows[-1].id)
+            return user_pb2.ListUsersResponse(
+                users=[
+                    user_pb2.User(
+                        id=str(row.id),
+                        username=row.username,
+                        email=row.email,
+                        role=row.role,
+                    )
+                    for row in rows
+                ],
+                next_cursor=next_cursor,
+            )
+        except Exception as e:
+            self._handle_error(context, e)
+            return user_pb2.ListUsersResponse()
+
+    async def CheckAvailability(
+        self,
+        request: user_pb2.CheckAvailabilityRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> user_pb2.CheckAvailabilityResponse:
+        """
+        Tells whether a username or email is taken by an active user.
+
+        Values missing from the availability filters are free without a
+        database lookup; only possible hits are looked up.
+
+        Args:
+            request (user_pb2.CheckAvailabilityRequest): The request containing the username and email to check.
+            context (grpc.aio.ServicerContext): The gRPC service context.
+
+        Returns:
+            user_pb2.CheckAvailabilityResponse: Whether the username and the email are taken.
+        """
+        checks = [
+            (field, value, query)
+            for field, value, query in (
+                ("username", request.username, USERNAME_TAKEN),
+                ("email", request.email, EMAIL_TAKEN),
+            )
+            if value and self.availability.might_be_taken(field, value)
+        ]
+        taken = {}
+        try:
+            if checks:
+                async with self.db_manager.get_read_session(
+                    ("username", request.username), ("email", request.email)
+                ) as session:
+                    for field, value, query in checks:
+                        taken[field] = bool(
+                            (await session.execute(query, {field: value})).scalar()
+                        )
+            return user_pb2.CheckAvailabilityResponse(
+                username_taken=taken.get("username", False),
+                email_taken=taken.get("email", False),
+            )
+        except Exception as e:
+            self._handle_error(context, e)
+            return user_pb2.CheckAvailabilityResponse()
+
+    async def _active_names(self):
+        """
+        Streams the username and email of every active user from the database.
+        """
+        async with self.db_manager.get_read_session() as session:
+            rows = await session.stream(
+                ACTIVE_NAMES.execution_options(yield_per=10_000)
+            )
+            async for row in rows:
+                yield row.username, row.email
+
+    async def maintain_availability(self) -> None:
+        """
+        Builds the availability filters and keeps them up to date.
+
+        Rebuilding drops the names of deleted users. Names taken on other
+        instances are received over Redis if configured, and otherwise only
+        picked up by the next rebuild. Until the first build succeeds, every
+        check is looked up.
+        """
+        await self.availability.run(
+            self._active_names, float(config.USER_AVAILABILITY_REFRESH_SECONDS)
+        )
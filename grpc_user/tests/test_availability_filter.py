@@ -0,0 +1,105 @@
+import asyncio
+
+from grpc_user.src.availability_filter import AvailabilityFilter, BloomFilter
+
+async def stream(rows):
+    for row in rows:
+        yield row
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom_filter = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom_filter.add("user{}".format(i))
+    assert all("user{}".format(i) in bloom_filter for i in range(1000))
+    assert bloom_filter.count == 1000
+
+def test_bloom_filter_false_positive_rate_at_capacity():
+    bloom_filter = BloomFilter(10_000, 0.01)
+    for i in range(10_000):
+        bloom_filter.add("user{}".format(i))
+    false_positives = sum("other{}".format(i) in bloom_filter for i in range(10_000))
+    assert false_positives < 200
+    assert bloom_filter.stats()["false_positive_rate"] < 0.02
+
+def test_checks_are_looked_up_until_the_filter_is_built():
+    availability = AvailabilityFilter(100, 0.01)
+    assert availability.might_be_taken("username", "alice")
+    asyncio.run(availability.rebuild(stream([("alice", "alice@example.com")])))
+    assert availability.might_be_taken("username", "alice")
+    assert availability.might_be_taken("email", "alice@example.com")
+    assert not availability.might_be_taken("username", "bob")
+    assert availability.checks == 4 and availability.lookups == 3
+
+def test_users_added_during_a_rebuild_are_kept():
+    availability = AvailabilityFilter(100, 0.01)
+    async def rows():
+        yield "alice", "alice@example.com"
+        availability.add("bob", "bob@example.com")
+        yield "carol", "carol@example.com"
+    asyncio.run(availability.rebuild(rows()))
+    assert all(availability.might_be_taken("username", name) for name in ("alice", "bob", "carol"))
+    assert availability.might_be_taken("email", "bob@example.com")
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def subscribe(self, channel):
+        self.redis.subscribed.append(channel)
+
+    async def get_message(self, ignore_subscribe_messages, timeout):
+        if self.redis.messages:
+            return {"data": self.redis.messages.pop(0)}
+        await asyncio.sleep(0.001)
+        return None
+
+    async def aclose(self):
+        self.redis.closed += 1
+
+class FakeRedis:
+    def __init__(self):
+        self.subscribed, self.messages, self.closed = [], [], 0
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    async def publish(self, channel, message):
+        self.messages.append(message.encode())
+
+def test_names_taken_on_other_instances_are_received():
+    async def run():
+        redis = FakeRedis()
+        local = AvailabilityFilter(100, 0.01, redis=redis)
+        other = AvailabilityFilter(100, 0.01, redis=redis)
+        task = asyncio.ensure_future(local.run(lambda: stream([("alice", "alice@example.com")]), 60))
+        while not local.ready:
+            await asyncio.sleep(0.001)
+        assert not local.might_be_taken("username", "bob")
+        await other.publish([("bob", "bob@example.com"), ("carol", None)])
+        await asyncio.sleep(0.01)
+        taken = [
+            local.might_be_taken("username", "bob"),
+            local.might_be_taken("email", "bob@example.com"),
+            local.might_be_taken("username", "carol"),
+        ]
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return local, redis, taken
+    local, redis, taken = asyncio.run(run())
+    assert all(taken)
+    assert redis.subscribed == ["user_names"] and redis.closed == 1
+    assert not local.ready
+
+def test_filters_stop_answering_when_redis_sync_fails():
+    async def run():
+        availability = AvailabilityFilter(100, 0.01, redis=FakeRedis())
+        availability.redis.messages.append(b"not json")
+        task = asyncio.ensure_future(availability.run(lambda: stream([]), 60, retry_delay=60))
+        await asyncio.sleep(0.01)
+        answered = availability.might_be_taken("username", "alice")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return availability, answered
+    availability, answered = asyncio.run(run())
+    assert answered and not availability.ready
+    assert availability.redis.closed == 1
@@ -0,0 +1,11 @@
+from grpc_user.src.migration_runner import discover_migrations
+
+def test_discover_migrations_in_version_order():
+    migrations = discover_migrations()
+    versions = [migration.version for migration in migrations]
+    assert versions == sorted(versions) == list(range(1, len(versions) + 1))
+    assert all(callable(migration.module.upgrade) for migration in migrations)
+
+def test_concurrent_index_migration_is_not_transactional():
+    migrations = {migration.name: migration for migration in discover_migrations()}
+    assert not migrations["m0003_lookup_indexes"].transactional
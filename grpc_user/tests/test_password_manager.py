@@ -1,5 +1,7 @@
+import asyncio
+
 import pytest
-from grpc_user.src.password_manager import Hasher
+from grpc_user.src.password_manager import Hasher, PasswordHasher
 
 def test_hash_md5():
     password = "test_password"
@@ -25,4 +27,42 @@ def test_hash_md5_none_password():
 def test_hash_sha256_none_password():
     password = None
     with pytest.raises(AttributeError):
-        Hasher.hash_sha256(password)
\ No newline at end of file
+        Hasher.hash_sha256(password)
+
+def test_hash_scrypt_is_salted():
+    first, second = Hasher.hash_scrypt("test_password", n=2**10), Hasher.hash_scrypt("test_password", n=2**10)
+    assert first != second
+    assert Hasher.verify_scrypt("test_password", first)
+    assert not Hasher.verify_scrypt("wrong_password", first)
+
+def test_needs_rehash():
+    encoded = Hasher.hash_scrypt("test_password", n=2**10)
+    assert Hasher.needs_rehash(encoded)
+    assert not Hasher.needs_rehash(encoded, n=2**10)
+
+def test_verify_upgrades_legacy_hash():
+    async def verify():
+        hasher = PasswordHasher(1, n=2**10)
+        try:
+            legacy = await hasher.verify("test_password", None, Hasher.hash_md5("test_password"), None)
+            wrong = await hasher.verify("wrong_password", None, Hasher.hash_md5("test_password"), None)
+            current = await hasher.verify("test_password", legacy[1])
+        finally:
+            hasher.shutdown()
+        return legacy, wrong, current
+
+    (valid, new_hash), wrong, current = asyncio.run(verify())
+    assert valid and Hasher.verify_scrypt("test_password", new_hash)
+    assert wrong == (False, None)
+    assert current == (True, None)
+
+def test_password_hasher_hash_many_keeps_order():
+    async def run():
+        hasher = PasswordHasher(2, n=2**10)
+        try:
+            return await hasher.hash_many(["first", "second", "third"]), await hasher.hash_many([])
+        finally:
+            hasher.shutdown()
+    hashes, empty = asyncio.run(run())
+    assert empty == []
+    assert [Hasher.verify_scrypt(password, password_hash) for password, password_hash in zip(["first", "second", "third"], hashes)] == [True, True, True]
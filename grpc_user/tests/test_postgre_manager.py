@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.util import greenlet_spawn
+
+from grpc_user.src.postgre_manager import DatabaseManager, InstrumentedPool, PoolMetrics, QueryStats
+
+class FakeConnection:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_pool_records_checkouts_and_timeouts():
+    pool = InstrumentedPool(FakeConnection, pool_size=1, max_overflow=0, timeout=0.01)
+
+    def check_out():
+        connection = pool.connect()
+        with pytest.raises(exc.TimeoutError):
+            pool.connect()
+        assert pool.checkedout() == 1
+        connection.close()
+
+    asyncio.run(greenlet_spawn(check_out))
+    stats = pool.metrics.stats()
+    assert stats["checkouts"] == 1 and stats["timeouts"] == 1
+    assert pool.recreate().metrics is pool.metrics
+
+def test_pool_metrics_percentiles():
+    metrics = PoolMetrics()
+    for wait in range(1, 101):
+        metrics.record(wait / 1000)
+    stats = metrics.stats()
+    assert stats["wait_p50_ms"] == pytest.approx(50.5)
+    assert stats["wait_p99_ms"] <= stats["wait_max_ms"] == pytest.approx(100)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_reads_round_robin_over_replicas():
+    manager = DatabaseManager(replica_hosts=["replica1:5432", "replica2:5432"], read_your_writes_window=5)
+    asyncio.run(manager.connect())
+    engines = [manager.get_read_session().bind for _ in range(4)]
+    assert engines == manager.replica_engines * 2
+    assert manager.get_session().bind is manager.engine
+
+def test_read_your_writes_window():
+    clock = FakeClock()
+    manager = DatabaseManager(replica_hosts=["replica1:5432"], read_your_writes_window=5, clock=clock)
+    asyncio.run(manager.connect())
+    manager.mark_written(("user", 1))
+    assert manager.get_read_session(("user", 1)).bind is manager.engine
+    assert manager.get_read_session(("user", 2)).bind is manager.replica_engines[0]
+    clock.now = 6
+    assert manager.get_read_session(("user", 1)).bind is manager.replica_engines[0]
+
+def test_reads_use_primary_without_replicas():
+    manager = DatabaseManager(replica_hosts=[])
+    asyncio.run(manager.connect())
+    assert manager.get_read_session(("user", 1)).bind is manager.engine
+
+def test_query_stats_aggregate_normalized_statements(caplog):
+    query_stats = QueryStats(slow_query_ms=1000)
+    engine = create_engine("sqlite://")
+    query_stats.attach(SimpleNamespace(sync_engine=engine))
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT  2"))
+        conn.execute(text("SELECT 'name'"))
+    assert query_stats.statements["SELECT ?"].count == 3
+    assert query_stats.slow_queries == 0
+
+    with caplog.at_level(logging.WARNING):
+        query_stats.record("SELECT * FROM users WHERE username = 'alice'", 1500)
+    assert query_stats.slow_queries == 1
+    assert "alice" not in caplog.text
+    assert query_stats.statements["SELECT * FROM users WHERE username = ?"].percentile(0.99) == 1500
+
+def test_query_stats_keep_nothing_for_failed_statements():
+    query_stats = QueryStats(slow_query_ms=1000)
+    engine = create_engine("sqlite://")
+    query_stats.attach(SimpleNamespace(sync_engine=engine))
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(exc.OperationalError):
+                conn.execute(text("SELECT * FROM missing"))
+        conn.execute(text("SELECT 1"))
+        assert conn.info == {}
+    assert list(query_stats.statements) == ["SELECT ?"]
@@ -0,0 +1,43 @@
+from sqlalchemy.dialects import postgresql
+
+from grpc_user.src.queries import (
+    MAX_USER_ID,
+    UPDATE_USER,
+    list_users_query,
+    parse_user_id,
+    prefix_range,
+)
+
+def compile_query(query):
+    return str(query.compile(dialect=postgresql.dialect()))
+
+def test_prefix_range():
+    assert prefix_range("ali") == ("ali", "alj")
+    assert prefix_range("a\U0010ffff") == ("a\U0010ffff", "b")
+    assert prefix_range("\U0010ffff") == ("\U0010ffff", None)
+    assert prefix_range("퟿") == ("퟿", "")
+
+def test_list_users_query_keeps_filters_in_statement():
+    active = compile_query(list_users_query(False, frozenset()))
+    assert "WHERE NOT users.deleted AND users.id >" in active
+    assert "ORDER BY users.id" in active and "LIMIT" in active
+    searched = compile_query(list_users_query(True, frozenset({"role", "email_from", "email_to"})))
+    assert "WHERE users.deleted AND" in searched
+    assert "users.role =" in searched
+    assert "users.email ~>=~" in searched and "users.email ~<~" in searched
+    assert "users.username" not in searched.split("FROM")[1]
+
+def test_list_users_query_is_built_once_per_combination():
+    assert list_users_query(False, frozenset({"role"})) is list_users_query(False, frozenset({"role"}))
+
+def test_parse_user_id():
+    assert parse_user_id("42") == 42
+    assert parse_user_id(str(MAX_USER_ID)) == MAX_USER_ID
+    for value in ("", "-1", "4a", "²", "٣", str(MAX_USER_ID + 1)):
+        assert parse_user_id(value) is None
+
+def test_update_user_returns_replaced_names():
+    update = compile_query(UPDATE_USER)
+    assert "FOR UPDATE) AS \"old\" WHERE users.id = \"old\".id" in update
+    assert "\"old\".username AS old_username" in update
+    assert "\"old\".email AS old_email" in update
@@ -0,0 +1,90 @@
+import asyncio
+
+from grpc_user.src.user_cache import REDIS_KEY_PREFIX, TOMBSTONE, UserCache
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value if isinstance(value, bytes) else value.encode()
+        return True
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+def make_loader(calls, delay=0):
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"id": "1", "username": "alice", "email": "alice@example.com", "role": "user"}
+    return loader
+
+def test_concurrent_misses_share_one_load():
+    async def run():
+        cache, calls = UserCache(10, 5), []
+        results = await asyncio.gather(
+            *(cache.get("1", make_loader(calls, delay=0.01)) for _ in range(10))
+        )
+        await cache.get("1", make_loader(calls))
+        return cache, calls, results
+    cache, calls, results = asyncio.run(run())
+    assert len(calls) == 1
+    assert cache.coalesced == 9 and cache.hits == 1
+    assert all(result == results[0] for result in results)
+
+def test_redis_tier_is_shared():
+    async def run():
+        redis, calls = FakeRedis(), []
+        first, second = UserCache(10, 5, redis=redis), UserCache(10, 5, redis=redis)
+        await first.get("1", make_loader(calls))
+        user = await second.get("1", make_loader(calls))
+        return second, calls, user
+    second, calls, user = asyncio.run(run())
+    assert len(calls) == 1
+    assert second.redis_hits == 1
+    assert user["username"] == "alice"
+
+def test_invalidate_drops_both_tiers():
+    async def run():
+        redis, calls = FakeRedis(), []
+        cache = UserCache(10, 5, redis=redis)
+        await cache.get("1", make_loader(calls))
+        await cache.invalidate("1")
+        assert redis.values[REDIS_KEY_PREFIX + "1"] == TOMBSTONE
+        await cache.get("1", make_loader(calls))
+        return calls
+    assert len(asyncio.run(run())) == 2
+
+def test_invalidate_during_load_is_not_cached():
+    async def run():
+        redis, calls = FakeRedis(), []
+        cache = UserCache(10, 5, redis=redis)
+        load = asyncio.ensure_future(cache.get("1", make_loader(calls, delay=0.02)))
+        await asyncio.sleep(0.005)
+        await cache.invalidate("1")
+        await load
+        return cache, redis
+    cache, redis = asyncio.run(run())
+    assert len(cache) == 0
+    assert redis.values == {REDIS_KEY_PREFIX + "1": TOMBSTONE}
+
+def test_write_on_another_instance_during_load_is_not_cached():
+    async def run():
+        redis, calls = FakeRedis(), []
+        reader, writer = UserCache(10, 5, redis=redis), UserCache(10, 5, redis=redis)
+        load = asyncio.ensure_future(reader.get("1", make_loader(calls, delay=0.02)))
+        await asyncio.sleep(0.005)
+        await writer.invalidate("1")
+        await load
+        # Loads during the tombstone go to the database and are not stored.
+        await UserCache(10, 5, redis=redis).get("1", make_loader(calls))
+        return redis, calls
+    redis, calls = asyncio.run(run())
+    assert redis.values == {REDIS_KEY_PREFIX + "1": TOMBSTONE}
+    assert len(calls) == 2
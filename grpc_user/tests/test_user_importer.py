@@ -0,0 +1,44 @@
+import asyncio
+
+from grpc_user.src.user_importer import MAX_REPORTED_ERRORS, ImportReport, ImportRow, UserImporter
+
+class FakePasswordHasher:
+    async def hash_many(self, passwords):
+        return ["hash:" + password for password in passwords]
+
+class UnreachableDatabase:
+    def get_session(self):
+        raise ConnectionError("database is unreachable")
+
+async def stream(rows):
+    for row in rows:
+        yield row
+
+def test_validate_rejects_incomplete_and_duplicate_rows():
+    importer, report = UserImporter(None, FakePasswordHasher(), 10), ImportReport()
+    rows = [
+        ImportRow(1, "alice", "alice@example.com", "secret"),
+        ImportRow(2, "", "bob@example.com", "secret"),
+        ImportRow(3, "carol", "carol.example.com", "secret"),
+        ImportRow(4, "alice", "other@example.com", "secret"),
+        ImportRow(5, "dave", "alice@example.com", "secret"),
+    ]
+    valid = importer._validate(rows, report)
+    assert [row.number for row in valid] == [1]
+    assert report.failed == 4
+    assert [error[0] for error in report.errors] == [2, 3, 4, 5]
+
+def test_failed_batches_are_reported_and_import_goes_on():
+    importer = UserImporter(UnreachableDatabase(), FakePasswordHasher(), 2)
+    rows = [ImportRow(number, "user{}".format(number), "user{}@example.com".format(number), "secret") for number in range(1, 6)]
+    rows.append(ImportRow(6, "user6", "", "secret"))
+    report = asyncio.run(importer.import_users(stream(rows)))
+    assert report.imported == 0 and report.failed == 6
+    assert [error[2] for error in report.errors].count("Batch failed to load") == 5
+
+def test_report_keeps_only_the_first_errors():
+    report = ImportReport()
+    for number in range(MAX_REPORTED_ERRORS + 10):
+        report.reject(ImportRow(number, "user", "", ""), "Invalid email")
+    assert report.failed == MAX_REPORTED_ERRORS + 10
+    assert len(report.errors) == MAX_REPORTED_ERRORS
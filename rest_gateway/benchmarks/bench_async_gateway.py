@@ -0,0 +1,152 @@
+"""
+Benchmark of the gateway request path in sync and async modes.
+
+A stub `ProductService` backend answers `GetProduct` after a fixed delay. The
+same endpoint is then driven through a threadpool `def` handler making a
+blocking gRPC call, as the gateway did before it moved to `grpc.aio`, and
+through the `async def` controller built on the `grpc.aio` service layer.
+Requests per second are reported for both modes.
+
+Usage:
+    python -m rest_gateway.benchmarks.bench_async_gateway --requests 5000 --concurrency 500
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+import grpc
+import httpx
+from fastapi import FastAPI
+
+from rest_gateway.proto import product_pb2, product_pb2_grpc
+from rest_gateway.src.channel_manager import (
+    PRODUCT_SERVICE,
+    ChannelManager,
+    aio_channel_manager,
+)
+from rest_gateway.src.controllers import product_controller
+
+
+class StubProductServicer(product_pb2_grpc.ProductServiceServicer):
+    """
+    Product backend that answers every `GetProduct` call after a fixed delay.
+    """
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+
+    async def GetProduct(self, request, context):
+        await asyncio.sleep(self.delay)
+        return product_pb2.Product(
+            _id=request.id,
+            name="Oak wardrobe",
+            description="Two doors, minor scratches",
+            price=120.0,
+            state="used",
+            owner_id="1",
+        )
+
+
+def start_stub_backend(delay: float) -> str:
+    """
+    Starts the stub product backend on its own thread and event loop.
+
+    Args:
+        delay (float): The delay in seconds before every response.
+
+    Returns:
+        str: The address the stub backend listens on.
+    """
+    started = threading.Event()
+    address = {}
+
+    async def run() -> None:
+        server = grpc.aio.server()
+        product_pb2_grpc.add_ProductServiceServicer_to_server(
+            StubProductServicer(delay), server
+        )
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        address["value"] = f"127.0.0.1:{port}"
+        started.set()
+        await server.wait_for_termination()
+
+    threading.Thread(target=lambda: asyncio.run(run()), daemon=True).start()
+    started.wait()
+    return address["value"]
+
+
+def build_sync_app(channel_manager: ChannelManager) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/products/{product_id}")
+    def get_product_endpoint(product_id: str):
+        client = channel_manager.get_stub(
+            PRODUCT_SERVICE, product_pb2_grpc.ProductServiceStub
+        )
+        response = client.GetProduct(product_pb2.GetProductRequest(id=product_id))
+        return {"id": response._id, "name": response.name, "price": response.price}
+
+    return app
+
+
+def build_async_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(product_controller.router, prefix="/api/v1/products")
+    return app
+
+
+async def drive(app: FastAPI, requests: int, concurrency: int) -> float:
+    """
+    Sends `requests` GET requests to the app with `concurrency` in flight.
+
+    Returns:
+        float: The achieved requests per second.
+    """
+    remaining = iter(range(requests))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gw") as client:
+
+        async def worker() -> None:
+            for i in remaining:
+                response = await client.get(f"/api/v1/products/{i}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return requests / elapsed
+
+
+async def main(args: argparse.Namespace) -> None:
+    address = start_stub_backend(args.delay_ms / 1000)
+    aio_channel_manager.targets = {PRODUCT_SERVICE: address}
+
+    channel_manager = ChannelManager({PRODUCT_SERVICE: address})
+    channel_manager.connect()
+    sync_rps = await drive(
+        build_sync_app(channel_manager), args.requests, args.concurrency
+    )
+    channel_manager.close()
+
+    aio_channel_manager.connect()
+    async_rps = await drive(build_async_app(), args.requests, args.concurrency)
+    await aio_channel_manager.close()
+
+    print(
+        "requests={} concurrency={} backend_delay={}ms".format(
+            args.requests, args.concurrency, args.delay_ms
+        )
+    )
+    print("sync  (threadpool + grpc):  {:8.1f} req/s".format(sync_rps))
+    print("async (grpc.aio):           {:8.1f} req/s".format(async_rps))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--delay-ms", type=float, default=20.0)
+    asyncio.run(main(parser.parse_args()))
@@ -1,8 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from rest_gateway.src.channel_manager import aio_channel_manager
 from rest_gateway.src.controllers import product_controller, user_controller
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Opens the upstream gRPC channels on startup and closes them on shutdown.
+    """
+    aio_channel_manager.connect()
+    app.state.channel_manager = aio_channel_manager
+    yield
+    await aio_channel_manager.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(user_controller.router, prefix="/api/v1/users")
 app.include_router(product_controller.router, prefix="/api/v1/products")
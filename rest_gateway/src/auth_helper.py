@@ -1,42 +1,36 @@
-from functools import wraps
+from typing import Awaitable, Callable
 
 from fastapi import Header, HTTPException
 
-from rest_gateway.src.services.auth_service import get_user_id
-from rest_gateway.src.services.user_service import get_user
+from rest_gateway.src.token_verifier import token_verifier
 
 
-def authorize(roles: list[str]) -> callable:
+def authorize(roles: list[str]) -> Callable[..., Awaitable[dict]]:
     """
-    A decorator function that authorizes a user based on their role.
+    Builds a FastAPI dependency that authorizes a user based on their role.
+
+    The token is verified and its claims, including the role, are read by the
+    token verifier, which checks signatures locally when the authorization
+    service signs tokens with asymmetric keys.
 
     Args:
-        roles (list[str]): A list of roles that are allowed to access the decorated function.
+        roles (list[str]): A list of roles that are allowed to access the endpoint.
 
     Returns:
-        callable: A wrapper function that checks the user's role before calling the original function.
+        callable: A dependency returning the claims of the token, to be used with `Depends`.
     """
 
-    def wrapper(func: callable) -> callable:
-        @wraps(func)
-        def wrapped(*args, **kwargs):
-            token = kwargs.get("token")
-            if not token:
-                raise HTTPException(status_code=401, detail="Token not provided")
-
-            user_id = get_user_id(token)
-            if user_id == -1:
-                raise HTTPException(status_code=401, detail="Wrong token")
-
-            user = get_user(user_id)
-            if user is None:
-                raise HTTPException(status_code=401, detail="User not found")
+    async def dependency(token: str | None = Header(None)) -> dict:
+        if not token:
+            raise HTTPException(status_code=401, detail="Token not provided")
 
-            if user["role"] not in roles:
-                raise HTTPException(status_code=403, detail="Unauthorized")
+        claims = await token_verifier.verify(token)
+        if claims is None:
+            raise HTTPException(status_code=401, detail="Wrong token")
 
-            return func(*args, **kwargs)
+        if claims["role"] not in roles:
+            raise HTTPException(status_code=403, detail="Unauthorized")
 
-        return wrapped
+        return claims
 
-    return wrapper
+    return dependency
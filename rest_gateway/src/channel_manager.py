@@ -0,0 +1,166 @@
+import asyncio
+import itertools
+import logging
+from typing import TypeVar
+
+import grpc
+
+from rest_gateway.src.config import config
+
+"""
+This module contains the registry of long-lived gRPC channels used by the gateway.
+
+Channels to every upstream service are opened once in the application lifespan
+and shared by all requests, so a request no longer pays for a TCP and HTTP/2
+handshake on each upstream call.
+"""
+
+Stub = TypeVar("Stub")
+
+AUTH_SERVICE = "auth"
+USER_SERVICE = "user"
+PRODUCT_SERVICE = "product"
+
+
+class ChannelManager:
+    """
+    Registry of pooled gRPC channels and stubs for the upstream services.
+
+    Every upstream gets a fixed number of channels. Stubs are handed out
+    round-robin over those channels, so concurrent requests are spread over
+    several HTTP/2 connections instead of queueing on a single one.
+
+    Attributes:
+        targets (dict[str, str]): Upstream service name mapped to its address.
+        channels_per_service (int): The number of channels opened per upstream.
+        channels (dict[str, list[grpc.Channel]]): Open channels per upstream.
+
+    Methods:
+        connect: Opens the channels to all upstream services.
+        close: Closes all open channels.
+        get_stub: Returns a stub of the given class bound to one of the channels.
+    """
+
+    def __init__(self, targets: dict[str, str]) -> None:
+        self.targets = targets
+        self.channels_per_service = max(1, int(config.GRPC_CHANNELS_PER_SERVICE))
+        self.channels: dict[str, list[grpc.Channel]] = {}
+        self._stubs: dict[tuple[str, type], list] = {}
+        self._counters: dict[str, itertools.count] = {}
+
+    @staticmethod
+    def channel_options() -> list[tuple[str, int]]:
+        """
+        Builds the channel arguments shared by all upstream channels.
+
+        Returns:
+            list[tuple[str, int]]: gRPC channel arguments with keepalive and reconnect backoff settings.
+        """
+        return [
+            ("grpc.keepalive_time_ms", int(config.GRPC_KEEPALIVE_TIME_MS)),
+            ("grpc.keepalive_timeout_ms", int(config.GRPC_KEEPALIVE_TIMEOUT_MS)),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+            (
+                "grpc.initial_reconnect_backoff_ms",
+                int(config.GRPC_INITIAL_RECONNECT_BACKOFF_MS),
+            ),
+            (
+                "grpc.max_reconnect_backoff_ms",
+                int(config.GRPC_MAX_RECONNECT_BACKOFF_MS),
+            ),
+            # Without a local subchannel pool, channels to the same target share
+            # a single connection, which defeats having several of them.
+            ("grpc.use_local_subchannel_pool", 1),
+        ]
+
+    def _create_channel(self, address: str) -> grpc.Channel:
+        return grpc.insecure_channel(address, options=self.channel_options())
+
+    def connect(self) -> None:
+        """
+        Opens the channels to all upstream services.
+
+        Calling this method on an already connected manager does nothing.
+        """
+        if self.channels:
+            return
+        for service, address in self.targets.items():
+            self.channels[service] = [
+                self._create_channel(address)
+                for _ in range(self.channels_per_service)
+            ]
+            self._counters[service] = itertools.count()
+            logging.info(
+                "Opened %d channels to %s service at %s",
+                self.channels_per_service,
+                service,
+                address,
+            )
+
+    def close(self) -> None:
+        """
+        Closes all open channels and forgets the stubs bound to them.
+        """
+        for service, channels in self.channels.items():
+            for channel in channels:
+                channel.close()
+            logging.info("Closed channels to %s service", service)
+        self._reset()
+
+    def _reset(self) -> None:
+        self.channels = {}
+        self._stubs = {}
+        self._counters = {}
+
+    def get_stub(self, service: str, stub_class: type[Stub]) -> Stub:
+        """
+        Returns a stub of the given class bound to one of the service channels.
+
+        Args:
+            service (str): The name of the upstream service.
+            stub_class (type): The generated stub class, e.g. `UserServiceStub`.
+
+        Returns:
+            Stub: A stub instance, picked round-robin over the service channels.
+        """
+        channels = self.channels.get(service)
+        if not channels:
+            raise RuntimeError(
+                "Channels to {} service are not open".format(service)
+            )
+        stubs = self._stubs.get((service, stub_class))
+        if stubs is None:
+            stubs = [stub_class(channel) for channel in channels]
+            self._stubs[(service, stub_class)] = stubs
+        return stubs[next(self._counters[service]) % len(stubs)]
+
+
+class AioChannelManager(ChannelManager):
+    """
+    Registry of pooled `grpc.aio` channels for the asynchronous service layer.
+
+    `grpc.aio` channels are bound to the event loop they were created in, so
+    this manager has to be connected from within the running application loop.
+    """
+
+    def _create_channel(self, address: str) -> grpc.aio.Channel:
+        return grpc.aio.insecure_channel(address, options=self.channel_options())
+
+    async def close(self) -> None:
+        """
+        Closes all open channels and forgets the stubs bound to them.
+        """
+        for service, channels in self.channels.items():
+            await asyncio.gather(*(channel.close() for channel in channels))
+            logging.info("Closed channels to %s service", service)
+        self._reset()
+
+
+UPSTREAM_TARGETS = {
+    AUTH_SERVICE: f"{config.AUTH_SERVICE_HOSTNAME}:{config.AUTH_SERVICE_PORT}",
+    USER_SERVICE: f"{config.USER_SERVICE_HOSTNAME}:{config.USER_SERVICE_PORT}",
+    PRODUCT_SERVICE: f"{config.PRODUCT_SERVICE_HOSTNAME}:{config.PRODUCT_SERVICE_PORT}",
+}
+
+aio_channel_manager = AioChannelManager(UPSTREAM_TARGETS)
@@ -20,6 +20,16 @@ class Config:
     PRODUCT_SERVICE_PORT = os.getenv("PRODUCT_SERVICE_PORT", "50053")
     HOST= os.getenv("HOST", "0.0.0.0")
     PORT = os.getenv("PORT", "8080")
+    GRPC_CHANNELS_PER_SERVICE = os.getenv("GRPC_CHANNELS_PER_SERVICE", "2")
+    GRPC_KEEPALIVE_TIME_MS = os.getenv("GRPC_KEEPALIVE_TIME_MS", "30000")
+    GRPC_KEEPALIVE_TIMEOUT_MS = os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", "10000")
+    GRPC_INITIAL_RECONNECT_BACKOFF_MS = os.getenv(
+        "GRPC_INITIAL_RECONNECT_BACKOFF_MS", "1000"
+    )
+    GRPC_MAX_RECONNECT_BACKOFF_MS = os.getenv("GRPC_MAX_RECONNECT_BACKOFF_MS", "30000")
+    AUTH_PUBLIC_KEYS_REFRESH_SECONDS = os.getenv(
+        "AUTH_PUBLIC_KEYS_REFRESH_SECONDS", "300"
+    )
 
 
 config = Config()
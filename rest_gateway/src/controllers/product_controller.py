@@ -1,14 +1,23 @@
-from fastapi import APIRouter, Header
+import json
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
 from rest_gateway.src.auth_helper import authorize
-from rest_gateway.src.models import Product
-from rest_gateway.src.services.auth_service import get_user_id
-from rest_gateway.src.services.product_service import (
+from rest_gateway.src.models import BatchRequest, Product
+from rest_gateway.src.services.aio.product_service import (
+    PRODUCT_FIELDS,
+    batch_get_products,
     create_product,
     delete_product,
+    full_text_search,
     get_product,
+    list_products,
+    search_products,
+    stream_products,
     update_product,
-    get_all_products,
 )
 
 """
@@ -16,44 +25,120 @@ This module contains the product controller, which handles all
 product-related operations. This includes creating, reading,
 updating and deleting products.
 
-The controller uses the `src.services.product_service` module to perform
+The controller uses the `src.services.aio.product_service` module to perform
 the actual operations on the products.
 """
 
 router = APIRouter()
 
 
-@authorize(["user", "admin"])
+def parse_fields(fields: str | None) -> list[str]:
+    """
+    Parses a comma-separated list of product fields from a query parameter.
+
+    Args:
+        fields (str): The comma-separated field names, or None for all fields.
+
+    Returns:
+        list[str]: The requested field names, empty for all fields.
+    """
+    if not fields:
+        return []
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = set(requested) - set(PRODUCT_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail="Unknown fields: {}".format(", ".join(sorted(unknown))),
+        )
+    return requested
+
+
 @router.post("/")
-def create_product_endpoint(product: Product, token: str = Header(None)):
-    token_user_id = get_user_id(token)
-    if token_user_id == -1 or token_user_id != int(product.owner_id):
+async def create_product_endpoint(
+    product: Product, claims: dict = Depends(authorize(["user", "admin"]))
+):
+    if claims["user_id"] != int(product.owner_id):
         return {"error": "wrong token"}
-    result = create_product(product)
+    result = await create_product(product)
+    return result
+
+
+@router.post("/batch")
+async def batch_get_products_endpoint(batch: BatchRequest, fields: str | None = None):
+    result = await batch_get_products(batch.ids, parse_fields(fields))
+    return result
+
+
+@router.get("/stream")
+async def stream_products_endpoint(fields: str | None = None):
+    requested_fields = parse_fields(fields)
+
+    async def ndjson():
+        async for product in stream_products(requested_fields):
+            yield json.dumps(product) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/search")
+async def search_products_endpoint(
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    state: str | None = None,
+    owner_id: str | None = None,
+    sort: Literal["created", "price"] = "created",
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(20, ge=1, le=100),
+    fields: str | None = None,
+    explain: bool = False,
+):
+    result = await search_products(
+        min_price=min_price,
+        max_price=max_price,
+        state=state,
+        owner_id=owner_id,
+        sort_by=sort,
+        descending=order == "desc",
+        limit=limit,
+        fields=parse_fields(fields),
+        explain=explain,
+    )
+    return result
+
+
+@router.get("/fulltext")
+async def full_text_search_endpoint(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    fields: str | None = None,
+):
+    result = await full_text_search(q, limit, parse_fields(fields))
     return result
 
 
-# @authorize(["user", "admin"])
 @router.get("/{product_id}")
-def get_product_endpoint(product_id: str):
-    result = get_product(product_id)
+async def get_product_endpoint(product_id: str):
+    result = await get_product(product_id)
     return result
 
-@router.get('/')
-def get_all_products_endpoint():
-    result = get_all_products()
+@router.get("/")
+async def list_products_endpoint(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    fields: str | None = None,
+):
+    result = await list_products(limit, cursor, parse_fields(fields))
     return result
 
 
-@authorize(["admin"])
-@router.put("/{product_id}")
-def update_product_endpoint(product_id: str, product: Product):
-    result = update_product(product_id, product)
+@router.put("/{product_id}", dependencies=[Depends(authorize(["admin"]))])
+async def update_product_endpoint(product_id: str, product: Product):
+    result = await update_product(product_id, product)
     return result
 
 
-@authorize(["admin"])
-@router.delete("/{product_id}")
-def delete_product_endpoint(product_id: str):
-    result = delete_product(product_id)
+@router.delete("/{product_id}", dependencies=[Depends(authorize(["admin"]))])
+async def delete_product_endpoint(product_id: str):
+    result = await delete_product(product_id)
     return result
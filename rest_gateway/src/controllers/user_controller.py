@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Header
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from rest_gateway.src.auth_helper import authorize
-from rest_gateway.src.models import FullUser, LoginData, User
-from rest_gateway.src.services.auth_service import get_user_id
-from rest_gateway.src.services.user_service import (
+from rest_gateway.src.models import BatchRequest, FullUser, LoginData, User
+from rest_gateway.src.services.aio.user_service import (
+    batch_get_users,
+    check_availability,
     check_credentials,
     create_user,
     delete_user,
     get_user,
+    list_users,
     update_user,
 )
 
@@ -16,7 +18,7 @@ This module contains the user controller, which handles all
 user-related operations. This includes creating, reading,
 updating and deleting user.
 
-The controller uses the `src.services.user_service` module to perform
+The controller uses the `src.services.aio.user_service` module to perform
 the actual operations on users.
 """
 
@@ -24,32 +26,74 @@ router = APIRouter()
 
 
 @router.post("/create")
-def create_user_endpoint(user: User):
-    created_user = create_user(user)
+async def create_user_endpoint(user: User):
+    created_user = await create_user(user)
     return created_user
 
 
+@router.post("/batch")
+async def batch_get_users_endpoint(batch: BatchRequest):
+    result = await batch_get_users(batch.ids)
+    return result
+
+
+@router.get("/", dependencies=[Depends(authorize(["admin"]))])
+async def list_users_endpoint(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    role: str | None = None,
+    deleted: bool = False,
+    username_prefix: str | None = Query(None, min_length=1, max_length=100),
+    email_prefix: str | None = Query(None, min_length=1, max_length=100),
+):
+    result = await list_users(
+        limit,
+        cursor=cursor,
+        role=role,
+        deleted=deleted,
+        username_prefix=username_prefix,
+        email_prefix=email_prefix,
+    )
+    return result
+
+
+@router.get("/availability")
+async def check_availability_endpoint(
+    username: str | None = Query(None, min_length=1, max_length=100),
+    email: str | None = Query(None, min_length=1, max_length=254),
+):
+    if username is None and email is None:
+        raise HTTPException(status_code=400, detail="Username or email required")
+    result = await check_availability(username, email)
+    return result
+
+
 @router.get("/{user_id}")
-def get_user_endpoint(user_id: str):
-    got_user = get_user(user_id)
+async def get_user_endpoint(user_id: str):
+    got_user = await get_user(user_id)
     return got_user
 
 
-@authorize(["user", "admin"])
 @router.put("/{user_id}")
-def update_user_endpoint(user_id: str, user: FullUser, token: str = Header(None)):
-    result = update_user(user_id, user)
+async def update_user_endpoint(
+    user_id: str, user: FullUser, claims: dict = Depends(authorize(["user", "admin"]))
+):
+    if claims["role"] != "admin":
+        if user_id != str(claims["user_id"]):
+            raise HTTPException(status_code=403, detail="Unauthorized")
+        if user.role != claims["role"]:
+            raise HTTPException(status_code=403, detail="Only admins can change roles")
+    result = await update_user(user_id, user)
     return result
 
 
-@authorize(["admin"])
-@router.delete("/{user_id}")
-def delete_user_endpoint(user_id: str, token: str = Header(None)):
-    result = delete_user(user_id)
+@router.delete("/{user_id}", dependencies=[Depends(authorize(["admin"]))])
+async def delete_user_endpoint(user_id: str):
+    result = await delete_user(user_id)
     return result
 
 
 @router.post("/login")
-def login_user(login_data: LoginData):
-    result = check_credentials(login_data)
+async def login_user(login_data: LoginData):
+    result = await check_credentials(login_data)
     return result
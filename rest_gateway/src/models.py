@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class LoginData(BaseModel):
@@ -24,3 +24,7 @@ class Product(BaseModel):
     price: float
     state: str
     owner_id: str
+
+
+class BatchRequest(BaseModel):
+    ids: list[str] = Field(min_length=1, max_length=100)
@@ -0,0 +1,98 @@
+import grpc
+
+from rest_gateway.proto import authorization_pb2, authorization_pb2_grpc
+from rest_gateway.src.channel_manager import AUTH_SERVICE, aio_channel_manager
+
+"""
+This module contains asynchronous authentication service related functions
+built on `grpc.aio` stubs.
+
+The `issue_token` function sends an `IssueTokenRequest` to the `Authorization` service
+and returns the issued token.
+
+The `verify_and_get_claims` function sends a `VerifyAndGetClaimsRequest` to the
+`Authorization` service and returns the user ID and role carried by the token.
+
+The `get_public_keys` and `check_revocation` functions back the local token
+verification of `src.token_verifier`.
+"""
+
+
+async def issue_token(user_id: int, role: str = "user") -> str:
+    """
+    Issues a token for a given user ID.
+
+    Args:
+        user_id (int): The ID of the user for whom to issue a token.
+        role (str): The role of the user, embedded into the token.
+
+    Returns:
+        str: The issued token.
+    """
+    client = aio_channel_manager.get_stub(
+        AUTH_SERVICE, authorization_pb2_grpc.AuthorizationStub
+    )
+    request = authorization_pb2.IssueTokenRequest(user_id=int(user_id), role=role)
+    response = await client.IssueToken(request)
+    return response.token
+
+
+async def verify_and_get_claims(token: str) -> dict | None:
+    """
+    Verifies an authentication token and retrieves its claims in one call.
+
+    Args:
+        token (str): The authentication token of the user.
+
+    Returns:
+        dict or None: The user ID, role, expiry and ID of the token, or None if the token is invalid, expired or revoked.
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            AUTH_SERVICE, authorization_pb2_grpc.AuthorizationStub
+        )
+        request = authorization_pb2.VerifyAndGetClaimsRequest(token=token)
+        response = await client.VerifyAndGetClaims(request)
+    except grpc.aio.AioRpcError as e:
+        return None
+    if not response.valid:
+        return None
+    return {
+        "user_id": response.user_id,
+        "role": response.role,
+        "expires_at": response.expires_at,
+        "jti": response.jti,
+    }
+
+
+async def get_public_keys() -> list[authorization_pb2.PublicKey]:
+    """
+    Retrieves the public keys that verify token signatures.
+
+    Returns:
+        list[authorization_pb2.PublicKey]: The key ID, algorithm and PEM encoded key of every key.
+        Empty if tokens are signed with a shared secret.
+    """
+    client = aio_channel_manager.get_stub(
+        AUTH_SERVICE, authorization_pb2_grpc.AuthorizationStub
+    )
+    response = await client.GetPublicKeys(authorization_pb2.GetPublicKeysRequest())
+    return list(response.keys)
+
+
+async def check_revocation(token_id: str) -> bool:
+    """
+    Checks if a token is revoked.
+
+    Args:
+        token_id (str): The ID of the token, i.e. its `jti` claim.
+
+    Returns:
+        bool: True if the token is revoked, False otherwise.
+    """
+    client = aio_channel_manager.get_stub(
+        AUTH_SERVICE, authorization_pb2_grpc.AuthorizationStub
+    )
+    request = authorization_pb2.CheckRevocationRequest(token_id=token_id)
+    response = await client.CheckRevocation(request)
+    return response.revoked
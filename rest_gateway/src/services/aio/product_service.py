@@ -0,0 +1,320 @@
+from typing import AsyncIterator
+
+import grpc
+
+from rest_gateway.proto import product_pb2, product_pb2_grpc
+from rest_gateway.src.channel_manager import PRODUCT_SERVICE, aio_channel_manager
+
+
+PRODUCT_FIELDS = ("name", "description", "price", "state", "owner_id")
+
+
+def product_to_dict(
+    product: product_pb2.Product, fields: list[str] | None = None
+) -> dict[str, str]:
+    """
+    Converts a product message into the dictionary returned by the API.
+
+    Args:
+        product (product_pb2.Product): The product message.
+        fields (list[str]): The product fields to include, all fields if empty.
+
+    Returns:
+        dict[str, str]: The product's ID and the requested fields.
+    """
+    result = {"id": product._id}
+    for field in fields or PRODUCT_FIELDS:
+        result[field] = getattr(product, field)
+    return result
+
+
+async def list_products(
+    page_size: int, cursor: str | None = None, fields: list[str] | None = None
+) -> dict:
+    """
+    Retrieves a page of products from the product service.
+
+    Args:
+        page_size (int): The maximum number of products on the page.
+        cursor (str): The cursor returned with the previous page, if any.
+        fields (list[str]): The product fields to return, all fields if empty.
+
+    Returns:
+        dict: The products of the page and the cursor of the next page, which is None on the last page.
+        If the request is invalid, returns a dictionary with an "error" key.
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            PRODUCT_SERVICE, product_pb2_grpc.ProductServiceStub
+        )
+        request = product_pb2.ListProductsRequest(
+            page_size=page_size, cursor=cursor or "", fields=fields or []
+        )
+        response = await client.ListProducts(request)
+    except grpc.aio.AioRpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            return {"error": e.details()}
+        raise
+    return {
+        "products": [
+            product_to_dict(product, fields) for product in response.products
+        ],
+        "next_cursor": response.next_cursor or None,
+    }
+
+
+async def search_products(
+    min_price: float | None = None,
+    max_price: float | None = None,
+    state: str | None = None,
+    owner_id: str | None = None,
+    sort_by: str = "created",
+    descending: bool = False,
+    limit: int = 20,
+    fields: list[str] | None = None,
+    explain: bool = False,
+) -> dict:
+    """
+    Searches products by price range, state and owner.
+
+    Args:
+        min_price (float): The minimum price, inclusive.
+        max_price (float): The maximum price, inclusive.
+        state (str): The exact state of the product.
+        owner_id (str): The ID of the product's owner.
+        sort_by (str): The field to sort by, "created" or "price".
+        descending (bool): Whether to sort in descending order.
+        limit (int): The maximum number of products to return.
+        fields (list[str]): The product fields to return, all fields if empty.
+        explain (bool): Whether to report the index used by the query.
+
+    Returns:
+        dict: The products found and, if requested, the name of the index used.
+        If the request is invalid, returns a dictionary with an "error" key.
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            PRODUCT_SERVICE, product_pb2_grpc.ProductServiceStub
+        )
+        request = product_pb2.SearchProductsRequest(
+            min_price=min_price,
+            max_price=max_price,
+            state=state or "",
+            owner_id=owner_id or "",
+            sort_by=sort_by,
+            descending=descending,
+            limit=limit,
+            fields=fields or [],
+            explain=explain,
+        )
+        response = await client.SearchProducts(request)
+    except grpc.aio.AioRpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            return {"error": e.details()}
+        raise
+    result = {
+        "products": [
+            product_to_dict(product, fields) for product in response.products
+        ]
+    }
+    if explain:
+        result["index_used"] = response.index_used
+    return result
+
+
+async def full_text_search(
+    query: str, limit: int = 20, fields: list[str] | None = None
+) -> dict:
+    """
+    Searches products by words in their name and description.
+
+    Args:
+        query (str): The free-text query, e.g. "oak wardrobe".
+        limit (int): The maximum number of products to return.
+        fields (list[str]): The product fields to return, all fields if empty.
+
+    Returns:
+        dict: The matching products with their relevance scores, best match first.
+        If the request is invalid, returns a dictionary with an "error" key.
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            PRODUCT_SERVICE, product_pb2_grpc.ProductServiceStub
+        )
+        request = product_pb2.FullTextSearchRequest(
+            query=query, limit=limit, fields=fields or []
+        )
+        response = await client.FullTextSearch(request)
+    except grpc.aio.AioRpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            return {"error": e.details()}
+        raise
+    results = []
+    for result in response.results:
+        product = product_to_dict(result.product, fields)
+        product["score"] = result.score
+        results.append(product)
+    return {"products": results}
+
+
+async def batch_get_products(
+    product_ids: list[str], fields: list[str] | None = None
+) -> dict:
+    """
+    Retrieves several products by their IDs with a single upstream call.
+
+    Args:
+        product_ids (list[str]): The IDs of the products to retrieve.
+        fields (list[str]): The product fields to return, all fields if empty.
+
+    Returns:
+        dict: The products in the order of the requested IDs. Every entry has a "found" flag,
+        and entries of missing products contain only the ID and the flag.
+        If the request is invalid, returns a dictionary with an "error" key.
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            PRODUCT_SERVICE, product_pb2_grpc.ProductServiceStub
+        )
+        request = product_pb2.BatchGetProductsRequest(
+            ids=product_ids, fields=fields or []
+        )
+        response = await client.BatchGetProducts(request)
+    except grpc.aio.AioRpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            return {"error": e.details()}
+        raise
+    products = []
+    for result in response.results:
+        if result.found:
+            product = product_to_dict(result.product, fields)
+            product["found"] = True
+        else:
+            product = {"id": result.id, "found": False}
+        products.append(product)
+    return {"products": products}
+
+
+async def stream_products(fields: list[str] | None = None) -> AsyncIterator[dict]:
+    """
+    Streams all products from the product service.
+
+    Args:
+        fields (list[str]): The product fields to return, all fields if empty.
+
+    Yields:
+        dict[str, str]: The products, one at a time.
+    """
+    client = aio_channel_manager.get_stub(
+        PRODUCT_SERVICE, product_pb2_grpc.ProductServiceStub
+    )
+    call = client.StreamProducts(product_pb2.StreamProductsRequest(fields=fields or []))
+    try:
+        async for product in call:
+            yield product_to_dict(product, fields)
+    finally:
+        call.cancel()
+
+
+async def create_product(product: product_pb2.Product) -> dict[str, str]:
+    """
+    Creates a new product using the provided product details.
+
+    Args:
+        product: A product object containing name, description, price, state, and owner_id.
+
+    Returns:
+        Response (dict["id": str])
+    """
+    client = aio_channel_manager.get_stub(
+        PRODUCT_SERVICE, product_pb2_grpc.ProductServiceStub
+    )
+    new_product = product_pb2.Product(
+        name=product.name,
+        description=product.description,
+        price=product.price,
+        state=product.state,
+        owner_id=product.owner_id,
+    )
+    request = product_pb2.CreateProductRequest(product=new_product)
+    response = await client.CreateProduct(request)
+    result = {"id": response._id}
+    return result
+
+
+async def get_product(product_id: int) -> dict[str, str]:
+    """
+    Retrieves a product by its ID.
+
+    Args:
+        product_id (int): The ID of the product to retrieve.
+
+    Returns:
+        dict[str, str]: A dictionary containing the product's details, including its ID, name, description, price, state, and owner ID.
+        If the product is not found, returns a dictionary with an "error" key and a "Product not found" message.
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            PRODUCT_SERVICE, product_pb2_grpc.ProductServiceStub
+        )
+        request = product_pb2.GetProductRequest(id=product_id)
+        response = await client.GetProduct(request)
+    except grpc.aio.AioRpcError as e:
+        return {"error": "Product not found"}
+    result = product_to_dict(response)
+    return result
+
+
+async def update_product(product_id: int, product: product_pb2.Product) -> dict[str, str]:
+    """
+    Updates a product by its ID.
+
+    Args:
+        product_id: The ID of the product to update.
+        product: A product object containing the updated product details.
+
+    Returns:
+        dict: A dictionary containing the updated product's details, including its ID, name, description, price, state, and owner ID.
+        If the product is not found, returns a dictionary with an "error" key and a "Product not found" message.
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            PRODUCT_SERVICE, product_pb2_grpc.ProductServiceStub
+        )
+        new_product = product_pb2.Product(
+            _id=product_id,
+            name=product.name,
+            description=product.description,
+            price=product.price,
+            state=product.state,
+            owner_id=product.owner_id,
+        )
+        request = product_pb2.UpdateProductRequest(product=new_product)
+        response = await client.UpdateProduct(request)
+    except grpc.aio.AioRpcError as e:
+        return {"error": "Product not found"}
+    result = product_to_dict(response)
+    return result
+
+
+async def delete_product(product_id: int) -> dict[str, str]:
+    """
+    Deletes a product by its ID.
+
+    Args:
+        product_id (int): The ID of the product to delete.
+
+    Returns:
+        dict[str, str]: A dictionary containing the result of the deletion operation.
+        If the product is not found, returns a dictionary with an "error" key and a "Product not found" message.
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            PRODUCT_SERVICE, product_pb2_grpc.ProductServiceStub
+        )
+        request = product_pb2.DeleteProductRequest(id=product_id)
+        response = await client.DeleteProduct(request)
+    except grpc.aio.AioRpcError as e:
+        return {"error": "Product not found"}
+    result = {"success": response.success}
+    return result
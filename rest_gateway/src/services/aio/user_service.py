@@ -0,0 +1,272 @@
+import grpc
+
+from rest_gateway.proto import user_pb2, user_pb2_grpc
+from rest_gateway.src.channel_manager import USER_SERVICE, aio_channel_manager
+from rest_gateway.src.services.aio.auth_service import issue_token
+
+
+async def create_user(user: user_pb2.User) -> dict[str, str]:
+    """
+    Creates a new user and returns the created user's details.
+
+    Args:
+        user (user_pb2.User): The user to be created.
+
+    Returns:
+        dict[str, str]: A dictionary containing the created user's id, username, and email.
+            If the username or email is taken, returns a dictionary with an "error" key.
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            USER_SERVICE, user_pb2_grpc.UserServiceStub
+        )
+        request = user_pb2.CreateUserRequest(
+            username=user.username, password=user.password, email=user.email
+        )
+        response = await client.CreateUser(request)
+    except grpc.aio.AioRpcError as e:
+        if e.code() == grpc.StatusCode.ALREADY_EXISTS:
+            return {"error": e.details()}
+        raise
+
+    created_user = {
+        "id": response.user_id,
+        "username": user.username,
+        "email": user.email,
+    }
+    return created_user
+
+
+async def get_user(user_id: int) -> dict[str, str]:
+    """
+    Retrieves a user from the UserService by their ID.
+
+    Args:
+        user_id (str): The ID of the user to retrieve.
+
+    Returns:
+        dict: A dictionary containing the user's ID, username, email, and role.
+            If the user is not found, returns a dictionary with the key "error"
+            and the value "User not found".
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            USER_SERVICE, user_pb2_grpc.UserServiceStub
+        )
+        request = user_pb2.GetUserRequest(user_id=user_id)
+        response = await client.GetUser(request)
+    except grpc.aio.AioRpcError as e:
+        if e.details() == "User not found":
+            return {"error": "User not found"}
+        raise
+    got_user = {
+        "id": response.user.id,
+        "username": response.user.username,
+        "email": response.user.email,
+        "role": response.user.role,
+    }
+    return got_user
+
+
+async def batch_get_users(user_ids: list[str]) -> dict:
+    """
+    Retrieves several users from the UserService with a single call.
+
+    Args:
+        user_ids (list[str]): The IDs of the users to retrieve.
+
+    Returns:
+        dict: The users in the order of the requested IDs. Every entry has a "found" flag,
+            and entries of missing users contain only the ID and the flag.
+            If the request is invalid, returns a dictionary with an "error" key.
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            USER_SERVICE, user_pb2_grpc.UserServiceStub
+        )
+        request = user_pb2.BatchGetUsersRequest(user_ids=user_ids)
+        response = await client.BatchGetUsers(request)
+    except grpc.aio.AioRpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            return {"error": e.details()}
+        raise
+    users = []
+    for result in response.results:
+        if result.found:
+            users.append(
+                {
+                    "id": result.user.id,
+                    "username": result.user.username,
+                    "email": result.user.email,
+                    "role": result.user.role,
+                    "found": True,
+                }
+            )
+        else:
+            users.append({"id": result.user_id, "found": False})
+    return {"users": users}
+
+
+async def list_users(
+    page_size: int,
+    cursor: str | None = None,
+    role: str | None = None,
+    deleted: bool = False,
+    username_prefix: str | None = None,
+    email_prefix: str | None = None,
+) -> dict:
+    """
+    Retrieves a page of users from the UserService, ordered by their ID.
+
+    Args:
+        page_size (int): The maximum number of users on the page.
+        cursor (str): The cursor returned with the previous page, if any.
+        role (str): The role of the listed users, any role if None.
+        deleted (bool): Whether to list deleted users instead of active ones.
+        username_prefix (str): The case-sensitive start of the usernames, if any.
+        email_prefix (str): The case-sensitive start of the emails, if any.
+
+    Returns:
+        dict: The users of the page and the cursor of the next page, which is None on the last page.
+            If the request is invalid, returns a dictionary with an "error" key.
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            USER_SERVICE, user_pb2_grpc.UserServiceStub
+        )
+        request = user_pb2.ListUsersRequest(
+            page_size=page_size,
+            cursor=cursor or "",
+            role=role or "",
+            deleted=deleted,
+            username_prefix=username_prefix or "",
+            email_prefix=email_prefix or "",
+        )
+        response = await client.ListUsers(request)
+    except grpc.aio.AioRpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            return {"error": e.details()}
+        raise
+    return {
+        "users": [
+            {
+                "id": user.id,
+                "username": user.username,
+                "email": user.email,
+                "role": user.role,
+            }
+            for user in response.users
+        ],
+        "next_cursor": response.next_cursor or None,
+    }
+
+
+async def check_availability(
+    username: str | None = None, email: str | None = None
+) -> dict[str, bool]:
+    """
+    Checks whether a username or email is taken, e.g. while a signup form is filled in.
+
+    Args:
+        username (str): The username to check, if any.
+        email (str): The email to check, if any.
+
+    Returns:
+        dict[str, bool]: Whether each of the checked values is available.
+    """
+    client = aio_channel_manager.get_stub(
+        USER_SERVICE, user_pb2_grpc.UserServiceStub
+    )
+    request = user_pb2.CheckAvailabilityRequest(
+        username=username or "", email=email or ""
+    )
+    response = await client.CheckAvailability(request)
+    result = {}
+    if username:
+        result["username_available"] = not response.username_taken
+    if email:
+        result["email_available"] = not response.email_taken
+    return result
+
+
+async def update_user(user_id: int, user: user_pb2.User) -> dict[str, str]:
+    """
+    Updates a user in the UserService by their ID.
+
+    Args:
+        user_id (str): The ID of the user to update.
+        user (object): The user object containing the updated username, email, and role.
+
+    Returns:
+        dict: A dictionary containing a success flag indicating whether the update was successful.
+            If the user is not found, returns a dictionary with the key "error" and the value "User not found".
+            If the new username or email is taken, returns a dictionary with an "error" key.
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            USER_SERVICE, user_pb2_grpc.UserServiceStub
+        )
+        updated_user = user_pb2.User(
+            username=user.username, email=user.email, role=user.role
+        )
+        update_request = user_pb2.UpdateUserRequest(
+            user_id=user_id, updated_user=updated_user
+        )
+        response = await client.UpdateUser(update_request)
+    except grpc.aio.AioRpcError as e:
+        if e.details() == "User not found":
+            return {"error": "User not found"}
+        if e.code() == grpc.StatusCode.ALREADY_EXISTS:
+            return {"error": e.details()}
+        raise
+    result = {"success": response.success}
+    return result
+
+
+async def delete_user(user_id: int) -> dict[str, str]:
+    """
+    Deletes a user in the UserService by their ID.
+
+    Args:
+        user_id (int): The ID of the user to delete.
+
+    Returns:
+        dict: A dictionary containing a success flag indicating whether the deletion was successful.
+            If the user is not found, returns a dictionary with the key "error" and the value "User not found".
+    """
+    try:
+        client = aio_channel_manager.get_stub(
+            USER_SERVICE, user_pb2_grpc.UserServiceStub
+        )
+        request = user_pb2.DeleteUserRequest(user_id=user_id)
+        response = await client.DeleteUser(request)
+    except grpc.aio.AioRpcError as e:
+        if e.details() == "User not found":
+            return {"error": "User not found"}
+        raise
+    result = {"success": response.success}
+    return result
+
+
+async def check_credentials(LoginData) -> dict[str, str]:
+    """
+    Check the credentials of a user by sending a request to the UserService.
+
+    Args:
+        LoginData (object): An object containing the username and password of the user.
+
+    Returns:
+        dict: A dictionary containing the token for the authenticated user.
+            If the credentials are wrong, returns a dictionary with an "error" key.
+    """
+    client = aio_channel_manager.get_stub(
+        USER_SERVICE, user_pb2_grpc.UserServiceStub
+    )
+    request = user_pb2.CheckCredentialsRequest(
+        username=LoginData.username, password=LoginData.password
+    )
+    response = await client.CheckCredentials(request)
+    if response.user_id == "-1":
+        return {"error": "Wrong credentials"}
+    token = await issue_token(response.user_id, response.role)
+    return {"token": token}
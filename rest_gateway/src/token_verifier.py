@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import logging
+import time
+
+import grpc
+import jwt
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
+
+from rest_gateway.src.config import config
+from rest_gateway.src.services.aio.auth_service import (
+    check_revocation,
+    get_public_keys,
+    verify_and_get_claims,
+)
+
+"""
+This module contains the local verification of authentication tokens.
+
+When the authorization service signs tokens with asymmetric keys, the gateway
+verifies signatures and expiry itself with the cached public keys and only asks
+the authorization service whether the token is revoked. Tokens signed with the
+shared HS256 secret are still verified by the authorization service.
+"""
+
+# Minimal delay between two key fetches triggered by unknown key IDs, so that
+# tokens with forged key IDs cannot flood the authorization service.
+UNKNOWN_KID_REFRESH_SECONDS = 5
+
+
+class TokenVerifier:
+    """
+    Verifier of authentication tokens with cached public keys.
+
+    Attributes:
+        refresh_interval (float): How long fetched public keys are used before they are fetched again, in seconds.
+
+    Methods:
+        verify: Verifies a token and returns its claims.
+    """
+
+    def __init__(self, refresh_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+        self._keys: dict[str, tuple[str, object]] = {}
+        self._fetched_at = None
+        self._attempted_at = None
+        self._lock = asyncio.Lock()
+
+    async def _refresh(self) -> None:
+        async with self._lock:
+            # Another request may have refreshed the keys while this one waited.
+            if (
+                self._attempted_at is not None
+                and time.monotonic() - self._attempted_at < UNKNOWN_KID_REFRESH_SECONDS
+            ):
+                return
+            self._attempted_at = time.monotonic()
+            try:
+                public_keys = await get_public_keys()
+            except grpc.aio.AioRpcError as e:
+                # Stale keys remain usable, revoked tokens are still rejected
+                # by the revocation check.
+                logging.error("Failed to fetch public keys: {}".format(e.details()))
+                return
+            self._keys = {
+                public_key.kid: (
+                    public_key.algorithm,
+                    load_pem_public_key(public_key.pem.encode()),
+                )
+                for public_key in public_keys
+            }
+            self._fetched_at = time.monotonic()
+            logging.info("Fetched {} public keys".format(len(self._keys)))
+
+    async def _get_key(self, kid: str) -> tuple[str, object] | None:
+        if (
+            self._fetched_at is None
+            or time.monotonic() - self._fetched_at > self.refresh_interval
+            or kid not in self._keys
+        ):
+            await self._refresh()
+        return self._keys.get(kid)
+
+    async def verify(self, token: str) -> dict | None:
+        """
+        Verifies a token and returns its claims.
+
+        Args:
+            token (str): The authentication token of the user.
+
+        Returns:
+            dict or None: The user ID, role, expiry and ID of the token, or None if the token is invalid, expired or revoked.
+        """
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.InvalidTokenError:
+            return None
+        if kid is None:
+            return await verify_and_get_claims(token)
+
+        key = await self._get_key(kid)
+        if key is None:
+            return None
+        algorithm, public_key = key
+        try:
+            claims = jwt.decode(token, public_key, algorithms=[algorithm])
+        except jwt.InvalidTokenError:
+            return None
+
+        token_id = claims.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+        try:
+            if await check_revocation(token_id):
+                return None
+        except grpc.aio.AioRpcError as e:
+            logging.error("Failed to check token revocation: {}".format(e.details()))
+            return None
+        return {
+            "user_id": claims["user_id"],
+            "role": claims.get("role", "user"),
+            "expires_at": claims["exp"],
+            "jti": claims.get("jti", ""),
+        }
+
+
+token_verifier = TokenVerifier(float(config.AUTH_PUBLIC_KEYS_REFRESH_SECONDS))
@@ -0,0 +1,38 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from rest_gateway.src import auth_helper
+
+CLAIMS = {
+    "valid-user": {"user_id": 1, "role": "user", "expires_at": 0, "jti": "a"},
+    "valid-admin": {"user_id": 2, "role": "admin", "expires_at": 0, "jti": "b"},
+}
+
+@pytest.fixture
+def client(monkeypatch):
+    async def verify(token):
+        return CLAIMS.get(token)
+    monkeypatch.setattr(auth_helper.token_verifier, "verify", verify)
+
+    app = FastAPI()
+
+    @app.get("/admin")
+    async def admin_endpoint(claims: dict = Depends(auth_helper.authorize(["admin"]))):
+        return claims
+
+    return TestClient(app)
+
+def test_authorize_missing_token(client):
+    assert client.get("/admin").status_code == 401
+
+def test_authorize_wrong_token(client):
+    assert client.get("/admin", headers={"token": "forged"}).status_code == 401
+
+def test_authorize_wrong_role(client):
+    assert client.get("/admin", headers={"token": "valid-user"}).status_code == 403
+
+def test_authorize_returns_claims(client):
+    response = client.get("/admin", headers={"token": "valid-admin"})
+    assert response.status_code == 200
+    assert response.json()["user_id"] == 2
@@ -0,0 +1,26 @@
+import pytest
+from rest_gateway.proto import user_pb2_grpc
+from rest_gateway.src.channel_manager import ChannelManager
+
+def test_get_stub_round_robin():
+    manager = ChannelManager({"user": "localhost:50051"})
+    manager.connect()
+    stubs = [
+        manager.get_stub("user", user_pb2_grpc.UserServiceStub)
+        for _ in range(manager.channels_per_service * 2)
+    ]
+    assert len({id(stub) for stub in stubs}) == manager.channels_per_service
+    manager.close()
+
+def test_connect_is_idempotent():
+    manager = ChannelManager({"user": "localhost:50051"})
+    manager.connect()
+    channels = manager.channels["user"]
+    manager.connect()
+    assert manager.channels["user"] is channels
+    manager.close()
+
+def test_get_stub_not_connected():
+    manager = ChannelManager({"user": "localhost:50051"})
+    with pytest.raises(RuntimeError):
+        manager.get_stub("user", user_pb2_grpc.UserServiceStub)
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from rest_gateway.proto import authorization_pb2
+from rest_gateway.src import token_verifier as token_verifier_module
+from rest_gateway.src.token_verifier import TokenVerifier
+
+PRIVATE_KEY = ed25519.Ed25519PrivateKey.generate()
+PUBLIC_PEM = PRIVATE_KEY.public_key().public_bytes(
+    encoding=serialization.Encoding.PEM,
+    format=serialization.PublicFormat.SubjectPublicKeyInfo,
+).decode()
+
+def make_token(jti="abc", exp_offset=60, kid="k1"):
+    payload = {"user_id": 7, "role": "admin", "jti": jti, "exp": int(time.time()) + exp_offset}
+    return jwt.encode(payload, PRIVATE_KEY, algorithm="EdDSA", headers={"kid": kid})
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {"keys": 0, "revocation": 0}
+
+    async def get_public_keys():
+        calls["keys"] += 1
+        return [authorization_pb2.PublicKey(kid="k1", algorithm="EdDSA", pem=PUBLIC_PEM)]
+
+    async def check_revocation(token_id):
+        calls["revocation"] += 1
+        return token_id == "revoked"
+
+    monkeypatch.setattr(token_verifier_module, "get_public_keys", get_public_keys)
+    monkeypatch.setattr(token_verifier_module, "check_revocation", check_revocation)
+    return calls
+
+def test_verify_locally(calls):
+    verifier = TokenVerifier(300)
+    claims = asyncio.run(verifier.verify(make_token()))
+    assert claims["user_id"] == 7 and claims["role"] == "admin"
+    asyncio.run(verifier.verify(make_token()))
+    assert calls == {"keys": 1, "revocation": 2}
+
+def test_verify_rejects_revoked_expired_and_unknown_keys(calls):
+    verifier = TokenVerifier(300)
+    assert asyncio.run(verifier.verify(make_token(jti="revoked"))) is None
+    assert asyncio.run(verifier.verify(make_token(exp_offset=-60))) is None
+    assert asyncio.run(verifier.verify(make_token(kid="unknown"))) is None
+    assert asyncio.run(verifier.verify("garbage")) is None